@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.measure import summarize
+
+# Runs in its own process, started by benchmarks.run with DOCKER_HOST pointing at the fake daemon, because the
+# application reads its configuration and builds its singletons once per process.
+
+
+async def wait_for(condition, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.1)
+
+    return True
+
+
+async def measure_ticks(fleet: int, ticks: int, timeout: float) -> dict:
+    from src.app.core.schemas.autoscale import ScalingPolicy
+    from src.app.graph import ServiceGraph
+
+    graph = ServiceGraph()
+    await graph.repository.start()
+    await graph.client.start()
+    await graph.load_balancer.start()
+
+    inventory = graph.inventory
+    autoscaler = graph.autoscaler
+    try:
+        await wait_for(lambda: len(inventory.list_by_status("running")) >= fleet, timeout)
+        running = inventory.list_by_status("running")
+        await wait_for(lambda: all(graph.stats_collector.latest(c.id) for c in running), timeout)
+
+        # Pinning min and max to the current replicas makes every tick evaluate the fleet without scaling it,
+        # so all ticks do the same work.
+        images = {c.image for c in running}
+        for image in images:
+            replicas = len([c for c in running if c.image == image])
+            autoscaler.set_policy(image, ScalingPolicy(target=50, min_replicas=replicas, max_replicas=replicas))
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(ticks):
+            tick_started = time.perf_counter()
+            await asyncio.gather(*(autoscaler.evaluate(image, policy) for image, policy in autoscaler.policies.items()))
+            latencies.append(time.perf_counter() - tick_started)
+
+        return {**summarize(latencies, time.perf_counter() - started), "policies": len(images)}
+
+    finally:
+        await graph.load_balancer.stop()
+        await graph.client.close()
+        await graph.repository.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure autoscaler ticks against the configured Docker daemon")
+    parser.add_argument("--fleet", type=int, required=True)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    result = asyncio.run(measure_ticks(args.fleet, args.ticks, args.timeout))
+    with open(args.output, "w") as file:
+        json.dump(result, file)
+
+
+if __name__ == "__main__":
+    main()
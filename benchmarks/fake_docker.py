@@ -0,0 +1,386 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import struct
+import time
+import uuid
+
+from aiohttp import web
+
+API_VERSION = "1.43"
+TRUE = ("1", "true", "True")
+
+
+class FakeDocker:
+    # A stand-in for the Docker Engine API with just the endpoints the application calls. Every running container
+    # publishes port 80 on the dummy upstream, so the balancer proxies to a real HTTP server.
+    def __init__(
+        self,
+        containers: int = 5,
+        latency: float = 0.0,
+        stats_delay: float = 0.0,
+        upstream_port: int = 18080,
+        images: list[str] | None = None,
+    ):
+        self.latency = latency
+        self.stats_delay = stats_delay
+        self.upstream_port = upstream_port
+        self.containers: dict[str, dict] = {}
+        self.images = {image: "sha256:" + uuid.uuid4().hex for image in images or ["app:latest"]}
+        self.subscribers: list[asyncio.Queue] = []
+
+        names = list(self.images)
+        for i in range(containers):
+            self.new_container(names[i % len(names)], running=True)
+
+    def new_container(
+        self,
+        image: str,
+        running: bool = False,
+        labels: dict | None = None,
+        env: list | None = None,
+        name: str | None = None,
+    ) -> str:
+        container_id = uuid.uuid4().hex + uuid.uuid4().hex
+        self.containers[container_id] = {
+            "Id": container_id,
+            "Name": name or container_id[:12],
+            "Image": image,
+            "ImageID": self.images.get(image, "sha256:0"),
+            "Labels": labels or {},
+            "Env": env or [],
+            "State": "running" if running else "created",
+            "Created": time.time(),
+            "ExitCode": 0,
+        }
+        return container_id
+
+    def summary(self, c: dict) -> dict:
+        ports = []
+        if c["State"] == "running":
+            ports = [{"PrivatePort": 80, "PublicPort": self.upstream_port, "Type": "tcp", "IP": "0.0.0.0"}]
+
+        return {
+            "Id": c["Id"],
+            "Names": ["/" + c["Name"]],
+            "Image": c["Image"],
+            "ImageID": c["ImageID"],
+            "Labels": c["Labels"],
+            "State": c["State"],
+            "Status": c["State"],
+            "Ports": ports,
+            "Created": int(c["Created"]),
+        }
+
+    def inspect(self, c: dict) -> dict:
+        ports = {"80/tcp": None}
+        if c["State"] == "running":
+            ports = {"80/tcp": [{"HostIp": "0.0.0.0", "HostPort": str(self.upstream_port)}]}
+
+        return {
+            "Id": c["Id"],
+            "Name": "/" + c["Name"],
+            "Image": c["ImageID"],
+            "Created": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(c["Created"])) + ".000000000Z",
+            "State": {"Status": c["State"], "Running": c["State"] == "running", "ExitCode": c["ExitCode"]},
+            "Config": {"Image": c["Image"], "Labels": c["Labels"], "Tty": False, "Env": c["Env"]},
+            "NetworkSettings": {"Ports": ports, "IPAddress": "172.17.0.2"},
+        }
+
+    async def emit(self, container_id: str, action: str, **attributes):
+        c = self.containers.get(container_id) or {}
+        attributes = {**c.get("Labels", {}), "image": c.get("Image", ""), **attributes}
+        event = {
+            "Type": "container",
+            "Action": action,
+            "status": action,
+            "id": container_id,
+            "Actor": {"ID": container_id, "Attributes": attributes},
+            "time": int(time.time()),
+            "timeNano": time.time_ns(),
+        }
+        for queue in list(self.subscribers):
+            queue.put_nowait(event)
+
+    async def delay(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        routes = app.router
+        routes.add_get("/version", self.version)
+        routes.add_get("/v{v}/version", self.version)
+        routes.add_get("/v{v}/info", self.info)
+        routes.add_get("/v{v}/containers/json", self.list)
+        routes.add_post("/v{v}/containers/create", self.create)
+        routes.add_get("/v{v}/containers/{id}/json", self.get)
+        routes.add_post("/v{v}/containers/{id}/start", self.start)
+        routes.add_post("/v{v}/containers/{id}/stop", self.stop)
+        routes.add_post("/v{v}/containers/{id}/restart", self.restart)
+        routes.add_post("/v{v}/containers/{id}/kill", self.kill)
+        routes.add_post("/v{v}/containers/{id}/rename", self.rename)
+        routes.add_delete("/v{v}/containers/{id}", self.delete)
+        routes.add_get("/v{v}/containers/{id}/stats", self.stats)
+        routes.add_get("/v{v}/containers/{id}/logs", self.logs)
+        routes.add_get("/v{v}/events", self.events)
+        routes.add_get("/v{v}/images/json", self.list_images)
+        routes.add_get("/v{v}/images/{name:.*}/json", self.image)
+        routes.add_post("/v{v}/images/create", self.pull)
+        return app
+
+    async def version(self, request: web.Request) -> web.Response:
+        return web.json_response({"ApiVersion": API_VERSION, "Version": "24.0.0"})
+
+    async def info(self, request: web.Request) -> web.Response:
+        return web.json_response({"NCPU": 8, "MemTotal": 16 * 2**30, "Containers": len(self.containers)})
+
+    def find(self, request: web.Request) -> dict:
+        container_id = request.match_info["id"]
+        if container_id in self.containers:
+            return self.containers[container_id]
+
+        for key, container in self.containers.items():
+            if key.startswith(container_id):
+                return container
+
+        raise web.HTTPNotFound(
+            text=json.dumps({"message": f"No such container: {container_id}"}), content_type="application/json"
+        )
+
+    async def list(self, request: web.Request) -> web.Response:
+        await self.delay()
+        show_all = request.query.get("all") in TRUE
+        items = [self.summary(c) for c in self.containers.values() if show_all or c["State"] == "running"]
+
+        filters = json.loads(request.query.get("filters", "{}"))
+        for label in filters.get("label", []):
+            key, _, value = label.partition("=")
+            items = [i for i in items if key in i["Labels"] and (not value or i["Labels"][key] == value)]
+
+        return web.json_response(items)
+
+    async def create(self, request: web.Request) -> web.Response:
+        await self.delay()
+        body = await request.json()
+        image = body.get("Image")
+        if image not in self.images:
+            return web.json_response({"message": f"No such image: {image}"}, status=404)
+
+        container_id = self.new_container(
+            image, labels=body.get("Labels"), env=body.get("Env"), name=request.query.get("name")
+        )
+        await self.emit(container_id, "create")
+        return web.json_response({"Id": container_id, "Warnings": []}, status=201)
+
+    async def get(self, request: web.Request) -> web.Response:
+        await self.delay()
+        return web.json_response(self.inspect(self.find(request)))
+
+    async def start(self, request: web.Request) -> web.Response:
+        await self.delay()
+        c = self.find(request)
+        c["State"] = "running"
+        await self.emit(c["Id"], "start")
+        return web.Response(status=204)
+
+    async def stop(self, request: web.Request) -> web.Response:
+        await self.delay()
+        c = self.find(request)
+        c["State"] = "exited"
+        await self.emit(c["Id"], "die", exitCode="0")
+        await self.emit(c["Id"], "stop")
+        return web.Response(status=204)
+
+    async def restart(self, request: web.Request) -> web.Response:
+        await self.delay()
+        c = self.find(request)
+        c["State"] = "running"
+        await self.emit(c["Id"], "restart")
+        await self.emit(c["Id"], "start")
+        return web.Response(status=204)
+
+    async def kill(self, request: web.Request) -> web.Response:
+        await self.delay()
+        c = self.find(request)
+        c["State"] = "exited"
+        c["ExitCode"] = 137
+        await self.emit(c["Id"], "die", exitCode="137")
+        return web.Response(status=204)
+
+    async def rename(self, request: web.Request) -> web.Response:
+        await self.delay()
+        c = self.find(request)
+        c["Name"] = request.query["name"]
+        await self.emit(c["Id"], "rename")
+        return web.Response(status=204)
+
+    async def delete(self, request: web.Request) -> web.Response:
+        await self.delay()
+        c = self.find(request)
+        await self.emit(c["Id"], "destroy")
+        del self.containers[c["Id"]]
+        return web.Response(status=204)
+
+    @staticmethod
+    def sample(c: dict) -> dict:
+        previous = c.get("cpu_total", 0)
+        c["cpu_total"] = previous + int(random.uniform(0.05, 0.9) * 1e9)
+        c["system_total"] = c.get("system_total", 0) + int(2e9)
+
+        return {
+            "read": "",
+            "cpu_stats": {
+                "cpu_usage": {"total_usage": c["cpu_total"]},
+                "system_cpu_usage": c["system_total"],
+                "online_cpus": 2,
+            },
+            "precpu_stats": {"cpu_usage": {"total_usage": previous}, "system_cpu_usage": c["system_total"] - int(2e9)},
+            "memory_stats": {"usage": random.randint(10, 100) * 2**20, "limit": 2**30},
+            "networks": {"eth0": {"rx_bytes": random.randint(0, 10**6), "tx_bytes": random.randint(0, 10**6)}},
+            "blkio_stats": {
+                "io_service_bytes_recursive": [{"op": "Read", "value": 100}, {"op": "Write", "value": 200}]
+            },
+            "pids_stats": {"current": 3},
+        }
+
+    async def stats(self, request: web.Request) -> web.StreamResponse:
+        c = self.find(request)
+        if request.query.get("stream") not in TRUE:
+            await asyncio.sleep(self.stats_delay)
+            return web.json_response(self.sample(c))
+
+        response = web.StreamResponse()
+        response.content_type = "application/json"
+        await response.prepare(request)
+        try:
+            while c["Id"] in self.containers and c["State"] == "running":
+                await response.write((json.dumps(self.sample(c)) + "\n").encode())
+                # Docker samples once a second, the delay stands in for a slower daemon.
+                await asyncio.sleep(max(self.stats_delay, 1))
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+
+        return response
+
+    async def logs(self, request: web.Request) -> web.StreamResponse:
+        c = self.find(request)
+        timestamps = request.query.get("timestamps") in TRUE
+        follow = request.query.get("follow") in TRUE
+        tail = request.query.get("tail", "all")
+
+        def frame(i: int) -> bytes:
+            now = time.time_ns()
+            stamp = ""
+            if timestamps:
+                stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now // 10**9)) + f".{now % 10**9:09d}Z "
+            payload = f"{stamp}line {i} from {c['Id'][:12]}\n".encode()
+            return struct.pack(">BxxxL", 1, len(payload)) + payload
+
+        response = web.StreamResponse()
+        response.content_type = "application/vnd.docker.multiplexed-stream"
+        await response.prepare(request)
+
+        count = 50 if tail == "all" else int(tail)
+        for i in range(count):
+            await response.write(frame(i))
+
+        try:
+            while follow and c["Id"] in self.containers:
+                await asyncio.sleep(1)
+                await response.write(frame(count))
+                count += 1
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+
+        return response
+
+    async def events(self, request: web.Request) -> web.StreamResponse:
+        queue = asyncio.Queue()
+        self.subscribers.append(queue)
+        response = web.StreamResponse()
+        response.content_type = "application/json"
+        await response.prepare(request)
+        try:
+            while True:
+                event = await queue.get()
+                await response.write((json.dumps(event) + "\n").encode())
+        except (ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.remove(queue)
+
+        return response
+
+    async def list_images(self, request: web.Request) -> web.Response:
+        return web.json_response([{"Id": image_id, "RepoTags": [tag]} for tag, image_id in self.images.items()])
+
+    async def image(self, request: web.Request) -> web.Response:
+        await self.delay()
+        name = request.match_info["name"]
+        if name not in self.images and name not in self.images.values():
+            return web.json_response({"message": f"No such image: {name}"}, status=404)
+
+        image_id = self.images.get(name, name)
+        tags = [tag for tag, known in self.images.items() if known == image_id]
+        return web.json_response({"Id": image_id, "RepoTags": tags})
+
+    async def pull(self, request: web.Request) -> web.Response:
+        await self.delay()
+        name = request.query["fromImage"]
+        if request.query.get("tag"):
+            name += ":" + request.query["tag"]
+
+        self.images.setdefault(name, "sha256:" + uuid.uuid4().hex)
+        return web.json_response({"status": f"Downloaded newer image for {name}"})
+
+
+async def upstream(request: web.Request) -> web.Response:
+    body = await request.read()
+    return web.json_response({"path": request.path, "method": request.method, "length": len(body)})
+
+
+async def serve(socket: str, upstream_port: int, **kwargs):
+    if os.path.exists(socket):
+        os.remove(socket)
+
+    daemon = web.AppRunner(FakeDocker(upstream_port=upstream_port, **kwargs).app(), access_log=None)
+    await daemon.setup()
+    await web.UnixSite(daemon, socket).start()
+
+    backend = web.Application()
+    backend.router.add_route("*", "/{tail:.*}", upstream)
+    backend_runner = web.AppRunner(backend, access_log=None)
+    await backend_runner.setup()
+    await web.TCPSite(backend_runner, "127.0.0.1", upstream_port).start()
+
+    print("ready", flush=True)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Docker Engine API on a unix socket with a dummy upstream")
+    parser.add_argument("--socket", default="/tmp/fake_docker.sock")
+    parser.add_argument("--upstream-port", type=int, default=18080)
+    parser.add_argument("--containers", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Docker API call")
+    parser.add_argument("--stats-delay", type=float, default=0.0, help="Seconds before a stats sample is returned")
+    parser.add_argument("--image", action="append", dest="images", help="Image of the fleet, repeat for several")
+    args = parser.parse_args()
+
+    asyncio.run(
+        serve(
+            args.socket,
+            args.upstream_port,
+            containers=args.containers,
+            latency=args.latency,
+            stats_delay=args.stats_delay,
+            images=args.images,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
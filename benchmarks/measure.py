@@ -0,0 +1,91 @@
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+# A result regresses when a latency grows or the throughput shrinks by more than the threshold.
+LOWER_IS_BETTER = ("p50_ms", "p99_ms")
+HIGHER_IS_BETTER = ("throughput",)
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    return ordered[min(math.ceil(q / 100 * len(ordered)) - 1, len(ordered) - 1) if q else 0]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0) * 1000, 3),
+    }
+
+
+async def load(
+    client: httpx.AsyncClient,
+    request: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    count: int,
+    concurrency: int,
+) -> dict:
+    # A fixed number of requests is shared by the workers, each one sends the next as soon as its last finished.
+    latencies = []
+    errors = 0
+    remaining = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await request(client)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+
+            if failed:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[dict]:
+    previous = {(result["scenario"], result["fleet"]): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        before = previous.get((result["scenario"], result["fleet"]))
+        if before is None:
+            continue
+
+        for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if not before.get(key):
+                continue
+
+            change = (result[key] - before[key]) / before[key]
+            result.setdefault("change", {})[key] = round(change, 3)
+            if (change > threshold and key in LOWER_IS_BETTER) or (-change > threshold and key in HIGHER_IS_BETTER):
+                regressions.append(
+                    {
+                        "scenario": result["scenario"],
+                        "fleet": result["fleet"],
+                        "metric": key,
+                        "baseline": before[key],
+                        "value": result[key],
+                        "change": round(change, 3),
+                    }
+                )
+
+    return regressions
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.measure import compare, load
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# scenario -> (method, path), every request of a scenario is the same so runs stay comparable
+SCENARIOS = {
+    "list_containers": ("GET", "/containers"),
+    "proxy": ("GET", "/proxy/benchmark"),
+    "metrics": ("GET", "/metrics"),
+    "container_metrics": ("GET", "/containers/metrics"),
+    "create_container": ("POST", "/containers"),
+}
+DEFAULT_SCENARIOS = list(SCENARIOS) + ["autoscaler_tick"]
+
+
+def module(name: str, **options) -> list[str]:
+    arguments = [item for key, value in options.items() for item in (f"--{key.replace('_', '-')}", str(value))]
+    return [sys.executable, "-m", name, *arguments]
+
+
+class Fleet:
+    # The fake daemon and the application for one fleet size, each in its own process and temporary directory.
+    def __init__(self, args: argparse.Namespace, size: int):
+        self.args = args
+        self.size = size
+        self.directory = tempfile.mkdtemp(prefix="cms-benchmark-")
+        self.socket = os.path.join(self.directory, "docker.sock")
+        self.processes: list[subprocess.Popen] = []
+
+    @property
+    def env(self) -> dict:
+        # Background features that would change the fleet while it is measured are turned off. Every container holds
+        # a stats and a log stream on the Docker connection pool, which is sized so the API calls still get one.
+        return {
+            **os.environ,
+            "DOCKER_HOST": f"unix://{self.socket}",
+            "REPOSITORY_URL": f"sqlite:///{self.directory}/state.db",
+            "LOG_STORE_PATH": os.path.join(self.directory, "logs"),
+            "AUTOSCALE_POLICIES": "{}",
+            "AUTOSCALE_INTERVAL": "3600",
+            "WARM_POOL_SIZES": "{}",
+            "DOCKER_POOL_SIZE": str(2 * (self.size + self.args.creates) + 100),
+            "PYTHONPATH": ROOT,
+        }
+
+    def spawn(self, *command: str, log: str) -> subprocess.Popen:
+        output = open(os.path.join(self.directory, log), "w")
+        process = subprocess.Popen(command, cwd=ROOT, env=self.env, stdout=output, stderr=subprocess.STDOUT)
+        self.processes.append(process)
+        return process
+
+    async def start_daemon(self):
+        self.spawn(
+            *module(
+                "benchmarks.fake_docker",
+                socket=self.socket,
+                upstream_port=self.args.upstream_port,
+                containers=self.size,
+                latency=self.args.latency,
+                stats_delay=self.args.stats_delay,
+            ),
+            *(option for image in self.args.images for option in ("--image", image)),
+            log="docker.log",
+        )
+        await self.wait(lambda: os.path.exists(self.socket), "fake Docker daemon")
+
+    async def start_app(self):
+        self.spawn(
+            *module("uvicorn", port=self.args.port, log_level="warning"),
+            "--no-access-log",
+            "src.app.main:app",
+            log="app.log",
+        )
+
+        async with httpx.AsyncClient(base_url=self.url) as client:
+
+            async def ready() -> bool:
+                try:
+                    response = await client.get("/containers")
+                    return response.status_code == 200 and len(response.json()) >= self.size
+                except httpx.HTTPError:
+                    return False
+
+            await self.wait(ready, "application")
+
+    async def wait(self, condition, name: str):
+        deadline = time.monotonic() + self.args.startup_timeout
+        while True:
+            result = condition()
+            if asyncio.iscoroutine(result):
+                result = await result
+            if result:
+                return
+
+            for process in self.processes:
+                if process.poll() is not None:
+                    raise RuntimeError(f"{name} exited, see the logs in {self.directory}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{name} did not start in {self.args.startup_timeout} s")
+            await asyncio.sleep(0.2)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.args.port}"
+
+    def stop_app(self):
+        for process in self.processes[1:]:
+            self.terminate(process)
+        del self.processes[1:]
+
+    def close(self):
+        for process in reversed(self.processes):
+            self.terminate(process)
+        self.processes = []
+        if not self.args.keep:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    @staticmethod
+    def terminate(process: subprocess.Popen):
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def request_for(scenario: str, images: list[str]):
+    method, path = SCENARIOS[scenario]
+    payload = {"image": images[0]} if method == "POST" else None
+
+    async def request(client: httpx.AsyncClient) -> httpx.Response:
+        return await client.request(method, path, json=payload)
+
+    return request
+
+
+async def run_autoscaler(fleet: Fleet) -> dict:
+    output = os.path.join(fleet.directory, "autoscaler.json")
+    process = fleet.spawn(
+        *module(
+            "benchmarks.autoscaler",
+            fleet=fleet.size,
+            ticks=fleet.args.ticks,
+            timeout=fleet.args.startup_timeout,
+            output=output,
+        ),
+        log="autoscaler.log",
+    )
+    await asyncio.to_thread(process.wait)
+    fleet.processes.remove(process)
+    if process.returncode:
+        raise RuntimeError(f"autoscaler benchmark failed, see the logs in {fleet.directory}")
+
+    with open(output) as file:
+        return json.load(file)
+
+
+async def run_fleet(args: argparse.Namespace, size: int) -> list[dict]:
+    fleet = Fleet(args, size)
+    results = []
+
+    def record(scenario: str, summary: dict):
+        result = {"scenario": scenario, "fleet": size, **summary}
+        results.append(result)
+        print(
+            f"{scenario:<20} fleet {size:<6} {result['throughput']:>10.1f} req/s "
+            f"p50 {result['p50_ms']:>9.3f} ms  p99 {result['p99_ms']:>9.3f} ms  errors {result['errors']}",
+            flush=True,
+        )
+
+    try:
+        await fleet.start_daemon()
+
+        # Ticks run in-process against the daemon before the application starts, so they measure the autoscaler
+        # alone.
+        if "autoscaler_tick" in args.scenarios:
+            record("autoscaler_tick", await run_autoscaler(fleet))
+
+        http_scenarios = [scenario for scenario in args.scenarios if scenario in SCENARIOS]
+        if not http_scenarios:
+            return results
+
+        await fleet.start_app()
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=fleet.url, limits=limits, timeout=60) as client:
+            # Creating grows the fleet, it goes last so the other scenarios see the configured size.
+            for scenario in sorted(http_scenarios, key=lambda name: name == "create_container"):
+                request = request_for(scenario, args.images)
+                if scenario == "create_container":
+                    record(scenario, await load(client, request, args.creates, min(args.concurrency, args.creates)))
+                    continue
+
+                await load(client, request, args.warmup, args.concurrency)
+                record(scenario, await load(client, request, args.requests, args.concurrency))
+
+        fleet.stop_app()
+
+    finally:
+        fleet.close()
+
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the API against a fake Docker daemon")
+    parser.add_argument("--fleet", default="10,100,500", help="Comma separated numbers of running containers")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario and fleet size")
+    parser.add_argument("--creates", type=int, default=50, help="Containers created per fleet size")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--ticks", type=int, default=200, help="Autoscaler ticks per fleet size")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Docker API call")
+    parser.add_argument("--stats-delay", type=float, default=0.0, help="Seconds before a stats sample is returned")
+    parser.add_argument("--image", action="append", dest="images", help="Image of the fleet, repeat for several")
+    parser.add_argument("--port", type=int, default=18001)
+    parser.add_argument("--upstream-port", type=int, default=18080)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change that counts as a regression")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary directories with the logs")
+    args = parser.parse_args()
+
+    args.fleet = [int(size) for size in args.fleet.split(",")]
+    args.scenarios = args.scenarios.split(",")
+    args.images = args.images or ["app:latest"]
+    unknown = set(args.scenarios) - set(DEFAULT_SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    return args
+
+
+async def main() -> int:
+    args = parse_args()
+    results = []
+    for size in args.fleet:
+        results += await run_fleet(args, size)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("requests", "creates", "concurrency", "ticks", "latency", "stats_delay", "images")
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+
+        for regression in regressions:
+            print(
+                f"Regression: {regression['scenario']} fleet {regression['fleet']} {regression['metric']} "
+                f"{regression['baseline']} -> {regression['value']} ({regression['change']:+.1%})"
+            )
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,6 +1,10 @@
 from .balancer.router import router as balancer
 from .container.router import router as container
+from .feed.router import router as feed
+from .logs.router import router as logs
 from .metrics.router import router as metrics
+from .nodes.router import router as nodes
 from .scale.router import router as scale
+from .services.router import router as services
 
-__all__ = ["container", "metrics", "scale", "balancer"]
+__all__ = ["container", "metrics", "scale", "balancer", "logs", "services", "nodes", "feed"]
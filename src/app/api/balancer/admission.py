@@ -0,0 +1,138 @@
+import asyncio
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge
+
+from src.app.config import (
+    BALANCER_MAX_IN_FLIGHT,
+    BALANCER_QUEUE_SIZE,
+    BALANCER_QUEUE_TIMEOUT,
+    BALANCER_RETRY_AFTER,
+    BALANCER_SERVICE_MAX_IN_FLIGHT,
+)
+from src.app.core.handlers.errors import BalancerOverloadedError
+from src.app.core.schemas.container import Container
+
+IN_FLIGHT = Gauge("balancer_in_flight_requests", "Requests being proxied to the backends of an image", ["image"])
+QUEUE_DEPTH = Gauge("balancer_queue_depth", "Requests waiting for a free backend", ["service"])
+SHED = Counter("balancer_shed_requests_total", "Requests rejected by admission control", ["service", "reason"])
+
+
+class ServiceQueue:
+    def __init__(self, image: str | None, limit: int):
+        self.image = image
+        self.label = image or "*"
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: deque[asyncio.Future] = deque()
+
+    def has_room(self) -> bool:
+        return not self.limit or self.in_flight < self.limit
+
+
+class AdmissionControl:
+    # Bounds concurrency per backend, so a burst cannot pile onto one replica, and per service. Requests over a limit
+    # wait in a bounded FIFO queue of their service and are shed with a 503 once it is full or the wait runs out.
+    def __init__(
+        self,
+        backend_limit: int = BALANCER_MAX_IN_FLIGHT,
+        service_limits: dict[str, int] = BALANCER_SERVICE_MAX_IN_FLIGHT,
+        queue_size: int = BALANCER_QUEUE_SIZE,
+        queue_timeout: float = BALANCER_QUEUE_TIMEOUT,
+        retry_after: int = BALANCER_RETRY_AFTER,
+    ):
+        self.backend_limit = backend_limit
+        self.service_limits = service_limits
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.backends: dict[str, int] = {}
+        self.images: dict[str, int] = {}
+        self.services: dict[str | None, ServiceQueue] = {}
+
+    def service(self, image: str | None) -> ServiceQueue:
+        service = self.services.get(image)
+        if service is None:
+            service = self.services[image] = ServiceQueue(image, self.service_limits.get(image, 0) if image else 0)
+
+        return service
+
+    def has_room(self, container_id: str) -> bool:
+        return not self.backend_limit or self.backends.get(container_id, 0) < self.backend_limit
+
+    def enter(self, service: ServiceQueue):
+        service.in_flight += 1
+
+    def leave(self, service: ServiceQueue):
+        service.in_flight -= 1
+        self.wake(service)
+
+    def acquire(self, container: Container):
+        self.backends[container.id] = self.backends.get(container.id, 0) + 1
+        self.images[container.image] = self.images.get(container.image, 0) + 1
+        IN_FLIGHT.labels(container.image).set(self.images[container.image])
+
+    def release(self, container: Container):
+        self.backends[container.id] -= 1
+        if not self.backends[container.id]:
+            del self.backends[container.id]
+        self.images[container.image] -= 1
+        IN_FLIGHT.labels(container.image).set(self.images[container.image])
+
+        # The backend serves the pool of its image and the pool of every container.
+        for image in {container.image, None}:
+            if image in self.services:
+                self.wake(self.services[image])
+
+    async def wait(self, service: ServiceQueue, deadline: float, requeue: bool = False):
+        timeout = deadline - time.monotonic()
+        if timeout <= 0:
+            self.shed(service, "timeout")
+        # A request woken by a release that it could not use keeps its place at the head of the queue.
+        if not requeue and len(service.waiters) >= self.queue_size:
+            self.shed(service, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        if requeue:
+            service.waiters.appendleft(waiter)
+        else:
+            service.waiters.append(waiter)
+        QUEUE_DEPTH.labels(service.label).set(len(service.waiters))
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self.shed(service, "timeout")
+        except asyncio.CancelledError:
+            # A wakeup that raced with the client going away goes to the next request in line.
+            if waiter.done() and not waiter.cancelled():
+                self.wake(service)
+            raise
+        finally:
+            if waiter in service.waiters:
+                service.waiters.remove(waiter)
+            QUEUE_DEPTH.labels(service.label).set(len(service.waiters))
+
+    def wake(self, service: ServiceQueue):
+        while service.waiters:
+            waiter = service.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+        QUEUE_DEPTH.labels(service.label).set(len(service.waiters))
+
+    def wake_all(self):
+        # New or recovered backends add room that no release will announce.
+        for service in self.services.values():
+            while service.waiters:
+                self.wake(service)
+
+    def shed(self, service: ServiceQueue, reason: str):
+        SHED.labels(service.label, reason).inc()
+        raise BalancerOverloadedError(self.retry_after)
+
+    def pressure(self, image: str) -> int:
+        service = self.services.get(image)
+        return self.images.get(image, 0) + (len(service.waiters) if service is not None else 0)
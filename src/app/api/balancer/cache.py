@@ -0,0 +1,347 @@
+import asyncio
+import time
+from collections import OrderedDict
+from fnmatch import fnmatch
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+from fastapi import Request
+from prometheus_client import Counter, Gauge
+from starlette.responses import Response
+
+from src.app.api.balancer.proxy import HOP_BY_HOP_HEADERS, SERVER_HEADERS, ReverseProxy
+from src.app.config import (
+    PROXY_CACHE_DEFAULT_TTL,
+    PROXY_CACHE_MAX_BYTES,
+    PROXY_CACHE_MAX_ENTRY_BYTES,
+    PROXY_CACHE_ROUTE_TTLS,
+)
+
+CACHE_REQUESTS = Counter("proxy_cache_requests_total", "Proxied requests by cache outcome", ["result"])
+CACHE_SIZE = Gauge("proxy_cache_size_bytes", "Bytes held by the proxy response cache")
+CACHE_ENTRIES = Gauge("proxy_cache_entries", "Responses held by the proxy response cache")
+
+# Statuses a shared cache may store without explicit freshness, RFC 9110 section 15.1.
+CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+SAFE_METHODS = {"GET", "HEAD"}
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since", "if-match", "if-unmodified-since", "if-range"}
+STORED_HEADERS_EXCLUDED = HOP_BY_HOP_HEADERS | SERVER_HEADERS | {"content-length", "age"}
+
+Send = Callable[..., Awaitable[tuple[httpx.Response, Callable[[], Awaitable[None]]]]]
+
+
+async def chain(prefix: list[bytes], rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in prefix:
+        yield chunk
+    async for chunk in rest:
+        yield chunk
+
+
+def cache_directives(value: str | None) -> dict[str, str | None]:
+    directives = {}
+    for directive in (value or "").split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+
+    return directives
+
+
+class CachedResponse:
+    def __init__(self, status_code: int, headers: list[tuple[bytes, bytes]], body: bytes, ttl: float):
+        self.status_code = status_code
+        self.headers = [(name, value) for name, value in headers if name.lower() not in STORED_HEADERS_EXCLUDED]
+        self.body = body
+        self.size = len(body) + sum(len(name) + len(value) for name, value in self.headers)
+        names = (self.header("vary") or "").split(",")
+        self.vary = tuple(sorted(name.strip().lower() for name in names if name.strip()))
+        # The variant the response was fetched for, set once the fetch knows its request.
+        self.key: tuple | None = None
+        self.refresh(ttl)
+
+    def refresh(self, ttl: float):
+        self.stored_at = time.monotonic()
+        self.expires = self.stored_at + ttl
+
+    def header(self, name: str) -> str | None:
+        key = name.lower().encode("latin-1")
+        return next((value.decode("latin-1") for header, value in self.headers if header.lower() == key), None)
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    @property
+    def validators(self) -> list[tuple[str, str]]:
+        validators = []
+        if (etag := self.header("etag")) is not None:
+            validators.append(("if-none-match", etag))
+        if (last_modified := self.header("last-modified")) is not None:
+            validators.append(("if-modified-since", last_modified))
+
+        return validators
+
+
+class ResponseCache:
+    # Sits in front of the balancer's upstream call. Hits never select a backend, concurrent misses for one key
+    # share a single upstream request and stale entries with validators are revalidated instead of refetched.
+    def __init__(
+        self,
+        proxy: ReverseProxy,
+        max_bytes: int = PROXY_CACHE_MAX_BYTES,
+        max_entry_bytes: int = PROXY_CACHE_MAX_ENTRY_BYTES,
+        default_ttl: float = PROXY_CACHE_DEFAULT_TTL,
+        route_ttls: dict[str, float] = PROXY_CACHE_ROUTE_TTLS,
+    ):
+        self.proxy = proxy
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.default_ttl = default_ttl
+        self.route_ttls = route_ttls
+        self.entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        # primary key -> request headers named by the backend's Vary, and the stored keys of every variant
+        self.vary: dict[tuple, tuple[str, ...]] = {}
+        self.variants: dict[tuple, set[tuple]] = {}
+        self.size = 0
+        self.in_flight: dict[tuple, asyncio.Task] = {}
+
+    def route_ttl(self, path: str) -> float | None:
+        # The longest matching pattern wins, so a specific route can override a broader one.
+        matches = [pattern for pattern in self.route_ttls if fnmatch(path, pattern)]
+        return self.route_ttls[max(matches, key=len)] if matches else None
+
+    @staticmethod
+    def primary_key(image: str | None, path: str, request: Request) -> tuple:
+        return image, path, tuple(sorted(request.query_params.multi_items()))
+
+    def key(self, primary: tuple, request: Request, vary: tuple[str, ...] | None = None) -> tuple:
+        names = self.vary.get(primary, ()) if vary is None else vary
+        return primary + tuple(request.headers.get(name) for name in names)
+
+    def accepts(self, request: Request) -> bool:
+        directives = cache_directives(request.headers.get("cache-control"))
+        return (
+            request.method == "GET"
+            and "authorization" not in request.headers
+            and "no-store" not in directives
+            and "no-cache" not in directives
+        )
+
+    def freshness(self, cache_control: str | None, route_ttl: float | None) -> float | None:
+        directives = cache_directives(cache_control)
+        if "no-store" in directives or "private" in directives:
+            return None
+        if route_ttl is not None:
+            return route_ttl
+        if "no-cache" in directives:
+            return 0.0
+
+        for name in ("s-maxage", "max-age"):
+            try:
+                return max(float(directives.get(name) or "missing"), 0.0)
+            except ValueError:
+                continue
+
+        return self.default_ttl
+
+    def storable(self, response: httpx.Response) -> bool:
+        length = response.headers.get("content-length")
+        return (
+            response.status_code in CACHEABLE_STATUSES
+            and "set-cookie" not in response.headers
+            and response.headers.get("vary", "").strip() != "*"
+            and (length is None or (length.isdigit() and int(length) <= self.max_entry_bytes))
+        )
+
+    async def serve(self, image: str | None, path: str, request: Request, send: Send) -> Response:
+        primary = self.primary_key(image, path, request)
+        if request.method not in SAFE_METHODS:
+            self.invalidate(primary)
+
+        route_ttl = self.route_ttl("/" + path)
+        if not self.accepts(request) or route_ttl == 0:
+            CACHE_REQUESTS.labels("bypass").inc()
+            return await self.forward(image, path, request, send)
+
+        key = self.key(primary, request)
+        entry = self.entries.get(key)
+        if entry is not None and entry.fresh:
+            self.entries.move_to_end(key)
+            CACHE_REQUESTS.labels("hit").inc()
+            return self.respond(entry, request, "HIT")
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            return await self.follow(task, image, path, request, primary, send)
+
+        return await self.lead(key, image, path, request, primary, entry, route_ttl, send)
+
+    async def lead(
+        self,
+        key: tuple,
+        image: str | None,
+        path: str,
+        request: Request,
+        primary: tuple,
+        entry: CachedResponse | None,
+        route_ttl: float | None,
+        send: Send,
+    ) -> Response:
+        task = self.in_flight[key] = asyncio.create_task(
+            self.fetch(image, path, request, primary, entry, route_ttl, send)
+        )
+        task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            task.add_done_callback(self.discard)
+            raise
+
+        if isinstance(result, CachedResponse):
+            outcome = "revalidated" if result is entry else "miss"
+            CACHE_REQUESTS.labels(outcome).inc()
+            return self.respond(result, request, outcome.upper())
+
+        # Responses that cannot be shared stream straight through to the leader.
+        CACHE_REQUESTS.labels("uncacheable").inc()
+        response, finish, chunks = result
+        return self.proxy.stream_response(response, finish, chunks)
+
+    async def follow(
+        self, task: asyncio.Task, image: str | None, path: str, request: Request, primary: tuple, send: Send
+    ) -> Response:
+        result = await asyncio.shield(task)
+        if not isinstance(result, CachedResponse):
+            CACHE_REQUESTS.labels("uncacheable").inc()
+            return await self.forward(image, path, request, send)
+
+        # The follower joined before the backend named its Vary, one that differs on it is served its own variant.
+        if self.key(primary, request, result.vary) != result.key:
+            return await self.serve(image, path, request, send)
+
+        CACHE_REQUESTS.labels("coalesced").inc()
+        return self.respond(result, request, "COALESCED")
+
+    async def forward(self, image: str | None, path: str, request: Request, send: Send) -> Response:
+        response, finish = await send(image, path, request)
+        return self.proxy.stream_response(response, finish)
+
+    async def fetch(
+        self,
+        image: str | None,
+        path: str,
+        request: Request,
+        primary: tuple,
+        entry: CachedResponse | None,
+        route_ttl: float | None,
+        send: Send,
+    ):
+        # The client's own validators would get a 304 that cannot fill the cache, only the entry's are sent.
+        headers = [
+            (name, value) for name, value in self.proxy.forward_headers(request) if name not in CONDITIONAL_HEADERS
+        ]
+        if entry is not None:
+            headers += entry.validators
+
+        response, finish = await send(image, path, request, headers)
+        try:
+            if entry is not None and response.status_code == 304:
+                await finish()
+                cache_control = response.headers.get("cache-control") or entry.header("cache-control")
+                entry.refresh(self.freshness(cache_control, route_ttl) or 0.0)
+                self.store(self.key(primary, request), entry)
+                return entry
+
+            ttl = self.freshness(response.headers.get("cache-control"), route_ttl)
+            # A response with neither freshness nor validators would never be stored, it streams through unread.
+            if ttl is None or not self.storable(response) or not (ttl or self.validated(response)):
+                return response, finish, response.aiter_raw()
+
+            chunks = response.aiter_raw()
+            buffered, complete = await self.read(chunks)
+            if not complete:
+                return response, finish, chain(buffered, chunks)
+
+            body = b"".join(buffered)
+        except BaseException:
+            await finish()
+            raise
+
+        await finish()
+        fetched = CachedResponse(response.status_code, response.headers.raw, body, ttl)
+        fetched.key = self.key(primary, request, fetched.vary)
+        if self.vary.get(primary, ()) != fetched.vary:
+            self.invalidate(primary)
+            self.vary[primary] = fetched.vary
+        self.store(fetched.key, fetched)
+
+        return fetched
+
+    @staticmethod
+    def validated(response: httpx.Response) -> bool:
+        return "etag" in response.headers or "last-modified" in response.headers
+
+    async def read(self, chunks: AsyncIterator[bytes]) -> tuple[list[bytes], bool]:
+        # Bodies without a length are read up to just past the entry limit, a larger one is streamed on from there.
+        buffered = []
+        size = 0
+        async for chunk in chunks:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size > self.max_entry_bytes:
+                return buffered, False
+
+        return buffered, True
+
+    @staticmethod
+    def discard(task: asyncio.Task):
+        # A leader that went away leaves an unshared response open, nobody else will read it.
+        if not task.cancelled() and task.exception() is None and isinstance(task.result(), tuple):
+            asyncio.create_task(task.result()[1]())
+
+    def respond(self, entry: CachedResponse, request: Request, outcome: str) -> Response:
+        etag = entry.header("etag")
+        tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+        if etag is not None and ("*" in tags or etag in tags):
+            response = Response(status_code=304)
+            response.raw_headers = [(name, value) for name, value in entry.headers if name.lower() != b"content-type"]
+        else:
+            response = Response(content=entry.body, status_code=entry.status_code)
+            response.raw_headers = entry.headers + [(b"content-length", str(len(entry.body)).encode("latin-1"))]
+
+        age = int(time.monotonic() - entry.stored_at)
+        response.raw_headers += [(b"age", str(age).encode("latin-1")), (b"x-cache", outcome.encode("latin-1"))]
+
+        return response
+
+    def store(self, key: tuple, entry: CachedResponse):
+        self.remove(key)
+        self.entries[key] = entry
+        self.variants.setdefault(key[:3], set()).add(key)
+        self.size += entry.size
+
+        while self.size > self.max_bytes and self.entries:
+            self.remove(next(iter(self.entries)))
+
+        CACHE_SIZE.set(self.size)
+        CACHE_ENTRIES.set(len(self.entries))
+
+    def remove(self, key: tuple):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+
+        self.size -= entry.size
+        variants = self.variants.get(key[:3])
+        if variants is not None:
+            variants.discard(key)
+            if not variants:
+                del self.variants[key[:3]]
+
+    def invalidate(self, primary: tuple):
+        # Unsafe methods on a resource make every stored variant of it stale, RFC 9111 section 4.4.
+        for key in list(self.variants.get(primary, ())):
+            self.remove(key)
+
+        CACHE_SIZE.set(self.size)
+        CACHE_ENTRIES.set(len(self.entries))
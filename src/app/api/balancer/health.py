@@ -0,0 +1,214 @@
+import statistics
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge
+
+from src.app.config import (
+    BALANCER_EJECTION_TIME,
+    BALANCER_EWMA_DECAY,
+    BALANCER_MAX_EJECTION_TIME,
+    BALANCER_OUTLIER_CONSECUTIVE_FAILURES,
+    BALANCER_OUTLIER_ERROR_RATE,
+    BALANCER_OUTLIER_LATENCY_FACTOR,
+    BALANCER_OUTLIER_MIN_REQUESTS,
+    BALANCER_OUTLIER_WINDOW,
+)
+from src.app.core.schemas.container import Container
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+CIRCUIT_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = Gauge(
+    "balancer_backend_circuit_state", "Circuit of the backend: 0 closed, 1 half-open, 2 open (ejected)", ["id", "image"]
+)
+EJECTIONS = Counter("balancer_backend_ejections_total", "Backends ejected from balancing", ["image", "reason"])
+
+
+class BackendState:
+    def __init__(self, container: Container):
+        self.id = container.id
+        self.image = container.image
+        self.state = CLOSED
+        self.outcomes: deque[tuple[float, bool]] = deque()
+        self.consecutive_failures = 0
+        self.latency: float | None = None
+        self.trials = 0
+        self.ejections = 0
+        self.ejected_at = 0.0
+        self.until = 0.0
+
+    def error_rate(self) -> float:
+        return sum(1 for _, failed in self.outcomes if failed) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class BackendHealth:
+    # Passive checks: every proxied request is an observation. A backend that fails in a row, fails too often or is
+    # much slower than its siblings is ejected, each ejection in a row lasts twice as long, and once it expires a
+    # single trial request decides whether the circuit closes again.
+    def __init__(
+        self,
+        window: float = BALANCER_OUTLIER_WINDOW,
+        min_requests: int = BALANCER_OUTLIER_MIN_REQUESTS,
+        error_rate: float = BALANCER_OUTLIER_ERROR_RATE,
+        consecutive_failures: int = BALANCER_OUTLIER_CONSECUTIVE_FAILURES,
+        latency_factor: float = BALANCER_OUTLIER_LATENCY_FACTOR,
+        ejection_time: float = BALANCER_EJECTION_TIME,
+        max_ejection_time: float = BALANCER_MAX_EJECTION_TIME,
+        decay: float = BALANCER_EWMA_DECAY,
+    ):
+        self.window = window
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.consecutive_failures = consecutive_failures
+        self.latency_factor = latency_factor
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.decay = decay
+        self.states: dict[str, BackendState] = {}
+        self.version = 0
+        self.next_expiry = float("inf")
+
+    def state(self, container: Container) -> BackendState:
+        state = self.states.get(container.id)
+        if state is None:
+            state = self.states[container.id] = BackendState(container)
+            self.set_state(state, CLOSED)
+
+        return state
+
+    def available(self, container_id: str) -> bool:
+        state = self.states.get(container_id)
+        return state is None or state.state != OPEN
+
+    def admits(self, container_id: str) -> bool:
+        # A half-open backend takes one trial request at a time, the rest go to its siblings.
+        state = self.states.get(container_id)
+        return state is None or state.state != HALF_OPEN or state.trials == 0
+
+    def acquire(self, container: Container):
+        state = self.state(container)
+        if state.state == HALF_OPEN:
+            state.trials += 1
+
+    def refresh(self):
+        now = time.monotonic()
+        if now < self.next_expiry:
+            return
+
+        self.next_expiry = float("inf")
+        for state in self.states.values():
+            if state.state != OPEN:
+                continue
+
+            if state.until <= now:
+                self.set_state(state, HALF_OPEN)
+                state.trials = 0
+                print(f"Контейнер {state.id[:12]} снова принимает пробные запросы")
+            else:
+                self.next_expiry = min(self.next_expiry, state.until)
+
+    def record(self, container: Container, latency: float, failed: bool):
+        state = self.state(container)
+        if state.state == HALF_OPEN:
+            self.record_trial(state, failed)
+        # Requests that were in flight when the backend got ejected do not count against the next period.
+        elif state.state == CLOSED:
+            self.observe(state, latency, failed)
+            self.check_outlier(state, failed)
+
+    def record_trial(self, state: BackendState, failed: bool):
+        state.trials = max(state.trials - 1, 0)
+        if failed:
+            self.eject(state, "trial")
+        else:
+            self.set_state(state, CLOSED)
+            print(f"Контейнер {state.id[:12]} возвращен в балансировку")
+
+    def observe(self, state: BackendState, latency: float, failed: bool):
+        now = time.monotonic()
+        state.outcomes.append((now, failed))
+        while state.outcomes and state.outcomes[0][0] < now - self.window:
+            state.outcomes.popleft()
+
+        if failed:
+            state.consecutive_failures += 1
+        else:
+            state.consecutive_failures = 0
+            previous = state.latency
+            state.latency = latency if previous is None else self.decay * previous + (1 - self.decay) * latency
+
+    def check_outlier(self, state: BackendState, failed: bool):
+        if state.consecutive_failures >= self.consecutive_failures:
+            self.eject(state, "consecutive_failures")
+        elif len(state.outcomes) >= self.min_requests and state.error_rate() >= self.error_rate:
+            self.eject(state, "error_rate")
+        elif not failed and self.is_slow(state):
+            self.eject(state, "latency")
+
+    def is_slow(self, state: BackendState) -> bool:
+        if not self.latency_factor or state.latency is None or len(state.outcomes) < self.min_requests:
+            return False
+
+        # Latency is only compared within an image, different services have different normal latencies.
+        peers = [
+            peer.latency
+            for peer in self.states.values()
+            if peer.image == state.image
+            and peer.state == CLOSED
+            and peer.latency is not None
+            and len(peer.outcomes) >= self.min_requests
+        ]
+        if len(peers) < 3:
+            return False
+
+        return state.latency > self.latency_factor * statistics.median(peers)
+
+    def eject(self, state: BackendState, reason: str):
+        now = time.monotonic()
+        # A backend that stayed healthy for the longest ejection starts over from the base ejection time.
+        if now - state.ejected_at > self.max_ejection_time:
+            state.ejections = 0
+
+        state.ejections += 1
+        duration = min(self.ejection_time * 2 ** (state.ejections - 1), self.max_ejection_time)
+        state.ejected_at = now
+        state.until = now + duration
+        state.outcomes.clear()
+        state.consecutive_failures = 0
+        state.trials = 0
+        self.next_expiry = min(self.next_expiry, state.until)
+        self.set_state(state, OPEN)
+
+        EJECTIONS.labels(state.image, reason).inc()
+        print(f"Контейнер {state.id[:12]} исключен из балансировки на {duration:.0f} с ({reason})")
+
+    def set_state(self, state: BackendState, circuit: str):
+        state.state = circuit
+        self.version += 1
+        CIRCUIT_STATE.labels(state.id[:12], state.image).set(CIRCUIT_STATES[circuit])
+
+    def prune(self, container_ids: set[str]):
+        for container_id in [cid for cid in self.states if cid not in container_ids]:
+            state = self.states.pop(container_id)
+            try:
+                CIRCUIT_STATE.remove(state.id[:12], state.image)
+            except KeyError:
+                pass
+
+    def describe(self) -> list[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "id": state.id,
+                "image": state.image,
+                "state": state.state,
+                "error_rate": round(state.error_rate(), 3),
+                "latency": state.latency,
+                "ejections": state.ejections,
+                "ejected_for": max(state.until - now, 0.0) if state.state == OPEN else 0.0,
+            }
+            for state in self.states.values()
+        ]
@@ -0,0 +1,130 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+from fastapi import Request
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from src.app.config import (
+    PROXY_CONNECT_TIMEOUT,
+    PROXY_KEEPALIVE_EXPIRY,
+    PROXY_MAX_CONNECTIONS,
+    PROXY_MAX_KEEPALIVE_CONNECTIONS,
+    PROXY_TIMEOUT,
+)
+
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# uvicorn always sets its own Date and Server, forwarding the upstream ones would duplicate them.
+SERVER_HEADERS = {"date", "server"}
+
+
+class ReverseProxy:
+    def __init__(
+        self,
+        max_connections: int = PROXY_MAX_CONNECTIONS,
+        max_keepalive_connections: int = PROXY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = PROXY_KEEPALIVE_EXPIRY,
+        timeout: float = PROXY_TIMEOUT,
+        connect_timeout: float = PROXY_CONNECT_TIMEOUT,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.clients: dict[str, httpx.AsyncClient] = {}
+
+    def get_client(self, base_url: str) -> httpx.AsyncClient:
+        client = self.clients.get(base_url)
+        if client is None:
+            client = httpx.AsyncClient(base_url=base_url, limits=self.limits, timeout=self.timeout)
+            self.clients[base_url] = client
+
+        return client
+
+    def prune(self, base_urls: set[str]):
+        for base_url in list(self.clients):
+            if base_url not in base_urls:
+                asyncio.create_task(self.clients.pop(base_url).aclose())
+
+    async def close(self):
+        clients, self.clients = list(self.clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def send(
+        self, base_url: str, path: str, request: Request, headers: list[tuple[str, str]] | None = None
+    ) -> httpx.Response:
+        client = self.get_client(base_url)
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+        upstream_request = client.build_request(
+            request.method,
+            f"/{path}",
+            params=tuple(request.query_params.multi_items()),
+            headers=self.forward_headers(request) if headers is None else headers,
+            content=request.stream() if has_body else None,
+        )
+
+        return await client.send(upstream_request, stream=True)
+
+    @staticmethod
+    def forward_headers(request: Request) -> list[tuple[str, str]]:
+        headers = [
+            (name, value)
+            for name, value in request.headers.items()
+            if name not in HOP_BY_HOP_HEADERS and name != "host"
+        ]
+        client_host = request.client.host if request.client else ""
+        forwarded_for = request.headers.get("x-forwarded-for")
+
+        headers.append(("x-forwarded-for", f"{forwarded_for}, {client_host}" if forwarded_for else client_host))
+        headers.append(("x-forwarded-host", request.headers.get("host", "")))
+        headers.append(("x-forwarded-proto", request.url.scheme))
+
+        return headers
+
+    @staticmethod
+    def stream_response(
+        response: httpx.Response, finish: Callable[[], Awaitable[None]], chunks: AsyncIterator[bytes] | None = None
+    ) -> StreamingResponse:
+        finished = False
+
+        async def release():
+            nonlocal finished
+            if not finished:
+                finished = True
+                await finish()
+
+        # Starlette skips the background task when the body fails, an upstream that breaks off halfway must still
+        # be closed and released. The task stays for clients that go away before the first chunk.
+        async def body():
+            try:
+                async for chunk in chunks or response.aiter_raw():
+                    yield chunk
+            finally:
+                await release()
+
+        streaming_response = StreamingResponse(
+            body(),
+            status_code=response.status_code,
+            background=BackgroundTask(release),
+        )
+        streaming_response.raw_headers = [
+            (name, value)
+            for name, value in response.headers.raw
+            if name.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS | SERVER_HEADERS
+        ]
+
+        return streaming_response
@@ -1,12 +1,37 @@
 from fastapi import APIRouter, status
 
-from src.app.api.balancer.views import proxy_request
+from src.app.api.balancer.views import list_backends, list_strategies, proxy_request, set_strategy
 
 router = APIRouter()
 
 router.add_api_route(
     path="/proxy/{path:path}",
     endpoint=proxy_request,
+    methods=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    status_code=status.HTTP_200_OK,
+    summary="Proxy a request to one of the containers",
+)
+
+router.add_api_route(
+    path="/balancer/strategies",
+    endpoint=list_strategies,
+    methods=["GET"],
+    status_code=status.HTTP_200_OK,
+    summary="Get the balancing strategy used for each image",
+)
+
+router.add_api_route(
+    path="/balancer/strategies/{image_name}",
+    endpoint=set_strategy,
+    methods=["PUT"],
+    status_code=status.HTTP_200_OK,
+    summary="Select the balancing strategy for an image",
+)
+
+router.add_api_route(
+    path="/balancer/backends",
+    endpoint=list_backends,
     methods=["GET"],
     status_code=status.HTTP_200_OK,
+    summary="Get the passive health and circuit state of every backend that served traffic",
 )
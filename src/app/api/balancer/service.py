@@ -1,141 +1,271 @@
-import asyncio
-import json
-from threading import Thread
+import random
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable
 
 import httpx
-
-from src.app.api.container.service import ContainerService, ContainerInfoService
+from fastapi import Request
+from prometheus_client import Counter
+from starlette.responses import Response
+
+from src.app.api.balancer.admission import AdmissionControl, ServiceQueue
+from src.app.api.balancer.cache import ResponseCache
+from src.app.api.balancer.health import BackendHealth
+from src.app.api.balancer.proxy import ReverseProxy
+from src.app.api.balancer.strategies import STRATEGIES, BalancingStrategy, create_strategy
+from src.app.api.metrics.collector import get_stats_collector
 from src.app.api.metrics.service import MetricsService
-from src.app.api.metrics.views import get_container_metrics
+from src.app.api.scale.autoscaler import Autoscaler
 from src.app.api.scale.service import ScaleService
-from src.app.core.schemas.container import ContainerCreate
-
-
-class LoadBalancer:
-    def __init__(self, client):
-        self.client = client
-        self.scale_service = ScaleService(client)
-        self.metrics_service = MetricsService(client)
-        self.container_service = ContainerService(client)
-        self.container_info_service = ContainerInfoService(client)
+from src.app.config import (
+    BALANCER_HASH_HEADER,
+    BALANCER_SERVICE_HEADER,
+    BALANCER_STRATEGIES,
+    BALANCER_STRATEGY,
+    PROXY_CACHE_ENABLED,
+    PROXY_RETRIES,
+)
+from src.app.core.handlers.errors import BackendRequestError, NoBackendsAvailableError
+from src.app.core.schemas.container import Container
 
-    def start(self):
-        thread = Thread(target=self.handle_docker_events, daemon=True)
-        thread.start()
-        asyncio.create_task(self.check_and_scale())
+# Only requests that can be sent twice without a different outcome are retried, and only without a body, which
+# is streamed to the first backend and cannot be replayed.
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
 
-    async def handle_docker_events(self):
-        for event in self.client.events(decode=True):
-            if event.get("Type") == "container":
-                print(f"Обработка события: {event}")
-                self.container_service.update_containers_list()
+RETRIES = Counter("balancer_retries_total", "Proxied requests retried on another backend", ["image", "reason"])
 
-    async def get_least_loaded_container(self):
-        least_loaded = None
-        lowest_cpu_usage = "inf"
 
-        for container in self.container_service.containers:
-            metrics = await get_container_metrics(container.id)
-            cpu_usage = metrics["cpu_usage"].rstrip("%")
+class BackendPool:
+    def __init__(self, image: str | None, strategy: BalancingStrategy):
+        self.image = image
+        self.strategy = strategy
+        self.version: tuple[int, int, int] | None = None
 
-            if cpu_usage < lowest_cpu_usage or (cpu_usage == lowest_cpu_usage):
-                least_loaded = container
-                lowest_cpu_usage = cpu_usage
-
-        return least_loaded
-
-    async def proxy_request(self, path: str):
-        container = await self.get_least_loaded_container()
-
-        if not container:
-            return {"error": "Нет доступных контейнеров"}
-
-        url = f"{container.url}/{path}"
-        print(f"Перенаправление на контейнер: {container.id} с URL {url}")
 
+class LoadBalancer:
+    def __init__(
+        self,
+        client,
+        scale_service: ScaleService | None = None,
+        metrics_service: MetricsService | None = None,
+    ):
+        self.client = client
+        self.scale_service = scale_service or ScaleService(client)
+        self.metrics_service = metrics_service or MetricsService(client)
+        self.container_service = self.scale_service.container_service
+        self.container_info_service = self.scale_service.container_info_service
+        self.inventory = self.container_info_service.inventory
+        self.readiness = self.container_service.readiness
+        self.stats_collector = get_stats_collector(client, self.inventory)
+        self.strategies: dict[str, str] = dict(BALANCER_STRATEGIES)
+        self.pools: dict[str | None, BackendPool] = {}
+        self.proxy = ReverseProxy()
+        self.cache = ResponseCache(self.proxy) if PROXY_CACHE_ENABLED else None
+        self.health = BackendHealth()
+        self.admission = AdmissionControl()
+        self.retries = PROXY_RETRIES
+        self.request_counts: dict[str, int] = defaultdict(int)
+        self.autoscaler = Autoscaler(
+            self.inventory, self.stats_collector, self.scale_service, self.request_counts, self.admission.pressure
+        )
+
+    async def start(self):
+        await self.inventory.start()
+        await self.readiness.start()
+        await self.stats_collector.start()
+        await self.scale_service.warm_pool.start()
+        await self.autoscaler.start()
+
+    async def stop(self):
+        await self.autoscaler.stop()
+        await self.scale_service.warm_pool.stop()
+        await self.proxy.close()
+        await self.stats_collector.stop()
+        await self.readiness.stop()
+        await self.inventory.stop()
+
+    def get_strategy_name(self, image: str | None) -> str:
+        return self.strategies.get(image, BALANCER_STRATEGY) if image else BALANCER_STRATEGY
+
+    def set_strategy(self, image: str, strategy: str) -> dict:
+        create_strategy(strategy)
+        self.strategies[image] = strategy
+        self.pools.pop(image, None)
+
+        return {"image": image, "strategy": strategy}
+
+    def list_backend_health(self) -> list[dict]:
+        self.health.refresh()
+        in_flight = self.admission.backends
+        return [{**backend, "in_flight": in_flight.get(backend["id"], 0)} for backend in self.health.describe()]
+
+    def list_strategies(self) -> dict:
+        return {"default": BALANCER_STRATEGY, "images": self.strategies, "available": sorted(STRATEGIES)}
+
+    def list_backends(self, image: str | None) -> list[Container]:
+        containers = self.inventory.list_by_image(image) if image else self.container_service.containers
+        backends = [
+            c
+            for c in containers
+            if c.status == "running"
+            and self.readiness.is_ready(c.id)
+            and not self.scale_service.warm_pool.is_warm(c.id)
+        ]
+        # With every backend ejected the pool falls back to all of them rather than rejecting all traffic.
+        healthy = [c for c in backends if self.health.available(c.id)]
+
+        return sorted(healthy or backends, key=lambda c: c.id)
+
+    def get_pool(self, image: str | None) -> BackendPool:
+        pool = self.pools.get(image)
+        if pool is None:
+            pool = BackendPool(image, create_strategy(self.get_strategy_name(image), self.stats_collector))
+            self.pools[image] = pool
+
+        self.health.refresh()
+        version = (self.inventory.version, self.readiness.version, self.health.version)
+        if pool.version != version:
+            self.health.prune({c.id for c in self.inventory.all()})
+            pool.strategy.update(self.list_backends(image))
+            pool.version = version
+            # Ejected backends keep their clients, responses may still stream from them and the trial reuses the pool.
+            self.proxy.prune({c.url for c in self.inventory.list_by_status("running")})
+            self.admission.wake_all()
+
+        return pool
+
+    async def proxy_request(self, path: str, request: Request) -> Response:
+        image = request.headers.get(BALANCER_SERVICE_HEADER)
+        if self.cache is not None:
+            return await self.cache.serve(image, path, request, self.send)
+
+        response, finish = await self.send(image, path, request)
+        return self.proxy.stream_response(response, finish)
+
+    async def send(
+        self, image: str | None, path: str, request: Request, headers: list[tuple[str, str]] | None = None
+    ) -> tuple[httpx.Response, Callable[[], Awaitable[None]]]:
+        key = request.headers.get(BALANCER_HASH_HEADER) or (request.client.host if request.client else None)
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+        attempts = 1 + self.retries if request.method in IDEMPOTENT_METHODS and not has_body else 1
+        tried: set[str] = set()
+        service = self.admission.service(image)
+        deadline = time.monotonic() + self.admission.queue_timeout
+        admitted = False
+
+        # The service slot is held from admission until the response is finished, retries included.
         try:
-            async with httpx.AsyncClient() as clients:
-                response = await clients.get(url)
-
-            if response.headers.get("Content-Type", "").startswith("application/json"):
-                return {"container_id": container.id, "data": response.json()}
-            else:
-                return {"container_id": container.id, "data": response.text}
-
-        except httpx.HTTPError as e:
-            print(f"Ошибка при запросе к контейнеру: {e}")
-
-            return {"error": "Ошибка при запросе к контейнеру"}
-
-    async def check_and_scale(self):
-        print("Checking and scaling")
-        while True:
-            average_cpu_load = await self.get_average_cpu_load()
-            print(f"Средняя загрузка процессора: {average_cpu_load}")
-
-            if average_cpu_load > 57:
-                create_data = ContainerCreate(
-                    image="app:latest", command="", labels={"scale-purpose": "scale-up"}, env={}
-                )
-                await self.scale_service.scale_up(create_data)
-
-            elif average_cpu_load < 30:
-                await self.scale_service.scale_down()
-
-            await asyncio.sleep(10)
-
-    async def get_average_cpu_load(self):
-        total_cpu_load = 0
-        active_containers = [container.id for container in self.container_info_service.list_active_containers()]
-
-        if not active_containers:
-            return 0
-
-        valid_counts = 0
-
-        for container in active_containers:
-            cpu_load = await self.get_cpu_load(container)
-            if cpu_load is not None:
-                total_cpu_load += cpu_load
-                valid_counts += 1
-
-        if valid_counts == 0:
-            return 0
-
-        average_cpu_load = total_cpu_load / valid_counts
-
-        return average_cpu_load
-
-    async def get_cpu_load(self, container_id):
+            for attempt in range(attempts):
+                strategy, container = await self.admit(service, key, tried, deadline, admitted)
+                if not container:
+                    if tried:
+                        break
+                    raise NoBackendsAvailableError("Нет доступных контейнеров")
+
+                admitted = True
+                tried.add(container.id)
+                sent = await self.attempt(strategy, container, path, request, headers, attempt < attempts - 1)
+                if sent is not None:
+                    response, started = sent
+                    return response, self.finisher(service, strategy, container, response, started)
+
+        except BaseException:
+            if admitted:
+                self.admission.leave(service)
+            raise
+
+        self.admission.leave(service)
+        raise BackendRequestError("Ошибка при запросе к контейнеру")
+
+    async def attempt(
+        self,
+        strategy: BalancingStrategy,
+        container: Container,
+        path: str,
+        request: Request,
+        headers: list[tuple[str, str]] | None,
+        can_retry: bool,
+    ) -> tuple[httpx.Response, float] | None:
+        self.request_counts[container.image] += 1
+        strategy.acquire(container)
+        self.health.acquire(container)
+        self.admission.acquire(container)
+        started = time.monotonic()
         try:
-            container = self.client.containers.get(container_id)
-            stats = container.stats(stream=False)
-
-            if not stats:
-                return None
-
-            cpu_delta = (
-                    stats["cpu_stats"]["cpu_usage"]["total_usage"] - stats["precpu_stats"]["cpu_usage"]["total_usage"]
-            )
+            response = await self.proxy.send(container.url, path, request, headers)
 
-            system_cpu_delta = stats["cpu_stats"]["system_cpu_usage"] - stats["precpu_stats"]["system_cpu_usage"]
-
-            if system_cpu_delta == 0:
-                print(f"Данные о загрузке CPU для контейнера {container_id} не доступны для анализа.")
-                return None
-
-            number_cpus = stats["cpu_stats"]["online_cpus"]
-
-            cpu_usage_percentage = (cpu_delta / system_cpu_delta) * number_cpus * 100.0
+        except httpx.HTTPError as e:
+            print(f"Ошибка при запросе к контейнеру {container.id[:12]}: {e}")
+            self.release(strategy, container, started, failed=True)
+            if can_retry:
+                RETRIES.labels(container.image, type(e).__name__).inc()
+            return None
 
-            return cpu_usage_percentage
+        except BaseException:
+            # A cancelled attempt still gives back the strategy and health slots it took.
+            self.release(strategy, container, started, failed=True)
+            raise
 
-        except json.decoder.JSONDecodeError:
-            print(f"Ошибка при декодировании ответа от API для контейнера {container_id}.")
-            return None
-        except KeyError as e:
-            print(f"Отсутствует ожидаемое поле в ответе от API для контейнера {container_id}: {e}")
-            return None
-        except Exception as e:
-            print(f"Неизвестная ошибка при получении статистики для контейнера {container_id}: {str(e)}")
+        if can_retry and response.status_code in RETRY_STATUSES:
+            await response.aclose()
+            self.release(strategy, container, started, failed=True)
+            RETRIES.labels(container.image, str(response.status_code)).inc()
             return None
+
+        return response, started
+
+    def finisher(
+        self,
+        service: ServiceQueue,
+        strategy: BalancingStrategy,
+        container: Container,
+        response: httpx.Response,
+        started: float,
+    ) -> Callable[[], Awaitable[None]]:
+        async def finish():
+            try:
+                await response.aclose()
+            finally:
+                self.release(strategy, container, started, failed=response.status_code >= 500)
+                self.admission.leave(service)
+
+        return finish
+
+    async def admit(
+        self, service: ServiceQueue, key: str | None, tried: set[str], deadline: float, admitted: bool
+    ) -> tuple[BalancingStrategy, Container | None]:
+        queued = False
+        while True:
+            strategy = self.get_pool(service.image).strategy
+            if not any(c.id not in tried and self.health.admits(c.id) for c in strategy.backends):
+                return strategy, None
+
+            # Retries already hold a service slot, new requests only pass when nobody is queued before them.
+            if admitted or ((queued or not service.waiters) and service.has_room()):
+                container = self.choose(strategy, key, tried)
+                if container is not None:
+                    if not admitted:
+                        self.admission.enter(service)
+                    return strategy, container
+
+            await self.admission.wait(service, deadline, requeue=queued)
+            queued = True
+
+    def choose(self, strategy: BalancingStrategy, key: str | None, tried: set[str]) -> Container | None:
+        container = strategy.select(key)
+        if container is not None and container.id not in tried and self.usable(container):
+            return container
+
+        # Retries, full backends and half-open backends with a trial in flight fall back to any other backend.
+        others = [c for c in strategy.backends if c.id not in tried and self.usable(c)]
+        return random.choice(others) if others else None
+
+    def usable(self, container: Container) -> bool:
+        return self.health.admits(container.id) and self.admission.has_room(container.id)
+
+    def release(self, strategy: BalancingStrategy, container: Container, started: float, failed: bool):
+        latency = time.monotonic() - started
+        strategy.release(container, latency, failed=failed)
+        self.health.record(container, latency, failed)
+        self.admission.release(container)
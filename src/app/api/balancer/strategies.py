@@ -0,0 +1,205 @@
+import bisect
+import hashlib
+import itertools
+import random
+from collections import defaultdict
+
+from src.app.config import BALANCER_EWMA_DECAY, BALANCER_HASH_REPLICAS
+from src.app.core.handlers.errors import BalancerStrategyNotFoundError
+from src.app.core.schemas.container import Container
+
+
+class BalancingStrategy:
+    name = ""
+
+    def __init__(self, stats_collector=None):
+        self.stats_collector = stats_collector
+        self.backends: list[Container] = []
+        self.in_flight: dict[str, int] = defaultdict(int)
+
+    def update(self, backends: list[Container]):
+        self.backends = backends
+        alive = {backend.id for backend in backends}
+        for container_id in list(self.in_flight):
+            if container_id not in alive:
+                del self.in_flight[container_id]
+
+    def select(self, key: str | None = None) -> Container | None:
+        raise NotImplementedError
+
+    def acquire(self, backend: Container):
+        self.in_flight[backend.id] += 1
+
+    def release(self, backend: Container, latency: float, failed: bool = False):
+        if self.in_flight.get(backend.id, 0) > 0:
+            self.in_flight[backend.id] -= 1
+
+    def two_random(self) -> tuple[Container, Container] | None:
+        if len(self.backends) < 2:
+            return None
+
+        first, second = random.sample(range(len(self.backends)), 2)
+        return self.backends[first], self.backends[second]
+
+
+class RoundRobinStrategy(BalancingStrategy):
+    name = "round_robin"
+
+    def __init__(self, stats_collector=None):
+        super().__init__(stats_collector)
+        self.counter = itertools.count()
+
+    def select(self, key: str | None = None) -> Container | None:
+        if not self.backends:
+            return None
+
+        return self.backends[next(self.counter) % len(self.backends)]
+
+
+class LeastOutstandingStrategy(BalancingStrategy):
+    name = "least_outstanding"
+
+    def __init__(self, stats_collector=None):
+        super().__init__(stats_collector)
+        self.buckets: dict[int, dict[str, Container]] = defaultdict(dict)
+        self.min_count = 0
+
+    def update(self, backends: list[Container]):
+        super().update(backends)
+        self.buckets.clear()
+        for backend in backends:
+            self.buckets[self.in_flight[backend.id]][backend.id] = backend
+        self.min_count = min(self.buckets, default=0)
+
+    def select(self, key: str | None = None) -> Container | None:
+        if not self.backends:
+            return None
+
+        while not self.buckets.get(self.min_count):
+            self.min_count += 1
+
+        return next(iter(self.buckets[self.min_count].values()))
+
+    def acquire(self, backend: Container):
+        self.move(backend, 1)
+
+    def release(self, backend: Container, latency: float, failed: bool = False):
+        if self.in_flight.get(backend.id, 0) > 0:
+            self.move(backend, -1)
+
+    def move(self, backend: Container, delta: int):
+        count = self.in_flight[backend.id]
+        bucket = self.buckets.get(count)
+
+        if bucket is None or bucket.pop(backend.id, None) is None:
+            self.in_flight[backend.id] = count + delta
+            return
+
+        if not bucket:
+            del self.buckets[count]
+
+        self.in_flight[backend.id] = count + delta
+        self.buckets[count + delta][backend.id] = backend
+        self.min_count = min(self.min_count, count + delta)
+
+
+class PowerOfTwoChoicesStrategy(BalancingStrategy):
+    name = "power_of_two"
+
+    def score(self, backend: Container) -> float:
+        return self.in_flight.get(backend.id, 0)
+
+    def select(self, key: str | None = None) -> Container | None:
+        pair = self.two_random()
+        if pair is None:
+            return self.backends[0] if self.backends else None
+
+        first, second = pair
+        return first if self.score(first) <= self.score(second) else second
+
+
+class LatencyEwmaStrategy(PowerOfTwoChoicesStrategy):
+    name = "latency_ewma"
+
+    def __init__(self, stats_collector=None, decay: float = BALANCER_EWMA_DECAY):
+        super().__init__(stats_collector)
+        self.decay = decay
+        self.latency: dict[str, float] = {}
+
+    def update(self, backends: list[Container]):
+        super().update(backends)
+        alive = {backend.id for backend in backends}
+        self.latency = {container_id: value for container_id, value in self.latency.items() if container_id in alive}
+
+    def score(self, backend: Container) -> float:
+        return self.latency.get(backend.id, 0.0) * (self.in_flight.get(backend.id, 0) + 1)
+
+    def release(self, backend: Container, latency: float, failed: bool = False):
+        super().release(backend, latency, failed)
+        previous = self.latency.get(backend.id)
+        self.latency[backend.id] = latency if previous is None else self.decay * previous + (1 - self.decay) * latency
+
+
+class ConsistentHashStrategy(BalancingStrategy):
+    name = "consistent_hash"
+
+    def __init__(self, stats_collector=None, replicas: int = BALANCER_HASH_REPLICAS):
+        super().__init__(stats_collector)
+        self.replicas = replicas
+        self.ring_keys: list[int] = []
+        self.ring: list[Container] = []
+        self.fallback = RoundRobinStrategy()
+
+    @staticmethod
+    def hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+    def update(self, backends: list[Container]):
+        super().update(backends)
+        self.fallback.update(backends)
+        points = sorted(
+            (self.hash(f"{backend.id}-{replica}"), backend) for backend in backends for replica in range(self.replicas)
+        )
+        self.ring_keys = [point for point, _ in points]
+        self.ring = [backend for _, backend in points]
+
+    def select(self, key: str | None = None) -> Container | None:
+        if not self.ring:
+            return None
+
+        if key is None:
+            return self.fallback.select()
+
+        index = bisect.bisect(self.ring_keys, self.hash(key)) % len(self.ring)
+        return self.ring[index]
+
+
+class LeastCpuStrategy(PowerOfTwoChoicesStrategy):
+    name = "least_cpu"
+
+    def score(self, backend: Container) -> float:
+        sample = self.stats_collector.latest(backend.id) if self.stats_collector else None
+
+        return sample["cpu_percentage"] if sample else float("inf")
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (
+        RoundRobinStrategy,
+        LeastOutstandingStrategy,
+        PowerOfTwoChoicesStrategy,
+        LatencyEwmaStrategy,
+        ConsistentHashStrategy,
+        LeastCpuStrategy,
+    )
+}
+
+
+def create_strategy(name: str, stats_collector=None) -> BalancingStrategy:
+    strategy = STRATEGIES.get(name)
+
+    if strategy is None:
+        raise BalancerStrategyNotFoundError(f"Unknown balancing strategy {name}, expected one of {sorted(STRATEGIES)}.")
+
+    return strategy(stats_collector)
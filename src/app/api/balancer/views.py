@@ -1,10 +1,22 @@
-import docker
+from fastapi import Request
 
-from src.app.api.balancer.service import LoadBalancer
+from src.app.core.schemas.balancer import BalancerStrategy
+from src.app.graph import get_service_graph
 
-client = docker.from_env()
-load_service = LoadBalancer(client)
+graph = get_service_graph()
 
 
-async def proxy_request(path: str):
-    return await load_service.proxy_request(path)
+async def proxy_request(path: str, request: Request):
+    return await graph.load_balancer.proxy_request(path, request)
+
+
+async def list_strategies():
+    return graph.load_balancer.list_strategies()
+
+
+async def set_strategy(image_name: str, balancer_strategy: BalancerStrategy):
+    return graph.load_balancer.set_strategy(image_name, balancer_strategy.strategy)
+
+
+async def list_backends():
+    return graph.load_balancer.list_backend_health()
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from aiodocker.exceptions import DockerError
+
+from src.app.config import IMAGE_CACHE_TTL
+
+
+class ImageResolver:
+    def __init__(self, client, ttl: float = IMAGE_CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+        self.resolved: dict[str, float] = {}
+        self.in_flight: dict[str, asyncio.Task] = {}
+
+    async def resolve(self, image: str) -> str:
+        expires = self.resolved.get(image)
+        if expires is not None and expires > time.monotonic():
+            return image
+
+        # Concurrent callers for the same reference share one inspect/pull instead of each starting their own.
+        task = self.in_flight.get(image)
+        if task is None:
+            task = self.in_flight[image] = asyncio.create_task(self.fetch(image))
+            task.add_done_callback(lambda _: self.in_flight.pop(image, None))
+
+        return await asyncio.shield(task)
+
+    async def fetch(self, image: str) -> str:
+        try:
+            await self.client.images.inspect(image)
+        except DockerError as e:
+            if e.status != 404:
+                raise
+            print(f"Загрузка образа {image}")
+            await self.client.images.pull(image)
+
+        self.resolved[image] = time.monotonic() + self.ttl
+
+        return image
+
+    def invalidate(self, image: str | None = None):
+        if image is None:
+            self.resolved.clear()
+        else:
+            self.resolved.pop(image, None)
+
+
+image_resolver = None
+
+
+def get_image_resolver(client) -> ImageResolver:
+    global image_resolver
+
+    if image_resolver is None:
+        image_resolver = ImageResolver(client)
+
+    return image_resolver
@@ -0,0 +1,304 @@
+import asyncio
+import bisect
+import os
+from collections import defaultdict
+
+from aiodocker.exceptions import DockerError
+
+from src.app.config import INVENTORY_RESYNC_INTERVAL
+from src.app.core.schemas.container import Container
+from src.app.infrastructure.docker.events import DockerEventListener, event_action, event_container_id
+from src.app.infrastructure.repository import get_repository
+
+# kill is left out, a signal like HUP does not stop the container and a real exit reports die.
+STATUS_ACTIONS = {
+    "die": "exited",
+    "stop": "exited",
+    "pause": "paused",
+    "unpause": "running",
+}
+
+REFRESH_ACTIONS = {"create", "start", "restart", "rename", "update"}
+
+
+class ContainerInventory:
+    def __init__(self, client, resync_interval: float = INVENTORY_RESYNC_INTERVAL):
+        self.client = client
+        self.resync_interval = resync_interval
+        self.events = DockerEventListener(client)
+        self.repository = get_repository()
+        self.containers: dict[str, Container] = {}
+        self.by_image: dict[str, set[str]] = defaultdict(set)
+        self.by_status: dict[str, set[str]] = defaultdict(set)
+        self.by_label: dict[tuple[str, str], set[str]] = defaultdict(set)
+        self.version = 0
+        # Versions restart with the process, the epoch keeps ETags of different runs apart.
+        self.epoch = os.urandom(4).hex()
+        self.ordered: list[str] = []
+        self.ordered_version: int | None = None
+        # image id -> tag, Docker reports the id instead of the tag once the tag moved to a newer image
+        self.image_tags: dict[str, str] = {}
+        self.resync_task = None
+
+    async def start(self):
+        if self.resync_task is not None:
+            return
+
+        # The last known state is served from disk right away, the daemon is rescanned in the background.
+        warmed = await self.warm()
+        if not warmed:
+            await self.resync()
+
+        self.events.subscribe(self.handle_event)
+        self.events.start()
+        self.resync_task = asyncio.create_task(self.resync_loop(immediately=warmed))
+
+    async def stop(self):
+        await self.events.stop()
+        if self.resync_task is not None:
+            self.resync_task.cancel()
+            self.resync_task = None
+
+    async def warm(self) -> bool:
+        containers = await self.repository.load_containers()
+        for container in containers:
+            self.add(container, persist=False)
+
+        return bool(containers)
+
+    async def resync_loop(self, immediately: bool = False):
+        while True:
+            if not immediately:
+                await asyncio.sleep(self.resync_interval)
+            immediately = False
+
+            try:
+                await self.resync()
+            except DockerError as e:
+                print(f"Ошибка при синхронизации списка контейнеров: {e}")
+
+    async def resync(self):
+        listed, unreachable = await self.client.containers.list_reachable(all=True)
+        summaries = [summary._container for summary in listed]
+        await self.resolve_image_tags(summaries)
+        fresh = {c.id: c for c in (self.from_summary(summary, self.image_tags) for summary in summaries)}
+
+        # Containers of a node that could not be listed are kept as they were until it answers again.
+        for container_id, container in list(self.containers.items()):
+            if container_id not in fresh and container.node not in unreachable:
+                self.remove(container_id)
+
+        for container in fresh.values():
+            if self.containers.get(container.id) != container:
+                self.remove(container.id, persist=False)
+                self.add(container)
+
+    async def resolve_image_tags(self, summaries: list[dict]):
+        # One image listing maps every unknown id, instead of an inspect per container.
+        unknown = {s.get("Image") for s in summaries if (s.get("Image") or "").startswith("sha256:")}
+        if not unknown - self.image_tags.keys():
+            return
+
+        for image in await self.client.images.list():
+            tags = [tag for tag in image.get("RepoTags") or [] if tag != "<none>:<none>"]
+            if tags:
+                self.image_tags[image["Id"]] = tags[0]
+
+    async def handle_event(self, event: dict):
+        container_id = event_container_id(event)
+        action = event_action(event)
+
+        if not container_id:
+            return
+
+        if action == "destroy":
+            self.remove(container_id)
+
+        elif action in STATUS_ACTIONS:
+            self.set_status(container_id, STATUS_ACTIONS[action])
+
+        elif action in REFRESH_ACTIONS:
+            await self.refresh(container_id)
+
+    async def refresh(self, container_id: str):
+        try:
+            docker_container = await self.client.containers.get(container_id)
+        except DockerError as e:
+            if e.status == 404:
+                self.remove(container_id)
+                return
+            raise
+
+        self.remove(container_id, persist=False)
+        self.add(self.from_inspect(docker_container._container))
+
+    def set_status(self, container_id: str, status: str):
+        container = self.containers.get(container_id)
+        if container is None:
+            return
+
+        self.remove(container_id, persist=False)
+        self.add(container.model_copy(update={"status": status}))
+
+    def add(self, container: Container, persist: bool = True):
+        self.version += 1
+        self.containers[container.id] = container
+        self.by_image[container.image].add(container.id)
+        self.by_status[container.status].add(container.id)
+        for key, value in (container.labels or {}).items():
+            self.by_label[(key, value)].add(container.id)
+
+        if persist:
+            self.repository.save_container(container)
+
+    def remove(self, container_id: str, persist: bool = True):
+        container = self.containers.pop(container_id, None)
+        if container is None:
+            return
+
+        if persist:
+            self.repository.delete_container(container_id)
+
+        self.version += 1
+        self.discard(self.by_image, container.image, container_id)
+        self.discard(self.by_status, container.status, container_id)
+        for key, value in (container.labels or {}).items():
+            self.discard(self.by_label, (key, value), container_id)
+
+    @staticmethod
+    def discard(index: dict, key, container_id: str):
+        ids = index.get(key)
+        if ids is None:
+            return
+
+        ids.discard(container_id)
+        if not ids:
+            del index[key]
+
+    def all(self) -> list[Container]:
+        return list(self.containers.values())
+
+    def get(self, container_id: str) -> Container | None:
+        return self.containers.get(container_id)
+
+    def count(self) -> int:
+        return len(self.containers)
+
+    def count_by_image(self, image: str) -> int:
+        return len(self.by_image.get(image, ()))
+
+    def list_by_image(self, image: str) -> list[Container]:
+        return self.select(self.by_image, image)
+
+    def list_by_status(self, status: str) -> list[Container]:
+        return self.select(self.by_status, status)
+
+    def list_by_label(self, key: str, value: str) -> list[Container]:
+        return self.select(self.by_label, (key, value))
+
+    def select(self, index: dict, key) -> list[Container]:
+        return [self.containers[container_id] for container_id in index.get(key, ())]
+
+    def query(
+        self,
+        status: str | None = None,
+        image: str | None = None,
+        labels: dict[str, str | None] | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Container], bool]:
+        matching, keys = self.filter(status, image, labels or {})
+        page: list[Container] = []
+        for container_id in self.ids_after(after):
+            container = self.containers[container_id]
+            if not self.matches(container, matching, keys):
+                continue
+
+            if limit is not None and len(page) == limit:
+                return page, True
+            page.append(container)
+
+        return page, False
+
+    def filter(
+        self, status: str | None, image: str | None, labels: dict[str, str | None]
+    ) -> tuple[set[str] | None, list[str]]:
+        # Exact matches come from the indexes, labels asked for by key alone are checked per container.
+        indexed = [self.by_status.get(status, set())] if status is not None else []
+        if image is not None:
+            indexed.append(self.by_image.get(image, set()))
+        indexed += [self.by_label.get((key, value), set()) for key, value in labels.items() if value is not None]
+
+        return set.intersection(*indexed) if indexed else None, [key for key, value in labels.items() if value is None]
+
+    def ids_after(self, after: str | None) -> list[str]:
+        # Keyset pagination over ids, a page stays stable while containers are added or removed before it.
+        if self.ordered_version != self.version:
+            self.ordered = sorted(self.containers)
+            self.ordered_version = self.version
+
+        return self.ordered[bisect.bisect_right(self.ordered, after) :] if after else self.ordered
+
+    def resolve(self, container_id: str) -> str | None:
+        # A short id stands for the one container whose id starts with it, an ambiguous prefix resolves to nothing.
+        if container_id in self.containers:
+            return container_id
+
+        ordered = self.ids_after(None)
+        start = bisect.bisect_left(ordered, container_id)
+        matches = [cid for cid in ordered[start : start + 2] if cid.startswith(container_id)]
+
+        return matches[0] if len(matches) == 1 else None
+
+    @staticmethod
+    def matches(container: Container, matching: set[str] | None, keys: list[str]) -> bool:
+        labels = container.labels or {}
+        return (matching is None or container.id in matching) and all(key in labels for key in keys)
+
+    @staticmethod
+    def from_summary(data: dict, image_tags: dict[str, str] | None = None) -> Container:
+        ports = [port for port in data.get("Ports") or [] if port.get("PublicPort")]
+        port = next((port for port in ports if port.get("PrivatePort") == 80), ports[0] if ports else None)
+        node = data.get("Node") or {}
+        host = node.get("IP", "localhost")
+        url = f"http://{host}:{port['PublicPort']}" if port else f"http://{host}"
+
+        image = data.get("Image") or "unknown"
+
+        return Container(
+            id=data["Id"],
+            image=(image_tags or {}).get(image, image),
+            status=data.get("State", "unknown"),
+            url=url,
+            labels=data.get("Labels") or {},
+            node=node.get("Name"),
+        )
+
+    @staticmethod
+    def from_inspect(data: dict) -> Container:
+        ports = data["NetworkSettings"]["Ports"] or {}
+        port_data = ports.get("80/tcp") or next((value for value in ports.values() if value), None)
+        node = data.get("Node") or {}
+        host = node.get("IP", "localhost")
+        url = f"http://{host}:{port_data[0]['HostPort']}" if port_data else f"http://{host}"
+
+        return Container(
+            id=data["Id"],
+            image=data["Config"].get("Image") or "unknown",
+            status=data["State"]["Status"],
+            url=url,
+            labels=data["Config"].get("Labels") or {},
+            node=node.get("Name"),
+        )
+
+
+inventory = None
+
+
+def get_inventory(client) -> ContainerInventory:
+    global inventory
+
+    if inventory is None:
+        inventory = ContainerInventory(client)
+
+    return inventory
@@ -0,0 +1,254 @@
+import asyncio
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import httpx
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.inventory import ContainerInventory, get_inventory
+from src.app.config import (
+    READINESS_BACKOFF_MAX,
+    READINESS_BACKOFF_MIN,
+    READINESS_HTTP_PATH,
+    READINESS_PROBE,
+    READINESS_PROBE_TIMEOUT,
+    READINESS_RECHECK_MAX,
+    READINESS_TIMEOUT,
+)
+from src.app.core.handlers.errors import ContainerNotReadyError
+from src.app.core.schemas.container import Container
+from src.app.infrastructure.docker.events import event_action, event_container_id
+
+UNREADY_ACTIONS = {"die", "stop", "pause"}
+
+
+class ReadinessTracker:
+    def __init__(
+        self,
+        client,
+        inventory: ContainerInventory,
+        probe: str = READINESS_PROBE,
+        http_path: str = READINESS_HTTP_PATH,
+        timeout: float = READINESS_TIMEOUT,
+    ):
+        self.client = client
+        self.inventory = inventory
+        self.probe_type = probe
+        self.http_path = http_path
+        self.timeout = timeout
+        self.ready: set[str] = set()
+        # Containers without a published port cannot be probed, they stay out of balancing until they restart.
+        self.unprobeable: set[str] = set()
+        # container id -> rechecks so far and when the next one is due
+        self.rechecks: dict[str, tuple[int, float]] = {}
+        self.version = 0
+        self.waiters: dict[tuple[str, str], list[asyncio.Future]] = defaultdict(list)
+        self.checks: dict[str, asyncio.Task] = {}
+        self.stops: dict[str, int] = defaultdict(int)
+        self.http: httpx.AsyncClient | None = None
+        self.recheck_task = None
+
+    async def start(self):
+        if self.recheck_task is not None:
+            return
+
+        self.inventory.events.subscribe(self.handle_event)
+        self.recheck_task = asyncio.create_task(self.recheck_loop())
+
+    async def recheck_loop(self):
+        # Running containers that missed their deadline keep being probed, they join the balancer once they answer.
+        # The pause between rechecks of one container doubles, so a container that never answers costs little.
+        while True:
+            now = time.monotonic()
+            for container in self.inventory.list_by_status("running"):
+                if container.id in self.ready or container.id in self.unprobeable or container.id in self.checks:
+                    continue
+
+                rechecks, due = self.rechecks.get(container.id, (0, 0.0))
+                if now >= due:
+                    delay = min(self.timeout * 2**rechecks, READINESS_RECHECK_MAX)
+                    self.rechecks[container.id] = (rechecks + 1, now + delay)
+                    self.check(container.id)
+
+            await asyncio.sleep(self.timeout)
+
+    async def stop(self):
+        if self.recheck_task is not None:
+            self.recheck_task.cancel()
+            self.recheck_task = None
+
+        for task in self.checks.values():
+            task.cancel()
+        self.checks.clear()
+
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    def is_ready(self, container_id: str) -> bool:
+        return container_id in self.ready
+
+    async def handle_event(self, event: dict):
+        container_id = event_container_id(event)
+        action = event_action(event)
+
+        if not container_id:
+            return
+
+        if action == "start":
+            self.forget(container_id)
+            self.notify(container_id, "start")
+            self.check(container_id)
+
+        elif action == "health_status: healthy":
+            self.notify(container_id, "healthy")
+
+        elif action == "destroy":
+            self.stops.pop(container_id, None)
+            self.forget(container_id)
+            self.mark_unready(container_id)
+            self.fail(container_id, f"Контейнер {container_id[:12]} удален")
+
+        elif action in UNREADY_ACTIONS:
+            self.stops[container_id] += 1
+            self.mark_unready(container_id)
+            self.fail(container_id, f"Контейнер {container_id[:12]} остановлен ({action})")
+
+    def notify(self, container_id: str, kind: str):
+        for future in self.waiters.pop((container_id, kind), []):
+            if not future.done():
+                future.set_result(None)
+
+    def fail(self, container_id: str, message: str):
+        for kind in ("start", "healthy"):
+            for future in self.waiters.pop((container_id, kind), []):
+                if not future.done():
+                    future.set_exception(ContainerNotReadyError(message))
+
+    def forget(self, container_id: str):
+        self.unprobeable.discard(container_id)
+        self.rechecks.pop(container_id, None)
+
+    def mark_ready(self, container_id: str):
+        self.rechecks.pop(container_id, None)
+        if container_id not in self.ready:
+            self.ready.add(container_id)
+            self.version += 1
+
+    def mark_unready(self, container_id: str):
+        if container_id in self.ready:
+            self.ready.discard(container_id)
+            self.version += 1
+
+    def check(self, container_id: str) -> asyncio.Task:
+        task = self.checks.get(container_id)
+        if task is None:
+            task = self.checks[container_id] = asyncio.create_task(self.run_check(container_id))
+            task.add_done_callback(self.report)
+
+        return task
+
+    @staticmethod
+    def report(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Проверка готовности не пройдена: {task.exception()}")
+
+    async def run_check(self, container_id: str) -> Container:
+        try:
+            return await asyncio.wait_for(self.probe_until_ready(container_id), self.timeout)
+
+        except asyncio.TimeoutError:
+            raise ContainerNotReadyError(f"Контейнер {container_id[:12]} не готов за {self.timeout} с")
+
+        finally:
+            if self.checks.get(container_id) is asyncio.current_task():
+                del self.checks[container_id]
+
+    async def wait_ready(self, container_id: str) -> Container:
+        return await asyncio.shield(self.check(container_id))
+
+    async def probe_until_ready(self, container_id: str) -> Container:
+        stops = self.stops[container_id]
+        attrs = await self.wait_for(container_id, "start", lambda state: state["Running"])
+
+        if attrs["State"].get("Health"):
+            attrs = await self.wait_for(container_id, "healthy", lambda state: state["Health"]["Status"] == "healthy")
+
+        # Ports are published when the container starts, one without them has nothing to probe.
+        container = ContainerInventory.from_inspect(attrs)
+        if urlsplit(container.url).port is None:
+            self.unprobeable.add(container_id)
+            return container
+
+        delay = READINESS_BACKOFF_MIN
+        while True:
+            if self.stops[container_id] != stops:
+                raise ContainerNotReadyError(f"Контейнер {container_id[:12]} остановлен до готовности")
+
+            if await self.probe(container.url):
+                self.mark_ready(container_id)
+                return container
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, READINESS_BACKOFF_MAX)
+
+    async def wait_for(self, container_id: str, kind: str, predicate) -> dict:
+        while True:
+            # The waiter is registered before inspecting, so an event arriving in between is not lost.
+            future = asyncio.get_running_loop().create_future()
+            waiters = self.waiters[(container_id, kind)]
+            waiters.append(future)
+
+            try:
+                attrs = await self.inspect(container_id)
+                if predicate(attrs["State"]):
+                    return attrs
+
+                await future
+
+            finally:
+                if future in waiters:
+                    waiters.remove(future)
+                if not waiters and self.waiters.get((container_id, kind)) is waiters:
+                    del self.waiters[(container_id, kind)]
+
+    async def inspect(self, container_id: str) -> dict:
+        try:
+            return await self.client.containers.container(container_id).show()
+
+        except DockerError as e:
+            raise ContainerNotReadyError(f"Контейнер {container_id[:12]} недоступен: {e.message}")
+
+    async def probe(self, url: str) -> bool:
+        if self.probe_type == "none":
+            return True
+
+        try:
+            if self.probe_type == "http":
+                if self.http is None:
+                    self.http = httpx.AsyncClient(timeout=READINESS_PROBE_TIMEOUT)
+                response = await self.http.get(f"{url}{self.http_path}")
+                return response.status_code < 500
+
+            address = urlsplit(url)
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(address.hostname, address.port or 80), READINESS_PROBE_TIMEOUT
+            )
+            writer.close()
+            return True
+
+        except (OSError, asyncio.TimeoutError, httpx.HTTPError):
+            return False
+
+
+readiness_tracker = None
+
+
+def get_readiness_tracker(client) -> ReadinessTracker:
+    global readiness_tracker
+
+    if readiness_tracker is None:
+        readiness_tracker = ReadinessTracker(client, get_inventory(client))
+
+    return readiness_tracker
@@ -3,13 +3,16 @@ from starlette import status
 
 from src.app.api.container.views import (
     create_container,
+    create_containers,
     delete_container,
     get_container_logs,
+    list_container_restarts,
     list_containers,
     start_container,
     stop_container,
+    stream_container_logs,
 )
-from src.app.core.schemas.container import Container, ContainerLog
+from src.app.core.schemas.container import Container, ContainerBatchResult, ContainerLog, ContainerRestart
 
 router = APIRouter()
 
@@ -18,9 +21,10 @@ router.add_api_route(
     path="/containers",
     endpoint=list_containers,
     methods=["GET"],
-    response_model=list[Container],
+    response_model=None,
+    responses={status.HTTP_200_OK: {"model": list[Container]}, status.HTTP_304_NOT_MODIFIED: {}},
     status_code=status.HTTP_200_OK,
-    description="Get a list of all containers",
+    description="Get a page of containers, optionally filtered and projected to some fields",
 )
 
 router.add_api_route(
@@ -32,6 +36,15 @@ router.add_api_route(
     description="Create a new container",
 )
 
+router.add_api_route(
+    path="/containers/batch",
+    endpoint=create_containers,
+    methods=["POST"],
+    response_model=ContainerBatchResult,
+    status_code=status.HTTP_201_CREATED,
+    description="Create several containers from one spec concurrently",
+)
+
 router.add_api_route(
     path="/containers/{container_id}",
     endpoint=delete_container,
@@ -64,3 +77,20 @@ router.add_api_route(
     status_code=status.HTTP_200_OK,
     description="Get logs of a container",
 )
+
+router.add_api_route(
+    path="/containers/{container_id}/logs/stream",
+    endpoint=stream_container_logs,
+    methods=["GET"],
+    status_code=status.HTTP_200_OK,
+    description="Stream logs of a container line by line as NDJSON or plain text",
+)
+
+router.add_api_route(
+    path="/containers/restarts",
+    endpoint=list_container_restarts,
+    methods=["GET"],
+    response_model=list[ContainerRestart],
+    status_code=status.HTTP_200_OK,
+    description="Get recent restarts made by the supervisor",
+)
@@ -1,238 +1,263 @@
 import asyncio
-import datetime
-import itertools
+import json
 import re
-import threading
-import time
-
-import docker
-from docker.errors import APIError, ImageNotFound, NotFound
-
-from src.app.core.handlers.errors import DockerImageNotFoundError, DockerInternalError, NoLogsFoundError
+import shlex
+from typing import Any, AsyncIterator
+
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.images import get_image_resolver
+from src.app.api.container.inventory import ContainerInventory, get_inventory
+from src.app.api.container.readiness import get_readiness_tracker
+from src.app.config import CONTAINER_BATCH_CONCURRENCY
+from src.app.core.handlers.errors import (
+    ContainerNotReadyError,
+    DockerImageNotFoundError,
+    DockerInternalError,
+    InvalidQueryError,
+    NoLogsFoundError,
+)
 from src.app.core.schemas.container import Container
 from src.app.core.schemas.container import Container as ContainerSchema
 from src.app.core.schemas.container import ContainerCreate, ContainerLog, LogEntry
 
+LOG_LINE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?Z) ?(.*)")
+
+
+def parse_log_line(line: str) -> tuple[str | None, str]:
+    match = LOG_LINE_PATTERN.match(line)
+
+    if match is None:
+        return None, line
+
+    return match.group(1), match.group(2)
+
+
+async def iter_lines(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    buffer = ""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    if buffer:
+        yield buffer
+
 
 class ContainerService:
 
-    def __init__(self, client):
+    def __init__(self, client, container_info_service: "ContainerInfoService | None" = None):
         self.client = client
-        self.container_info_service = ContainerInfoService(client)
-        self.containers = []
-        self.initial_containers_count = len(self.containers)
-        self.container_cycle = itertools.cycle(self.containers)
-        self.update_containers_list()
+        self.container_info_service = container_info_service or ContainerInfoService(client)
+        self.image_resolver = get_image_resolver(client)
+        self.readiness = get_readiness_tracker(client)
 
-    def update_containers_list(self):
-        self.containers = self.container_info_service.list_active_containers()
-        self.container_cycle = itertools.cycle(self.containers)
+    @property
+    def containers(self) -> list[Container]:
+        return self.container_info_service.list_active_containers()
+
+    async def resolve_image(self, image: str) -> str:
+        return await self.image_resolver.resolve(image)
 
     async def create_container(self, container_data: ContainerCreate) -> Container:
         try:
-            container_data.image = await asyncio.get_running_loop().run_in_executor(
-                None,
-                lambda: (
-                    self.client.images.get(container_data.image)
-                    if self.client.images.list(container_data.image)
-                    else self.client.images.pull(container_data.image)
-                ),
-            )
-            container = await asyncio.get_running_loop().run_in_executor(
-                None,
-                lambda: self.client.containers.create(
-                    image=container_data.image.tags[0],
-                    command=container_data.command,
-                    labels=container_data.labels,
-                    detach=True,
-                    ports={"80/tcp": None},
-                ),
-            )
-            container.start()
-            await asyncio.sleep(1)
-            container.reload()
-
-            port = container.attrs["NetworkSettings"]["Ports"]["80/tcp"][0]["HostPort"]
-            print(f"Образ {container_data.image.tags[0]} успешно!")
-
-            return Container(
-                id=container.id, image=container_data.image.tags[0], status="running", url=f"http://localhost:{port}"
-            )
-        except (ImageNotFound, NotFound) as e:
-            print(f"Image {container_data.image} not found: {e}")
-
-        except APIError as e:
-            print(f"Failed to create container: {e}")
-
-    def delete_container(self, container_id: str):
+            return await self.run_container(container_data)
+
+        except DockerError as e:
+            if e.status == 404:
+                print(f"Image {container_data.image} not found: {e.message}")
+                raise DockerImageNotFoundError(f"Image {container_data.image} not found.")
+
+            print(f"Failed to create container: {e.message}")
+            raise DockerInternalError(f"Failed to create container: {e.message}")
+
+        except ContainerNotReadyError as e:
+            print(f"Failed to create container: {e.message}")
+            raise
+
+    async def create_containers(
+        self, container_data: ContainerCreate, count: int, concurrency: int = CONTAINER_BATCH_CONCURRENCY
+    ) -> list[dict]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(index: int) -> dict:
+            async with semaphore:
+                try:
+                    return {"index": index, "container": await self.run_container(container_data), "error": None}
+
+                except (DockerError, ContainerNotReadyError) as e:
+                    print(f"Failed to create container {index} of {count}: {e.message}")
+                    return {"index": index, "container": None, "error": e.message}
+
+        return list(await asyncio.gather(*(create(index) for index in range(count))))
+
+    @staticmethod
+    def container_config(container_data: ContainerCreate, image: str) -> dict:
+        host_config: dict[str, Any] = {"PortBindings": {"80/tcp": [{"HostPort": ""}]}}
+        resources = container_data.resources
+        if resources is not None and resources.cpus:
+            host_config["NanoCpus"] = int(resources.cpus * 1e9)
+        if resources is not None and resources.memory:
+            host_config["Memory"] = resources.memory
+
+        return {
+            "Image": image,
+            "Cmd": shlex.split(container_data.command) if container_data.command else None,
+            "Labels": container_data.labels or {},
+            "Env": [f"{key}={value}" for key, value in (container_data.env or {}).items()],
+            "ExposedPorts": {"80/tcp": {}},
+            "HostConfig": host_config,
+        }
+
+    async def run_container(self, container_data: ContainerCreate) -> Container:
+        image = await self.resolve_image(container_data.image)
+        container = await self.client.containers.create(config=self.container_config(container_data, image))
+        await container.start()
         try:
-            container = self.client.containers.get(container_id)
-            container.remove(force=True)
+            ready = await self.readiness.wait_ready(container.id)
+
+        except ContainerNotReadyError:
+            # Nobody owns a container that never became ready, it is removed instead of left running.
+            try:
+                await container.delete(force=True)
+            except DockerError as e:
+                print(f"Не удалось удалить неготовый контейнер {container.id[:12]}: {e.message}")
+            raise
 
-        except NotFound:
-            raise DockerImageNotFoundError(f"Container {container_id} not found.")
+        print(f"Образ {image} успешно!")
 
-        except APIError as e:
-            raise DockerInternalError(f"Failed to delete container {container_id}: {e.explanation}")
+        return ready
 
-    def start_container(self, container_id: str):
+    async def delete_container(self, container_id: str):
         try:
-            container = self.client.containers.get(container_id)
-            container.start()
+            await self.client.containers.container(container_id).delete(force=True)
 
-        except NotFound:
-            raise DockerImageNotFoundError(f"Container {container_id} not found.")
+        except DockerError as e:
+            raise self.docker_error(e, f"Failed to delete container {container_id}")
+
+    async def start_container(self, container_id: str):
+        try:
+            await self.client.containers.container(container_id).start()
 
-        except APIError as e:
-            raise DockerInternalError(f"Failed to start container {container_id}: {e.explanation}")
+        except DockerError as e:
+            raise self.docker_error(e, f"Failed to start container {container_id}")
 
-    def stop_container(self, container_id: str):
+    async def stop_container(self, container_id: str):
         try:
-            container = self.client.containers.get(container_id)
-            container.stop()
+            await self.client.containers.container(container_id).stop()
 
-        except NotFound:
-            raise DockerImageNotFoundError(f"Container {container_id} not found.")
+        except DockerError as e:
+            raise self.docker_error(e, f"Failed to stop container {container_id}")
 
-        except APIError as e:
-            raise DockerInternalError(f"Failed to stop container {container_id}: {e.explanation}")
+    @staticmethod
+    def docker_error(error: DockerError, message: str):
+        if error.status == 404:
+            return DockerImageNotFoundError(f"{message}: container not found.")
+
+        return DockerInternalError(f"{message}: {error.message}")
 
 
 class ContainerInfoService:
-    def __init__(self, client):
+    def __init__(self, client, inventory: ContainerInventory | None = None):
         self.client = client
-        self.restart_attempts = {}
-
-    def list_all_containers(self) -> list[ContainerSchema]:
-        containers = self.client.containers.list(all=True)
-        containers_data = []
-
-        for container in containers:
-            ports = container.attrs["NetworkSettings"]["Ports"]
-            url = "http://localhost"
-            labels = container.labels
-            for port, port_data in ports.items():
-                if port_data:
-                    host_port = port_data[0]["HostPort"]
-                    url = f"http://localhost:{host_port}"
-
-            container_data = ContainerSchema(
-                id=container.id,
-                image=container.image.tags[0] if container.image.tags else "unknown",
-                status=container.status,
-                url=url,
-                labels=labels,
-            )
-            containers_data.append(container_data)
-
-        return containers_data
-
-    def get_container_logs(self, container_id: str) -> ContainerLog:
+        self.inventory = inventory or get_inventory(client)
+
+    def containers_etag(self) -> str:
+        # Every change of the inventory bumps its version, so an unchanged version means an unchanged listing.
+        return f'W/"{self.inventory.epoch}-{self.inventory.version}"'
+
+    def list_containers(
+        self,
+        status: str | None = None,
+        image: str | None = None,
+        label: list[str] | None = None,
+        fields: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[dict], str | None]:
+        labels = {}
+        for item in label or []:
+            key, separator, value = item.partition("=")
+            labels[key] = value if separator else None
+
+        include = None
+        if fields:
+            include = {field.strip() for field in fields.split(",") if field.strip()}
+            unknown = include - ContainerSchema.model_fields.keys()
+            if unknown:
+                raise InvalidQueryError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        page, more = self.inventory.query(status, image, labels, cursor, limit)
+        next_cursor = page[-1].id if more else None
+
+        return [container.model_dump(include=include) for container in page], next_cursor
+
+    async def get_container_logs(self, container_id: str) -> ContainerLog:
         try:
-            container = self.client.containers.get(container_id)
-            raw_logs = container.logs().decode("utf-8")
+            container = self.client.containers.container(container_id)
+            raw_logs = "".join(await container.log(stdout=True, stderr=True, timestamps=True))
 
             if not raw_logs:
                 raise NoLogsFoundError(f"No logs found for container {container_id}.")
 
             log_entries = []
             for line in raw_logs.split("\n"):
-                match = re.match(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}.\d+Z) (.*)", line)
+                timestamp, message = parse_log_line(line)
 
-                if match:
-                    timestamp, message = match.groups()
+                if timestamp:
                     log_entries.append(LogEntry(timestamp=timestamp, message=message))
 
             return ContainerLog(logs=log_entries)
 
-        except NotFound:
-            raise DockerImageNotFoundError(f"Container {container_id} not found.")
+        except DockerError as e:
+            raise ContainerService.docker_error(e, f"Failed to get logs for container {container_id}")
+
+    async def stream_container_logs(
+        self,
+        container_id: str,
+        since: int | None = None,
+        until: int | None = None,
+        tail: str = "all",
+        follow: bool = False,
+        output: str = "ndjson",
+    ) -> AsyncIterator[str]:
+        try:
+            attrs = await self.client.containers.container(container_id).show()
 
-        except APIError as e:
-            raise DockerInternalError(f"Failed to get logs for container {container_id}: {e.explanation}")
+        except DockerError as e:
+            raise ContainerService.docker_error(e, f"Failed to get logs for container {container_id}")
 
-    def get_containers_count(self) -> int:
-        containers = self.client.containers.list(all=True)
+        chunks = self.client.stream_logs(
+            container_id,
+            tty=attrs["Config"]["Tty"],
+            timestamps=True,
+            since=since,
+            until=until,
+            tail=tail,
+            follow=follow,
+        )
 
-        return len(containers)
+        return self.format_log_lines(iter_lines(chunks), output)
 
-    def get_containers_count_by_image(self, image_name: str):
-        containers = self.client.containers.list(all=True)
-        filtered_containers = [c for c in containers if c.attrs["Config"]["Image"] == image_name]
+    @staticmethod
+    async def format_log_lines(lines: AsyncIterator[str], output: str) -> AsyncIterator[str]:
+        async for line in lines:
+            timestamp, message = parse_log_line(line)
 
-        return len(filtered_containers)
+            if output == "text":
+                yield f"{line}\n"
+            else:
+                yield json.dumps({"timestamp": timestamp, "message": message}) + "\n"
 
-    def list_active_containers(self):
-        docker_containers = self.client.containers.list(filters={"status": "running"})
-        containers = []
-
-        for docker_container in docker_containers:
-            port_data = docker_container.attrs["NetworkSettings"]["Ports"].get("80/tcp")
-            url = f"http://localhost:{port_data[0]['HostPort']}" if port_data else "http://localhost"
-            labels = docker_container.labels
-
-            containers.append(
-                Container(
-                    id=docker_container.id,
-                    image=docker_container.image.tags[0] if docker_container.image.tags else "unknown",
-                    status=docker_container.status,
-                    url=url,
-                    labels=labels,
-                )
-            )
-
-        return containers
+    def get_containers_count(self) -> int:
+        return self.inventory.count()
 
-    def get_containers_by_image(self, image_name: str):
-        containers = self.client.containers.list(all=True)
+    def get_containers_count_by_image(self, image_name: str):
+        return self.inventory.count_by_image(image_name)
 
-        return [c for c in containers if c.attrs["Config"]["Image"] == image_name]
+    def list_active_containers(self):
+        return self.inventory.list_by_status("running")
 
-    def restart_failed_containers(self):
-        while True:
-            containers = self.client.containers.list(all=True)
-            for container in containers:
-                try:
-                    container.reload()
-                    state = container.attrs["State"]
-                    status = state["Status"]
-                    exit_code = state.get("ExitCode", 0)
-                    container_id = container.id
-
-                    created_at = datetime.datetime.strptime(
-                        container.attrs["Created"][:-4], "%Y-%m-%dT%H:%M:%S.%f"
-                    ).replace(tzinfo=datetime.timezone.utc)
-
-                    if (datetime.datetime.now(datetime.timezone.utc) - created_at).total_seconds() < 500:  # 5 минут
-                        print(f"Контейнер {container_id} был недавно создан, пропускаем...")
-                        continue
-
-                    if status == "exited" and exit_code != 0:
-                        if self.restart_attempts.get(container_id, 0) >= 3:
-                            print(
-                                f"Контейнер {container_id} достиг лимита перезапусков и требует ручного вмешательства.")
-                            continue
-
-                        print(f"Контейнер {container_id} завершился с ошибкой, перезапускаем...")
-                        container.restart()
-                        self.restart_attempts[container_id] = self.restart_attempts.get(container_id, 0) + 1
-                        print(f"Контейнер {container_id} успешно перезапущен.")
-                    else:
-                        print(f"Контейнер {container_id} в состоянии {status}, пропускаем.")
-                        print(f"код ошибки контейнера {exit_code}")
-                except APIError as e:
-                    print(f"Ошибка при обработке контейнера {container_id}: {e.explanation}")
-                except Exception as e:
-                    print(f"Неожиданная ошибка при обработке контейнера {container_id}: {str(e)}")
-            time.sleep(60)
-
-
-def start_health_check_loop():
-    client = docker.from_env()
-    print("Стартовка цикла проверки состояния контей")
-    container_info_service = ContainerInfoService(client)
-    health_check_thread = threading.Thread(target=container_info_service.restart_failed_containers, daemon=True)
-    health_check_thread.start()
-
-
-start_health_check_loop()
+    def get_containers_by_image(self, image_name: str):
+        return self.inventory.list_by_image(image_name)
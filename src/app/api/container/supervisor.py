@@ -0,0 +1,202 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.inventory import ContainerInventory, get_inventory
+from src.app.api.scale.warm_pool import WarmPool
+from src.app.config import (
+    SUPERVISOR_BACKOFF_BASE,
+    SUPERVISOR_BACKOFF_MAX,
+    SUPERVISOR_CONCURRENCY,
+    SUPERVISOR_HISTORY_SIZE,
+    SUPERVISOR_MAX_RETRIES,
+    SUPERVISOR_RESET_AFTER,
+    SUPERVISOR_RESTART_POLICY,
+)
+from src.app.infrastructure.docker.events import event_action, event_container_id
+from src.app.infrastructure.repository import get_repository
+
+POLICY_LABEL = "supervisor.restart"
+MAX_RETRIES_LABEL = "supervisor.max-retries"
+BACKOFF_LABEL = "supervisor.backoff"
+
+RESTART_POLICIES = {"always", "on-failure", "never"}
+
+
+class RestartSupervisor:
+    def __init__(
+        self,
+        client,
+        inventory: ContainerInventory,
+        warm_pool: WarmPool | None = None,
+        concurrency: int = SUPERVISOR_CONCURRENCY,
+        history_size: int = SUPERVISOR_HISTORY_SIZE,
+    ):
+        self.client = client
+        self.inventory = inventory
+        self.warm_pool = warm_pool
+        self.repository = get_repository()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.history_size = history_size
+        # container id -> {"failures", "last_restart"}, least recently touched containers are evicted first
+        self.states: OrderedDict[str, dict] = OrderedDict()
+        self.history: deque = deque(maxlen=history_size)
+        self.stopping: set[str] = set()
+        self.oom: set[str] = set()
+        self.pending: dict[str, asyncio.Task] = {}
+        self.started = False
+
+    async def start(self):
+        if self.started:
+            return
+
+        self.started = True
+        await self.warm()
+        self.inventory.events.subscribe(self.handle_event)
+
+    async def warm(self):
+        # Attempt counters survive a restart, so a crash-looping container does not get a fresh retry budget.
+        offset = time.monotonic() - time.time()
+        for entry in await self.repository.load_restarts(self.history_size):
+            self.history.append(entry)
+            state = self.state(entry["container_id"])
+            state["failures"] = entry["attempt"]
+            if entry["result"] == "restarted":
+                state["last_restart"] = entry["timestamp"] + offset
+
+    async def stop(self):
+        for task in self.pending.values():
+            task.cancel()
+        self.pending.clear()
+        self.started = False
+
+    async def handle_event(self, event: dict):
+        container_id = event_container_id(event)
+        action = event_action(event)
+
+        if not container_id:
+            return
+
+        # docker stop/kill and our own deletes send kill before die, a crash or an OOM kill does not.
+        if action == "kill":
+            self.stopping.add(container_id)
+
+        elif action == "start":
+            self.stopping.discard(container_id)
+
+        elif action == "oom":
+            self.oom.add(container_id)
+
+        elif action == "die":
+            exit_code = int(event.get("Actor", {}).get("Attributes", {}).get("exitCode", 0) or 0)
+            self.handle_exit(container_id, exit_code)
+
+        elif action == "destroy":
+            self.forget(container_id)
+
+    def handle_exit(self, container_id: str, exit_code: int):
+        stopped = container_id in self.stopping
+        oom = container_id in self.oom
+        self.stopping.discard(container_id)
+        self.oom.discard(container_id)
+
+        if stopped or container_id in self.pending:
+            return
+
+        # Pool members that exit are replaced by the warm pool, claimed ones are ordinary replicas.
+        if self.warm_pool is not None and self.warm_pool.is_warm(container_id):
+            return
+
+        container = self.inventory.get(container_id)
+        labels = (container.labels if container else None) or {}
+        policy = labels.get(POLICY_LABEL, SUPERVISOR_RESTART_POLICY)
+
+        if policy not in RESTART_POLICIES:
+            print(f"Неизвестная политика перезапуска {policy} у контейнера {container_id[:12]}")
+            return
+
+        if policy == "never" or (policy == "on-failure" and exit_code == 0 and not oom):
+            return
+
+        state = self.state(container_id)
+        if state["last_restart"] and time.monotonic() - state["last_restart"] > SUPERVISOR_RESET_AFTER:
+            state["failures"] = 0
+
+        max_retries = int(labels.get(MAX_RETRIES_LABEL, SUPERVISOR_MAX_RETRIES))
+        if state["failures"] >= max_retries:
+            print(f"Контейнер {container_id[:12]} достиг лимита перезапусков и требует ручного вмешательства.")
+            self.record(container_id, exit_code, oom, "gave up", 0)
+            return
+
+        base = float(labels.get(BACKOFF_LABEL, SUPERVISOR_BACKOFF_BASE))
+        delay = min(base * 2 ** state["failures"], SUPERVISOR_BACKOFF_MAX)
+        state["failures"] += 1
+
+        print(f"Контейнер {container_id[:12]} завершился с кодом {exit_code}, перезапуск через {delay:.2f} с")
+        self.pending[container_id] = asyncio.create_task(self.restart(container_id, exit_code, oom, delay))
+
+    def state(self, container_id: str) -> dict:
+        state = self.states.pop(container_id, None) or {"failures": 0, "last_restart": 0.0}
+        self.states[container_id] = state
+        while len(self.states) > self.history_size:
+            self.states.popitem(last=False)
+
+        return state
+
+    def forget(self, container_id: str):
+        self.states.pop(container_id, None)
+        self.stopping.discard(container_id)
+        self.oom.discard(container_id)
+        task = self.pending.pop(container_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def restart(self, container_id: str, exit_code: int, oom: bool, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            async with self.semaphore:
+                await self.client.containers.container(container_id).start()
+
+            self.state(container_id)["last_restart"] = time.monotonic()
+            self.record(container_id, exit_code, oom, "restarted", delay)
+            print(f"Контейнер {container_id[:12]} успешно перезапущен.")
+
+        except DockerError as e:
+            self.record(container_id, exit_code, oom, f"failed: {e.message}", delay)
+            print(f"Ошибка при перезапуске контейнера {container_id[:12]}: {e.message}")
+
+        finally:
+            if self.pending.get(container_id) is asyncio.current_task():
+                del self.pending[container_id]
+
+    def record(self, container_id: str, exit_code: int, oom: bool, result: str, delay: float):
+        entry = {
+            "timestamp": time.time(),
+            "container_id": container_id,
+            "exit_code": exit_code,
+            "oom": oom,
+            "delay": delay,
+            "attempt": self.states.get(container_id, {}).get("failures", 0),
+            "result": result,
+        }
+        self.history.append(entry)
+        self.repository.add_restart(entry)
+
+    def list_restarts(self, container_id: str | None = None) -> list[dict]:
+        return [
+            entry for entry in self.history if container_id is None or entry["container_id"].startswith(container_id)
+        ]
+
+
+restart_supervisor = None
+
+
+def get_restart_supervisor(client, warm_pool: WarmPool | None = None) -> RestartSupervisor:
+    global restart_supervisor
+
+    if restart_supervisor is None:
+        restart_supervisor = RestartSupervisor(client, get_inventory(client), warm_pool)
+
+    return restart_supervisor
@@ -1,36 +1,89 @@
-import docker
+from fastapi import Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from src.app.api.container.service import ContainerService, ContainerInfoService
-from src.app.core.schemas.container import ContainerCreate
+from src.app.config import CONTAINER_PAGE_MAX_SIZE
+from src.app.core.schemas.container import ContainerBatchCreate, ContainerCreate
+from src.app.graph import get_service_graph
 
-client = docker.from_env()
-container_service = ContainerService(client)
-container_info_service = ContainerInfoService(client)
+graph = get_service_graph()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
-def list_containers():
-    return container_info_service.list_all_containers()
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+async def list_containers(
+    request: Request,
+    status: str | None = None,
+    image: str | None = None,
+    label: list[str] = Query([], description="Label key or key=value, repeat for several"),
+    fields: str | None = Query(None, description="Comma separated fields to return"),
+    cursor: str | None = Query(None, description=f"Value of {NEXT_CURSOR_HEADER} from the previous page"),
+    limit: int | None = Query(None, ge=1, le=CONTAINER_PAGE_MAX_SIZE),
+):
+    # Polling clients send the last ETag back and get a 304 without the listing being built.
+    etag = graph.container_info_service.containers_etag()
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    items, next_cursor = graph.container_info_service.list_containers(status, image, label, fields, cursor, limit)
+    headers = {"ETag": etag}
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return JSONResponse(items, headers=headers)
 
 
 async def create_container(container_create: ContainerCreate):
-    container = await container_service.create_container(container_create)
+    container = await graph.container_service.create_container(container_create)
     return container
 
 
-def delete_container(container_id: str):
-    container_service.delete_container(container_id)
+async def create_containers(batch: ContainerBatchCreate):
+    container_create = ContainerCreate(**batch.model_dump(exclude={"count"}))
+    results = await graph.container_service.create_containers(container_create, batch.count)
+    created = sum(1 for result in results if result["container"] is not None)
+
+    return {"requested": batch.count, "created": created, "results": results}
+
+
+async def delete_container(container_id: str):
+    await graph.container_service.delete_container(container_id)
     return {"ok": True}
 
 
-def start_container(container_id: str):
-    container_service.start_container(container_id)
+async def start_container(container_id: str):
+    await graph.container_service.start_container(container_id)
     return {"ok": True}
 
 
-def stop_container(container_id: str):
-    container_service.stop_container(container_id)
+async def stop_container(container_id: str):
+    await graph.container_service.stop_container(container_id)
     return {"ok": True}
 
 
-def get_container_logs(container_id: str):
-    return container_info_service.get_container_logs(container_id)
+async def get_container_logs(container_id: str):
+    return await graph.container_info_service.get_container_logs(container_id)
+
+
+async def stream_container_logs(
+    container_id: str,
+    since: int | None = Query(None, description="Unix timestamp of the first log line"),
+    until: int | None = Query(None, description="Unix timestamp of the last log line"),
+    tail: str = Query("all", pattern=r"^(all|\d+)$"),
+    follow: bool = False,
+    output: str = Query("ndjson", alias="format", pattern="^(ndjson|text)$"),
+):
+    lines = await graph.container_info_service.stream_container_logs(container_id, since, until, tail, follow, output)
+    media_type = "application/x-ndjson" if output == "ndjson" else "text/plain; charset=utf-8"
+    return StreamingResponse(lines, media_type=media_type)
+
+
+async def list_container_restarts(container_id: str | None = Query(None, description="Container id or id prefix")):
+    return graph.restart_supervisor.list_restarts(container_id)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from starlette import status
+
+from src.app.api.feed.views import stream_feed
+
+router = APIRouter()
+
+router.add_api_route(
+    path="/feed",
+    endpoint=stream_feed,
+    methods=["GET"],
+    status_code=status.HTTP_200_OK,
+    response_model=None,
+    responses={200: {"content": {"text/event-stream": {}}}},
+    summary="Stream container changes and metric updates as server-sent events",
+)
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator
+
+from prometheus_client import Counter, Gauge
+
+from src.app.api.container.inventory import ContainerInventory
+from src.app.api.metrics.collector import StatsCollector
+from src.app.config import FEED_HEARTBEAT_INTERVAL, FEED_INTERVAL, FEED_METRICS_INTERVAL, FEED_QUEUE_SIZE
+from src.app.core.schemas.container import Container
+
+FEED_SUBSCRIBERS = Gauge("feed_subscribers", "Clients connected to the live feed")
+FEED_DROPPED = Counter("feed_messages_dropped_total", "Feed messages dropped because a client fell behind")
+
+
+class FeedSubscriber:
+    def __init__(self, image: str | None, labels: dict[str, str | None], queue_size: int):
+        self.image = image
+        self.labels = labels
+        self.filter = (image, tuple(sorted(labels.items())))
+        # Slow clients lose their oldest messages instead of holding memory or blocking the producer.
+        self.queue: deque[str] = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def matches(self, container: Container) -> bool:
+        if self.image is not None and container.image != self.image:
+            return False
+
+        labels = container.labels or {}
+        return all(key in labels and (value is None or labels[key] == value) for key, value in self.labels.items())
+
+    def put(self, message: str):
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+            FEED_DROPPED.inc()
+
+        self.queue.append(message)
+        self.ready.set()
+
+    async def get(self, timeout: float) -> str | None:
+        if not self.queue:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        return self.queue.popleft()
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class LiveFeed:
+    # One producer reads the inventory and the stats collector and fans out to every client. A message is built and
+    # serialized once per distinct filter, so the cost grows with the number of filters rather than of clients.
+    def __init__(
+        self,
+        inventory: ContainerInventory,
+        stats_collector: StatsCollector,
+        interval: float = FEED_INTERVAL,
+        metrics_interval: float = FEED_METRICS_INTERVAL,
+        queue_size: int = FEED_QUEUE_SIZE,
+        heartbeat_interval: float = FEED_HEARTBEAT_INTERVAL,
+    ):
+        self.inventory = inventory
+        self.stats_collector = stats_collector
+        self.interval = interval
+        self.metrics_interval = metrics_interval
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.subscribers: set[FeedSubscriber] = set()
+        self.containers: dict[str, Container] = {}
+        self.version = None
+        self.samples: dict[str, dict] = {}
+        self.last_metrics = 0.0
+        self.task = None
+
+    async def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.subscribers:
+                continue
+
+            try:
+                self.publish_changes()
+                if time.monotonic() - self.last_metrics >= self.metrics_interval:
+                    self.last_metrics = time.monotonic()
+                    self.publish_metrics()
+            except Exception as e:
+                print(f"Ошибка при рассылке обновлений: {e}")
+
+    def publish_changes(self):
+        if self.version == self.inventory.version:
+            return
+
+        self.version = self.inventory.version
+        current = dict(self.inventory.containers)
+        changes = [
+            ("removed", container) for container_id, container in self.containers.items() if container_id not in current
+        ]
+        for container_id, container in current.items():
+            previous = self.containers.get(container_id)
+            if previous is None:
+                changes.append(("added", container))
+            elif previous != container:
+                changes.append(("updated", container))
+        self.containers = current
+
+        for action, container in changes:
+            message = sse("container", {"action": action, "container": container.model_dump()})
+            for subscriber in self.subscribers:
+                if subscriber.matches(container):
+                    subscriber.put(message)
+
+    def publish_metrics(self):
+        # Only samples that arrived since the last round are sent, a client keeps the rest from earlier messages.
+        latest = {}
+        for container_id, container in self.containers.items():
+            sample = self.stats_collector.latest(container_id)
+            if sample is not None and sample is not self.samples.get(container_id):
+                latest[container_id] = (container, sample)
+        self.samples.update({container_id: sample for container_id, (_, sample) in latest.items()})
+        for container_id in [cid for cid in self.samples if cid not in self.containers]:
+            del self.samples[container_id]
+
+        if not latest:
+            return
+
+        messages: dict[tuple, str | None] = {}
+        for subscriber in self.subscribers:
+            if subscriber.filter not in messages:
+                samples = {cid: sample for cid, (container, sample) in latest.items() if subscriber.matches(container)}
+                messages[subscriber.filter] = sse("metrics", samples) if samples else None
+
+            if messages[subscriber.filter] is not None:
+                subscriber.put(messages[subscriber.filter])
+
+    def sync(self):
+        self.version = self.inventory.version
+        self.containers = dict(self.inventory.containers)
+        self.samples = {
+            container_id: sample
+            for container_id in self.containers
+            if (sample := self.stats_collector.latest(container_id)) is not None
+        }
+
+    def snapshot(self, subscriber: FeedSubscriber) -> str:
+        containers = [c for c in self.inventory.all() if subscriber.matches(c)]
+        samples = {c.id: self.stats_collector.latest(c.id) for c in containers}
+
+        return sse(
+            "snapshot",
+            {
+                "containers": [container.model_dump() for container in containers],
+                "metrics": {container_id: sample for container_id, sample in samples.items() if sample is not None},
+            },
+        )
+
+    async def stream(self, image: str | None = None, label: list[str] | None = None) -> AsyncIterator[str]:
+        labels = {}
+        for item in label or []:
+            key, separator, value = item.partition("=")
+            labels[key] = value if separator else None
+
+        # The producer idles without subscribers, the first one starts it from the state its snapshot shows.
+        if not self.subscribers:
+            self.sync()
+
+        subscriber = FeedSubscriber(image, labels, self.queue_size)
+        self.subscribers.add(subscriber)
+        FEED_SUBSCRIBERS.set(len(self.subscribers))
+
+        try:
+            yield self.snapshot(subscriber)
+            while True:
+                message = await subscriber.get(self.heartbeat_interval)
+                # Comments keep proxies from closing an idle stream and let the server notice a gone client.
+                yield message if message is not None else ": keep-alive\n\n"
+
+        finally:
+            self.subscribers.discard(subscriber)
+            FEED_SUBSCRIBERS.set(len(self.subscribers))
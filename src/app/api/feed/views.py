@@ -0,0 +1,18 @@
+from fastapi import Query
+from starlette.responses import StreamingResponse
+
+from src.app.graph import get_service_graph
+
+graph = get_service_graph()
+
+
+async def stream_feed(
+    image: str | None = None,
+    label: list[str] = Query([], description="Label key or key=value, repeat for several"),
+):
+    return StreamingResponse(
+        graph.feed.stream(image, label),
+        media_type="text/event-stream",
+        # Buffering proxies would hold the events back until the stream ends.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
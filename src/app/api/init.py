@@ -1,7 +1,7 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import ValidationError
 
-from src.app.api import balancer, container, metrics, scale
+from src.app.api import balancer, container, feed, logs, metrics, nodes, scale, services
 from src.app.core.handlers.errors import BaseError, DockerImageNotFoundError, DockerInternalError, NoLogsFoundError
 from src.app.core.handlers.handlers import (
     base_error_handler,
@@ -19,6 +19,10 @@ def init_routers(app: FastAPI) -> None:
     app.include_router(metrics, prefix="", tags=["metrics"])
     app.include_router(scale, prefix="", tags=["scale"])
     app.include_router(balancer, prefix="", tags=["balancer"])
+    app.include_router(logs, prefix="", tags=["logs"])
+    app.include_router(services, prefix="", tags=["services"])
+    app.include_router(nodes, prefix="", tags=["nodes"])
+    app.include_router(feed, prefix="", tags=["feed"])
 
     app.add_exception_handler(HTTPException, http_exception_handler)
     app.add_exception_handler(ValidationError, validation_exception_handler)
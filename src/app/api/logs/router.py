@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from starlette import status
+
+from src.app.api.logs.views import query_logs
+from src.app.core.schemas.logs import LogRecord
+
+router = APIRouter()
+
+router.add_api_route(
+    path="/logs",
+    endpoint=query_logs,
+    methods=["GET"],
+    response_model=list[LogRecord],
+    status_code=status.HTTP_200_OK,
+    summary="Query stored container logs by time range, container, image, labels and substring",
+)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.inventory import ContainerInventory
+from src.app.api.container.service import iter_lines, parse_log_line
+from src.app.api.logs.store import NANOSECONDS, LogStore, to_nanoseconds
+from src.app.config import LOG_FLUSH_INTERVAL, LOG_SEGMENT_SECONDS
+from src.app.infrastructure.docker.events import event_action, event_container_id
+
+CAPTURE_ACTIONS = {"start", "restart", "unpause"}
+
+
+class LogCaptureService:
+    def __init__(self, client, inventory: ContainerInventory, store: LogStore | None = None):
+        self.client = client
+        self.inventory = inventory
+        self.store = store or LogStore()
+        self.cursors_path = os.path.join(self.store.root, "cursors.json")
+        self.cursors: dict[str, int] = {}
+        self.cursors_changed = False
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.maintenance_task = None
+
+    async def start(self):
+        if self.maintenance_task is not None:
+            return
+
+        if os.path.exists(self.cursors_path):
+            with open(self.cursors_path) as cursors_file:
+                self.cursors = json.load(cursors_file)
+
+        self.inventory.events.subscribe(self.handle_event)
+        for container in self.inventory.list_by_status("running"):
+            self.capture(container.id)
+
+        self.maintenance_task = asyncio.create_task(self.maintain())
+
+    async def stop(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+
+        if self.maintenance_task is not None:
+            self.maintenance_task.cancel()
+            self.maintenance_task = None
+
+        self.store.close()
+        self.save_cursors()
+
+    async def handle_event(self, event: dict):
+        container_id = event_container_id(event)
+        action = event_action(event)
+        if not container_id:
+            return
+
+        if action in CAPTURE_ACTIONS:
+            self.capture(container_id)
+        elif action == "destroy":
+            self.forget(container_id)
+
+    def forget(self, container_id: str):
+        # A removed container logs nothing more, its cursor would only grow the file.
+        if self.cursors.pop(container_id, None) is not None:
+            self.cursors_changed = True
+
+    def capture(self, container_id: str):
+        if container_id not in self.tasks:
+            self.tasks[container_id] = asyncio.create_task(self.follow(container_id))
+
+    async def follow(self, container_id: str):
+        container = self.inventory.get(container_id)
+        image = container.image if container else "unknown"
+        labels = (container.labels if container else None) or {}
+        cursor = self.cursors.get(container_id, 0)
+        since = f"{cursor // NANOSECONDS}.{cursor % NANOSECONDS:09d}" if cursor else None
+
+        try:
+            attrs = await self.client.containers.container(container_id).show()
+            chunks = self.client.stream_logs(
+                container_id, tty=attrs["Config"]["Tty"], timestamps=True, follow=True, since=since
+            )
+
+            async for line in iter_lines(chunks):
+                timestamp, message = parse_log_line(line)
+                if timestamp is None:
+                    continue
+
+                nanoseconds = to_nanoseconds(timestamp)
+                if nanoseconds <= self.cursors.get(container_id, 0):
+                    continue
+
+                self.cursors[container_id] = nanoseconds
+                self.cursors_changed = True
+                self.store.append(nanoseconds, container_id, image, labels, message)
+
+        except DockerError as e:
+            print(f"Сбор логов контейнера {container_id[:12]} прерван: {e.message}")
+
+        finally:
+            if self.tasks.get(container_id) is asyncio.current_task():
+                del self.tasks[container_id]
+            # Lines read after the destroy event must not bring the cursor back.
+            if self.inventory.get(container_id) is None:
+                self.forget(container_id)
+
+    async def maintain(self):
+        ticks = 0
+        while True:
+            await asyncio.sleep(LOG_FLUSH_INTERVAL)
+            ticks += 1
+            self.store.flush()
+            self.save_cursors()
+
+            if ticks * LOG_FLUSH_INTERVAL >= 60:
+                ticks = 0
+                self.store.close_idle(LOG_SEGMENT_SECONDS / 2)
+                await asyncio.to_thread(self.store.enforce_retention)
+
+    def save_cursors(self):
+        if not self.cursors_changed:
+            return
+
+        with open(self.cursors_path + ".tmp", "w") as cursors_file:
+            json.dump(self.cursors, cursors_file)
+        os.replace(self.cursors_path + ".tmp", self.cursors_path)
+        self.cursors_changed = False
+
+    async def query(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        container_id: str | None = None,
+        image: str | None = None,
+        labels: list[str] | None = None,
+        contains: str | None = None,
+        limit: int = 1000,
+    ) -> list[dict]:
+        label_filters = dict(label.split("=", 1) for label in labels or [] if "=" in label)
+        self.store.flush()
+
+        return await asyncio.to_thread(
+            self.store.query, since, until, container_id, image, label_filters, contains, limit
+        )
@@ -0,0 +1,343 @@
+import calendar
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator
+
+from src.app.config import (
+    LOG_INDEX_INTERVAL,
+    LOG_RETENTION_BYTES,
+    LOG_RETENTION_SECONDS,
+    LOG_SEGMENT_SECONDS,
+    LOG_STORE_PATH,
+)
+
+NANOSECONDS = 1_000_000_000
+
+# offset, end, min timestamp, max timestamp of one block of the segment
+INDEX_ENTRY = struct.Struct("<QQQQ")
+
+
+def to_nanoseconds(timestamp: str) -> int:
+    base, _, fraction = timestamp.rstrip("Z").partition(".")
+    seconds = calendar.timegm(time.strptime(base, "%Y-%m-%dT%H:%M:%S"))
+
+    return seconds * NANOSECONDS + int(fraction[:9].ljust(9, "0") or 0)
+
+
+def to_timestamp(nanoseconds: int) -> str:
+    seconds, fraction = divmod(nanoseconds, NANOSECONDS)
+
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{fraction:09d}Z"
+
+
+class LogSegment:
+    def __init__(self, root: str, start: int):
+        self.start = start
+        self.log_path = os.path.join(root, f"{start}.log")
+        self.index_path = os.path.join(root, f"{start}.idx")
+        self.meta_path = os.path.join(root, f"{start}.meta")
+        self.containers: list[str] = []
+        self.container_numbers: dict[str, int] = {}
+        self.container_meta: dict[str, dict] = {}
+        self.index: list[tuple[int, int, int, int]] = []
+        self.size = 0
+        self.file: BinaryIO | None = None
+        self.index_file: BinaryIO | None = None
+        self.block_start = 0
+        self.block_min = 0
+        self.block_max = 0
+        self.last_write = 0.0
+
+    def load(self):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as meta_file:
+                self.container_meta = json.load(meta_file)["containers"]
+            self.containers = list(self.container_meta)
+            self.container_numbers = {container_id: n for n, container_id in enumerate(self.containers)}
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as index_file:
+                data = index_file.read()
+            complete = len(data) // INDEX_ENTRY.size * INDEX_ENTRY.size
+            self.index = list(INDEX_ENTRY.iter_unpack(data[:complete]))
+
+        self.size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        self.block_start = self.index[-1][1] if self.index else 0
+
+        if self.block_start < self.size:
+            self.reindex_tail()
+
+    def reindex_tail(self):
+        timestamps = [ts for ts, _, _ in self.read_block(self.block_start, self.size)]
+        if timestamps:
+            self.write_index_entry((self.block_start, self.size, min(timestamps), max(timestamps)))
+        self.block_start = self.size
+
+    def append(self, timestamp: int, container_id: str, image: str, labels: dict, message: str):
+        if self.file is None:
+            self.file = open(self.log_path, "ab")
+
+        number = self.container_numbers.get(container_id)
+        if number is None:
+            number = self.register(container_id, image, labels)
+
+        if self.block_start == self.size:
+            self.block_min = self.block_max = timestamp
+
+        line = f"{timestamp}\t{number}\t{message}\n".encode("utf-8", errors="replace")
+        self.file.write(line)
+        self.size += len(line)
+        self.block_min = min(self.block_min, timestamp)
+        self.block_max = max(self.block_max, timestamp)
+        self.last_write = time.monotonic()
+
+        if self.size - self.block_start >= LOG_INDEX_INTERVAL:
+            self.close_block()
+
+    def register(self, container_id: str, image: str, labels: dict) -> int:
+        number = len(self.containers)
+        self.containers.append(container_id)
+        self.container_numbers[container_id] = number
+        self.container_meta[container_id] = {"image": image, "labels": labels}
+
+        with open(self.meta_path + ".tmp", "w") as meta_file:
+            json.dump({"containers": self.container_meta}, meta_file)
+        os.replace(self.meta_path + ".tmp", self.meta_path)
+
+        return number
+
+    def close_block(self):
+        if self.block_start == self.size:
+            return
+
+        self.file.flush()
+        self.write_index_entry((self.block_start, self.size, self.block_min, self.block_max))
+        self.block_start = self.size
+
+    def write_index_entry(self, entry: tuple[int, int, int, int]):
+        if self.index_file is None:
+            self.index_file = open(self.index_path, "ab")
+
+        self.index.append(entry)
+        self.index_file.write(INDEX_ENTRY.pack(*entry))
+        self.index_file.flush()
+
+    def flush(self):
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.close_block()
+            self.file.close()
+            self.file = None
+
+        if self.index_file is not None:
+            self.index_file.close()
+            self.index_file = None
+
+    def blocks(self) -> list[tuple[int, int, int, int]]:
+        blocks = list(self.index)
+        if self.block_start < self.size:
+            blocks.append((self.block_start, self.size, self.block_min, self.block_max))
+
+        return blocks
+
+    def read_block(self, start: int, end: int, contains: bytes | None = None) -> Iterator[tuple[int, int, str]]:
+        try:
+            log_file = open(self.log_path, "rb")
+        except FileNotFoundError:
+            # Retention may delete the segment while a query is still reading it.
+            return
+
+        with log_file:
+            # The writer may still hold part of the block in its buffer, only the flushed part is readable.
+            end = min(end, os.fstat(log_file.fileno()).st_size)
+            if end <= start:
+                return
+
+            with mmap.mmap(log_file.fileno(), end, access=mmap.ACCESS_READ) as data:
+                yield from self.read_lines(data, start, end, contains)
+
+    @staticmethod
+    def read_lines(data: mmap.mmap, start: int, end: int, contains: bytes | None) -> Iterator[tuple[int, int, str]]:
+        if contains and data.find(contains, start, end) == -1:
+            return
+
+        position = start
+        while position < end:
+            line_end = data.find(b"\n", position, end)
+            if line_end == -1:
+                break
+
+            timestamp, number, message = data[position:line_end].split(b"\t", 2)
+            position = line_end + 1
+
+            if contains and contains not in message:
+                continue
+
+            yield int(timestamp), int(number), message.decode("utf-8", errors="replace")
+
+    def snapshot(self) -> tuple[list[str], dict[str, dict], list[tuple[int, int, int, int]]]:
+        return list(self.containers), dict(self.container_meta), self.blocks()
+
+    def query(
+        self, since: int, until: int, container_ids: set[str] | None, contains: bytes | None, snapshot: tuple
+    ) -> Iterator[dict]:
+        containers, container_meta, blocks = snapshot
+        numbers = None
+        if container_ids is not None:
+            numbers = {number for number, container_id in enumerate(containers) if container_id in container_ids}
+            if not numbers:
+                return
+
+        for start, end, block_min, block_max in blocks:
+            if block_max < since or block_min > until:
+                continue
+
+            for timestamp, number, message in self.read_block(start, end, contains):
+                if since <= timestamp <= until and (numbers is None or number in numbers):
+                    container_id = containers[number]
+                    yield {
+                        "timestamp": to_timestamp(timestamp),
+                        "container_id": container_id,
+                        "image": container_meta[container_id]["image"],
+                        "message": message,
+                    }
+
+    def disk_size(self) -> int:
+        paths = (self.log_path, self.index_path, self.meta_path)
+
+        return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+    def delete(self):
+        self.close()
+        for path in (self.log_path, self.index_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+class LogStore:
+    def __init__(
+        self,
+        root: str = LOG_STORE_PATH,
+        segment_seconds: int = LOG_SEGMENT_SECONDS,
+        retention_seconds: float = LOG_RETENTION_SECONDS,
+        retention_bytes: int = LOG_RETENTION_BYTES,
+    ):
+        self.root = root
+        self.segment_seconds = segment_seconds
+        self.retention_seconds = retention_seconds
+        self.retention_bytes = retention_bytes
+        self.segments: dict[int, LogSegment] = {}
+        # Queries and retention run in a worker thread while the capture tasks append on the event loop.
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+        for name in os.listdir(root):
+            if name.endswith(".log") and name[:-4].isdigit():
+                segment = LogSegment(root, int(name[:-4]))
+                segment.load()
+                self.segments[segment.start] = segment
+
+    def segment_for(self, timestamp: int) -> LogSegment:
+        start = timestamp // NANOSECONDS // self.segment_seconds * self.segment_seconds
+        segment = self.segments.get(start)
+
+        if segment is None:
+            segment = LogSegment(self.root, start)
+            self.segments[start] = segment
+
+        return segment
+
+    def append(self, timestamp: int, container_id: str, image: str, labels: dict, message: str):
+        with self.lock:
+            self.segment_for(timestamp).append(timestamp, container_id, image, labels, message)
+
+    def flush(self):
+        with self.lock:
+            for segment in self.segments.values():
+                segment.flush()
+
+    def close_idle(self, idle_seconds: float):
+        now = time.monotonic()
+        with self.lock:
+            for segment in self.segments.values():
+                if segment.file is not None and now - segment.last_write > idle_seconds:
+                    segment.close()
+
+    def close(self):
+        with self.lock:
+            for segment in self.segments.values():
+                segment.close()
+
+    def resolve_containers(self, segment: LogSegment, container_id, image, labels) -> set[str] | None:
+        if container_id is None and image is None and not labels:
+            return None
+
+        selected = set()
+        for candidate, meta in segment.container_meta.items():
+            if container_id is not None and not candidate.startswith(container_id):
+                continue
+            if image is not None and meta["image"] != image:
+                continue
+            if any(meta["labels"].get(key) != value for key, value in labels.items()):
+                continue
+            selected.add(candidate)
+
+        return selected
+
+    def query(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        container_id: str | None = None,
+        image: str | None = None,
+        labels: dict[str, str] | None = None,
+        contains: str | None = None,
+        limit: int = 1000,
+    ) -> list[dict]:
+        since_ns = int(since * NANOSECONDS) if since is not None else 0
+        until_ns = int(until * NANOSECONDS) if until is not None else 2**63
+        first_segment = since_ns // NANOSECONDS // self.segment_seconds * self.segment_seconds
+        needle = contains.encode() if contains else None
+        records = []
+
+        # Only the metadata is read under the lock, the files are scanned without holding up the writers.
+        with self.lock:
+            plan = [
+                (segment, self.resolve_containers(segment, container_id, image, labels or {}), segment.snapshot())
+                for start, segment in sorted(self.segments.items())
+                if first_segment <= start and start * NANOSECONDS <= until_ns
+            ]
+
+        for segment, container_ids, snapshot in plan:
+            for record in segment.query(since_ns, until_ns, container_ids, needle, snapshot):
+                records.append(record)
+                if len(records) >= limit:
+                    return sorted(records, key=lambda r: r["timestamp"])
+
+        return sorted(records, key=lambda r: r["timestamp"])
+
+    def enforce_retention(self):
+        with self.lock:
+            self.delete_expired()
+
+    def delete_expired(self):
+        oldest_allowed = time.time() - self.retention_seconds
+        starts = sorted(self.segments)
+        total_size = sum(self.segments[start].disk_size() for start in starts)
+
+        for start in starts[:-1]:
+            segment = self.segments[start]
+            if start + self.segment_seconds >= oldest_allowed and total_size <= self.retention_bytes:
+                break
+
+            total_size -= segment.disk_size()
+            segment.delete()
+            del self.segments[start]
+            print(f"Сегмент логов {start} удален по политике хранения.")
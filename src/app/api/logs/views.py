@@ -0,0 +1,17 @@
+from fastapi import Query
+
+from src.app.graph import get_service_graph
+
+graph = get_service_graph()
+
+
+async def query_logs(
+    since: float | None = Query(None, description="Unix timestamp of the first log line"),
+    until: float | None = Query(None, description="Unix timestamp of the last log line"),
+    container_id: str | None = Query(None, description="Container id or id prefix"),
+    image: str | None = None,
+    label: list[str] = Query([], description="Label filter in key=value form, may be repeated"),
+    contains: str | None = Query(None, description="Substring the log message must contain"),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    return await graph.log_capture_service.query(since, until, container_id, image, label, contains, limit)
@@ -0,0 +1,115 @@
+import asyncio
+from collections import deque
+from typing import Any, Dict
+
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.inventory import ContainerInventory
+from src.app.api.metrics.service import MetricsService
+from src.app.api.metrics.timeseries import TimeSeriesStore
+from src.app.config import STATS_HISTORY_SIZE
+from src.app.infrastructure.docker.events import event_action, event_container_id
+
+START_ACTIONS = {"start", "unpause", "restart"}
+# kill also reports signals that do not stop the container, an exit always follows with die.
+STOP_ACTIONS = {"die", "stop", "pause"}
+
+
+class StatsCollector:
+    def __init__(self, client, inventory: ContainerInventory, history_size: int = STATS_HISTORY_SIZE):
+        self.client = client
+        self.inventory = inventory
+        self.history_size = history_size
+        self.samples: dict[str, deque] = {}
+        self.raw_stats: dict[str, Dict[str, Any]] = {}
+        self.timeseries = TimeSeriesStore()
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.started = False
+
+    async def start(self):
+        if self.started:
+            return
+
+        self.started = True
+        self.inventory.events.subscribe(self.handle_event)
+        for container in self.inventory.list_by_status("running"):
+            self.watch(container.id)
+
+    async def stop(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+        self.started = False
+
+    async def handle_event(self, event: dict):
+        container_id = event_container_id(event)
+        action = event_action(event)
+
+        if not container_id:
+            return
+
+        if action in START_ACTIONS:
+            self.watch(container_id)
+
+        elif action in STOP_ACTIONS:
+            self.unwatch(container_id)
+
+        elif action == "destroy":
+            self.unwatch(container_id)
+            self.samples.pop(container_id, None)
+            self.raw_stats.pop(container_id, None)
+            self.timeseries.remove(container_id)
+
+    def watch(self, container_id: str):
+        if container_id not in self.tasks:
+            self.tasks[container_id] = asyncio.create_task(self.follow(container_id))
+
+    def unwatch(self, container_id: str):
+        task = self.tasks.pop(container_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def follow(self, container_id: str):
+        container = self.client.containers.container(container_id)
+        try:
+            async for stats in container.stats(stream=True):
+                self.record(container_id, stats)
+
+        except DockerError as e:
+            print(f"Поток статистики контейнера {container_id[:12]} прерван: {e.message}")
+
+        finally:
+            if self.tasks.get(container_id) is asyncio.current_task():
+                del self.tasks[container_id]
+
+    def record(self, container_id: str, stats: Dict[str, Any]):
+        history = self.samples.get(container_id)
+        if history is None:
+            history = self.samples[container_id] = deque(maxlen=self.history_size)
+
+        sample = MetricsService.parse_stats(stats)
+        self.raw_stats[container_id] = stats
+        history.append(sample)
+        self.timeseries.record(container_id, sample)
+
+    def latest(self, container_id: str) -> Dict[str, float] | None:
+        history = self.samples.get(container_id)
+        return history[-1] if history else None
+
+    def latest_raw(self, container_id: str) -> Dict[str, Any] | None:
+        return self.raw_stats.get(container_id)
+
+    def history(self, container_id: str) -> list[Dict[str, float]]:
+        return list(self.samples.get(container_id, ()))
+
+
+stats_collector = None
+
+
+def get_stats_collector(client, inventory: ContainerInventory) -> StatsCollector:
+    global stats_collector
+
+    if stats_collector is None:
+        stats_collector = StatsCollector(client, inventory)
+
+    return stats_collector
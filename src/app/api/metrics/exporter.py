@@ -0,0 +1,154 @@
+import re
+from collections import defaultdict
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+from src.app.api.container.inventory import ContainerInventory
+from src.app.api.container.readiness import ReadinessTracker
+from src.app.api.metrics.collector import StatsCollector
+from src.app.api.services.service import SERVICE_LABEL
+from src.app.config import METRICS_EXPORT_LABELS, METRICS_EXPORT_MAX_CONTAINERS
+
+MAX_LABEL_LENGTH = 128
+
+# (metric name, sample key, scale, help)
+GAUGES = [
+    ("container_cpu_percent", "cpu_percentage", 1, "CPU usage of the container in percent of one core"),
+    ("container_memory_usage_bytes", "memory_usage", 1, "Memory used by the container"),
+    ("container_memory_percent", "memory_percentage", 1, "Memory used by the container in percent of its limit"),
+    ("container_processes", "num_procs", 1, "Processes running in the container"),
+]
+COUNTERS = [
+    ("container_cpu_usage_seconds", "cpu_usage", 1e-9, "CPU time consumed by the container"),
+    ("container_network_receive_bytes", "network_rx", 1, "Bytes received by the container"),
+    ("container_network_transmit_bytes", "network_tx", 1, "Bytes sent by the container"),
+    ("container_blkio_read_bytes", "block_read", 1, "Bytes read from block devices by the container"),
+    ("container_blkio_write_bytes", "block_write", 1, "Bytes written to block devices by the container"),
+]
+SERVICE_SUMS = [
+    ("service_cpu_percent", "cpu_percentage", "CPU usage of all replicas of the service"),
+    ("service_memory_usage_bytes", "memory_usage", "Memory used by all replicas of the service"),
+]
+
+
+def label_name(key: str) -> str:
+    return "label_" + re.sub(r"[^a-zA-Z0-9_]", "_", key)
+
+
+class ContainerMetricsExporter(Collector):
+    def __init__(
+        self,
+        inventory: ContainerInventory,
+        stats_collector: StatsCollector,
+        readiness: ReadinessTracker,
+        label_keys: list[str] = METRICS_EXPORT_LABELS,
+        max_containers: int = METRICS_EXPORT_MAX_CONTAINERS,
+    ):
+        self.inventory = inventory
+        self.stats_collector = stats_collector
+        self.readiness = readiness
+        self.label_keys = label_keys
+        self.label_names = ["id", "image", "node", "service"] + [label_name(key) for key in label_keys]
+        self.max_containers = max_containers
+        # container id -> label values, rebuilt only when the inventory changed since the last scrape
+        self.labels: dict[str, list[str]] = {}
+        self.services: dict[str, str] = {}
+        self.version = None
+        self.dropped = 0
+        self.registered = False
+
+    def register(self):
+        if not self.registered:
+            REGISTRY.register(self)
+            self.registered = True
+
+    def unregister(self):
+        if self.registered:
+            REGISTRY.unregister(self)
+            self.registered = False
+
+    def describe(self):
+        return []
+
+    def refresh_labels(self):
+        if self.version == self.inventory.version:
+            return
+
+        self.version = self.inventory.version
+        running = sorted(self.inventory.list_by_status("running"), key=lambda c: c.id)
+        self.dropped = max(len(running) - self.max_containers, 0)
+        self.services = {c.id: (c.labels or {}).get(SERVICE_LABEL, c.image) for c in running}
+        self.labels = {}
+
+        for container in running[: self.max_containers]:
+            labels = container.labels or {}
+            values = [
+                container.id[:12],
+                container.image,
+                container.node or "",
+                self.services[container.id],
+                *(labels.get(key, "") for key in self.label_keys),
+            ]
+            self.labels[container.id] = [value[:MAX_LABEL_LENGTH] for value in values]
+
+    def collect(self):
+        # Everything comes from the stats streams and the inventory, a scrape never calls Docker.
+        self.refresh_labels()
+
+        gauges = [
+            (GaugeMetricFamily(name, doc, labels=self.label_names), key, scale) for name, key, scale, doc in GAUGES
+        ]
+        counters = [
+            (CounterMetricFamily(name, doc, labels=self.label_names), key, scale) for name, key, scale, doc in COUNTERS
+        ]
+        families = gauges + counters
+        replicas, ready, sums = self.add_samples(families)
+
+        yield from (family for family, _, _ in families)
+        yield from self.service_families(replicas, ready, sums)
+        yield GaugeMetricFamily(
+            "container_metrics_dropped",
+            "Running containers left out of the export by METRICS_EXPORT_MAX_CONTAINERS",
+            value=self.dropped,
+        )
+
+    def add_samples(self, families: list[tuple]) -> tuple[dict, dict, dict]:
+        replicas: dict[str, int] = defaultdict(int)
+        ready: dict[str, int] = defaultdict(int)
+        sums: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+        # Service totals cover every running replica, only the per-container series are capped.
+        for container_id, service in self.services.items():
+            replicas[service] += 1
+            ready[service] += self.readiness.is_ready(container_id)
+
+            sample = self.stats_collector.latest(container_id)
+            if sample is None:
+                continue
+
+            for _, key, _ in SERVICE_SUMS:
+                sums[service][key] += sample[key]
+
+            values = self.labels.get(container_id)
+            if values is not None:
+                for family, key, scale in families:
+                    family.add_metric(values, sample[key] * scale)
+
+        return replicas, ready, sums
+
+    @staticmethod
+    def service_families(replicas: dict, ready: dict, sums: dict):
+        replicas_family = GaugeMetricFamily("service_replicas", "Running replicas of the service", labels=["service"])
+        ready_family = GaugeMetricFamily("service_ready_replicas", "Ready replicas of the service", labels=["service"])
+        for service, count in replicas.items():
+            replicas_family.add_metric([service], count)
+            ready_family.add_metric([service], ready[service])
+        yield replicas_family
+        yield ready_family
+
+        for name, key, doc in SERVICE_SUMS:
+            family = GaugeMetricFamily(name, doc, labels=["service"])
+            for service in replicas:
+                family.add_metric([service], sums[service][key])
+            yield family
@@ -3,10 +3,20 @@ from typing import Any, Dict
 from fastapi import APIRouter, Path
 from starlette import status
 
-from src.app.api.metrics.views import get_container_metrics
+from src.app.api.metrics.views import get_all_container_metrics, get_container_metrics, query_metrics
+from src.app.core.schemas.metrics import BulkContainerMetrics, MetricQueryResult
 
 router = APIRouter()
 
+router.add_api_route(
+    path="/containers/metrics",
+    endpoint=get_all_container_metrics,
+    methods=["GET"],
+    response_model=BulkContainerMetrics,
+    status_code=status.HTTP_200_OK,
+    summary="Get metrics for all running containers or an image/label selection",
+)
+
 router.add_api_route(
     path="/containers/{container_id}/metrics",
     endpoint=get_container_metrics,
@@ -15,3 +25,12 @@ router.add_api_route(
     status_code=status.HTTP_200_OK,
     summary="Get detailed metrics for a specific container",
 )
+
+router.add_api_route(
+    path="/metrics/query",
+    endpoint=query_metrics,
+    methods=["GET"],
+    response_model=MetricQueryResult,
+    status_code=status.HTTP_200_OK,
+    summary="Get windowed avg/max/p50/p95 of a metric per container and across the selection",
+)
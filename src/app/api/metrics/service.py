@@ -1,19 +1,53 @@
-from typing import Any, Dict
+import asyncio
+import time
+from typing import Any, Dict, Iterable
+
+from aiodocker.exceptions import DockerError
+
+from src.app.config import METRICS_BULK_CONCURRENCY, METRICS_BULK_TIMEOUT
 
 
 class MetricsService:
     def __init__(self, client):
         self.client = client
 
-    def get_container_stats(self, container_id: str) -> Dict[str, Any]:
+    async def get_container_stats(self, container_id: str) -> Dict[str, Any]:
         print(f"Получение статистики для ID контейнера: {container_id}")
-        container = self.client.containers.get(container_id)
-        stats = container.stats(stream=False)
+        container = self.client.containers.container(container_id)
+        stats = await container.stats(stream=False)
+
+        return dict(stats[0]) if stats else {}
+
+    async def get_bulk_stats(
+        self,
+        container_ids: Iterable[str],
+        concurrency: int = METRICS_BULK_CONCURRENCY,
+        timeout: float = METRICS_BULK_TIMEOUT,
+    ) -> tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        container_ids = list(container_ids)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(container_id: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await asyncio.wait_for(self.get_container_stats(container_id), timeout)
 
-        return dict(stats)
+        results = await asyncio.gather(*(fetch(container_id) for container_id in container_ids), return_exceptions=True)
+        stats, errors = {}, {}
+
+        for container_id, result in zip(container_ids, results):
+            if isinstance(result, asyncio.TimeoutError):
+                errors[container_id] = f"Статистика не получена за {timeout} с"
+            elif isinstance(result, DockerError):
+                errors[container_id] = result.message
+            elif isinstance(result, BaseException):
+                errors[container_id] = str(result) or type(result).__name__
+            else:
+                stats[container_id] = result
+
+        return stats, errors
 
     @staticmethod
-    def analyze_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    def parse_stats(stats: Dict[str, Any]) -> Dict[str, float]:
         cpu_stats = stats.get("cpu_stats", {})
         precpu_stats = stats.get("precpu_stats", {})
         cpu_usage_stats = cpu_stats.get("cpu_usage", {})
@@ -26,7 +60,7 @@ class MetricsService:
         cpu_delta = cpu_usage_total - precpu_usage_total
         system_cpu_delta = system_cpu_usage - pre_system_cpu_usage
 
-        number_cpus = len(cpu_usage_stats.get("percpu_usage", [0]))
+        number_cpus = cpu_stats.get("online_cpus") or len(cpu_usage_stats.get("percpu_usage") or [0])
 
         cpu_percentage = 0.0
         if cpu_delta > 0 and system_cpu_delta > 0:
@@ -37,30 +71,47 @@ class MetricsService:
         memory_limit = memory_stats.get("limit", 0)
         memory_percentage = (memory_usage / memory_limit) * 100.0 if memory_limit else 0
 
-        networks = stats.get("networks", {})
-        network_data = next(iter(networks.values()), {})
-        network_rx = network_data.get("rx_bytes", 0)
-        network_tx = network_data.get("tx_bytes", 0)
+        network_rx, network_tx = 0, 0
+        for network_data in (stats.get("networks") or {}).values():
+            network_rx += network_data.get("rx_bytes", 0)
+            network_tx += network_data.get("tx_bytes", 0)
 
         blk_read, blk_write = 0, 0
-        for blk_stat in stats.get("blkio_stats", {}).get("io_service_bytes_recursive", []):
-            if blk_stat["op"] == "Read":
+        for blk_stat in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+            if blk_stat["op"] in ("Read", "read"):
                 blk_read += blk_stat.get("value", 0)
-            elif blk_stat["op"] == "Write":
+            elif blk_stat["op"] in ("Write", "write"):
                 blk_write += blk_stat.get("value", 0)
 
         num_procs = stats.get("pids_stats", {}).get("current", 0)
 
-        formatted_stats = {
-            "cpu_usage": f"{cpu_usage_total / 1e9:.2f} GHz",
-            "cpu_percentage": f"{cpu_percentage:.2f}%",
-            "memory_usage": f"{memory_usage / 1e6:.2f} MB",
-            "memory_percentage": f"{memory_percentage:.2f}%",
-            "network_rx": f"{network_rx / 1e6:.2f} MB",
-            "network_tx": f"{network_tx / 1e6:.2f} MB",
-            "block_read": f"{blk_read / 1e6:.2f} MB",
-            "block_write": f"{blk_write / 1e6:.2f} MB",
+        return {
+            "timestamp": time.time(),
+            "cpu_usage": cpu_usage_total,
+            "cpu_percentage": cpu_percentage,
+            "memory_usage": memory_usage,
+            "memory_percentage": memory_percentage,
+            "network_rx": network_rx,
+            "network_tx": network_tx,
+            "block_read": blk_read,
+            "block_write": blk_write,
             "num_procs": num_procs,
         }
 
-        return formatted_stats
+    @staticmethod
+    def format_stats(sample: Dict[str, float]) -> Dict[str, Any]:
+        return {
+            "cpu_usage": f"{sample['cpu_usage'] / 1e9:.2f} GHz",
+            "cpu_percentage": f"{sample['cpu_percentage']:.2f}%",
+            "memory_usage": f"{sample['memory_usage'] / 1e6:.2f} MB",
+            "memory_percentage": f"{sample['memory_percentage']:.2f}%",
+            "network_rx": f"{sample['network_rx'] / 1e6:.2f} MB",
+            "network_tx": f"{sample['network_tx'] / 1e6:.2f} MB",
+            "block_read": f"{sample['block_read'] / 1e6:.2f} MB",
+            "block_write": f"{sample['block_write'] / 1e6:.2f} MB",
+            "num_procs": sample["num_procs"],
+        }
+
+    @classmethod
+    def analyze_stats(cls, stats: Dict[str, Any]) -> Dict[str, Any]:
+        return cls.format_stats(cls.parse_stats(stats))
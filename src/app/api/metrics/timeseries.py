@@ -0,0 +1,150 @@
+import math
+import time
+from array import array
+from typing import Dict, Iterable
+
+from src.app.config import METRICS_TIERS
+
+METRICS = (
+    "cpu_percentage",
+    "memory_usage",
+    "memory_percentage",
+    "network_rx",
+    "network_tx",
+    "block_read",
+    "block_write",
+    "num_procs",
+)
+
+
+class SeriesTier:
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.averages = {metric: array("d", bytes(8 * capacity)) for metric in METRICS}
+        self.maxima = {metric: array("d", bytes(8 * capacity)) for metric in METRICS}
+        self.position = 0
+        self.size = 0
+        self.bucket = -math.inf
+        self.count = 0
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.peaks = dict.fromkeys(METRICS, -math.inf)
+
+    def add(self, timestamp: float, sample: Dict[str, float]):
+        bucket = timestamp // self.resolution * self.resolution
+        if bucket != self.bucket:
+            self.close_bucket()
+            self.bucket = bucket
+
+        self.count += 1
+        for metric in METRICS:
+            value = sample.get(metric, 0.0)
+            self.sums[metric] += value
+            if value > self.peaks[metric]:
+                self.peaks[metric] = value
+
+    def close_bucket(self):
+        if not self.count:
+            return
+
+        self.timestamps[self.position] = self.bucket
+        for metric in METRICS:
+            self.averages[metric][self.position] = self.sums[metric] / self.count
+            self.maxima[metric][self.position] = self.peaks[metric]
+            self.sums[metric] = 0.0
+            self.peaks[metric] = -math.inf
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.count = 0
+
+    def window(self, metric: str, since: float) -> tuple[list[float], list[float]]:
+        averages, maxima = [], []
+        values, peaks = self.averages[metric], self.maxima[metric]
+
+        for offset in range(1, self.size + 1):
+            index = (self.position - offset) % self.capacity
+            if self.timestamps[index] + self.resolution <= since:
+                break
+            averages.append(values[index])
+            maxima.append(peaks[index])
+
+        # The open bucket is not in the ring yet but holds the freshest samples.
+        if self.count and self.bucket + self.resolution > since:
+            averages.append(self.sums[metric] / self.count)
+            maxima.append(self.peaks[metric])
+
+        return averages, maxima
+
+
+class TimeSeriesStore:
+    def __init__(self, tiers: Iterable[tuple[float, int]] = METRICS_TIERS):
+        self.tiers = sorted(tiers)
+        self.series: dict[str, list[SeriesTier]] = {}
+
+    def record(self, container_id: str, sample: Dict[str, float]):
+        tiers = self.series.get(container_id)
+        if tiers is None:
+            tiers = [SeriesTier(resolution, capacity) for resolution, capacity in self.tiers]
+            self.series[container_id] = tiers
+
+        timestamp = sample.get("timestamp") or time.time()
+        for tier in tiers:
+            tier.add(timestamp, sample)
+
+    def remove(self, container_id: str):
+        self.series.pop(container_id, None)
+
+    def tier_index(self, window: float) -> int:
+        for index, (resolution, capacity) in enumerate(self.tiers):
+            if resolution * capacity >= window:
+                return index
+
+        return len(self.tiers) - 1
+
+    def query(self, container_ids: Iterable[str], metric: str, window: float) -> dict:
+        index = self.tier_index(window)
+        since = time.time() - window
+        containers = {}
+        all_averages, all_maxima = [], []
+
+        for container_id in container_ids:
+            tiers = self.series.get(container_id)
+            if tiers is None:
+                continue
+
+            averages, maxima = tiers[index].window(metric, since)
+            if averages:
+                containers[container_id] = self.aggregate(averages, maxima)
+                all_averages.extend(averages)
+                all_maxima.extend(maxima)
+
+        return {
+            "metric": metric,
+            "window": window,
+            "resolution": self.tiers[index][0],
+            "containers": containers,
+            "aggregate": self.aggregate(all_averages, all_maxima) if all_averages else None,
+        }
+
+    def average(self, container_ids: Iterable[str], metric: str, window: float) -> float | None:
+        aggregate = self.query(container_ids, metric, window)["aggregate"]
+
+        return aggregate["avg"] if aggregate else None
+
+    @staticmethod
+    def aggregate(averages: list[float], maxima: list[float]) -> dict:
+        ordered = sorted(averages)
+
+        return {
+            "avg": sum(averages) / len(averages),
+            "max": max(maxima),
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "samples": len(averages),
+        }
+
+
+def percentile(ordered: list[float], rank: float) -> float:
+    return ordered[max(math.ceil(rank / 100 * len(ordered)) - 1, 0)]
@@ -1,8 +1,62 @@
-from fastapi import Path
+from fastapi import Path, Query
 
 from src.app.api.metrics.service import MetricsService
+from src.app.api.metrics.timeseries import METRICS
+from src.app.config import METRICS_QUERY_WINDOW
+from src.app.graph import get_service_graph
+
+graph = get_service_graph()
 
 
 async def get_container_metrics(container_id: str = Path(...)):
-    metrics = MetricsService.get_container_stats(container_id)
+    # The collector is keyed by full id, short ids from the API are resolved first.
+    container_id = graph.inventory.resolve(container_id) or container_id
+    sample = graph.stats_collector.latest(container_id)
+    if sample is not None:
+        return MetricsService.format_stats(sample)
+
+    metrics = await graph.metrics_service.get_container_stats(container_id)
     return MetricsService.analyze_stats(metrics)
+
+
+async def get_all_container_metrics(
+    image: str | None = None,
+    label: list[str] = Query([], description="Label filter in key=value form, may be repeated"),
+):
+    containers = graph.inventory.list_by_image(image) if image else graph.inventory.list_by_status("running")
+    label_filters = dict(item.split("=", 1) for item in label if "=" in item)
+    selected = [
+        c.id
+        for c in containers
+        if c.status == "running" and all((c.labels or {}).get(k) == v for k, v in label_filters.items())
+    ]
+
+    raw_stats = {container_id: graph.stats_collector.latest_raw(container_id) for container_id in selected}
+    missing = [container_id for container_id, stats in raw_stats.items() if stats is None]
+    fetched, errors = await graph.metrics_service.get_bulk_stats(missing)
+    raw_stats.update(fetched)
+
+    return {
+        "containers": {
+            container_id: MetricsService.analyze_stats(stats)
+            for container_id, stats in raw_stats.items()
+            if stats is not None
+        },
+        "errors": errors,
+    }
+
+
+async def query_metrics(
+    metric: str = Query("cpu_percentage", pattern=f"^({'|'.join(METRICS)})$"),
+    window: float = Query(METRICS_QUERY_WINDOW, gt=0, description="Window length in seconds"),
+    container_id: str | None = Query(None, description="Container id or id prefix"),
+    image: str | None = None,
+):
+    if image is not None:
+        containers = graph.inventory.list_by_image(image)
+    else:
+        containers = graph.inventory.all()
+
+    container_ids = [c.id for c in containers if container_id is None or c.id.startswith(container_id)]
+
+    return graph.stats_collector.timeseries.query(container_ids, metric, window)
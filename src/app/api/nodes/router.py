@@ -0,0 +1,25 @@
+from fastapi import APIRouter, status
+
+from src.app.core.schemas.node import NodeInfo
+
+from .views import list_nodes, refresh_nodes
+
+router = APIRouter()
+
+router.add_api_route(
+    path="/nodes",
+    endpoint=list_nodes,
+    methods=["GET"],
+    response_model=list[NodeInfo],
+    status_code=status.HTTP_200_OK,
+    summary="Get the Docker nodes with their capacity and reserved resources",
+)
+
+router.add_api_route(
+    path="/nodes/refresh",
+    endpoint=refresh_nodes,
+    methods=["POST"],
+    response_model=list[NodeInfo],
+    status_code=status.HTTP_200_OK,
+    summary="Re-read the capacity and the health of each node",
+)
@@ -0,0 +1,12 @@
+from src.app.graph import get_service_graph
+
+graph = get_service_graph()
+
+
+async def list_nodes():
+    return graph.client.describe()
+
+
+async def refresh_nodes():
+    await graph.client.refresh()
+    return graph.client.describe()
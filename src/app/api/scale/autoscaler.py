@@ -0,0 +1,218 @@
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from typing import Callable
+
+from prometheus_client import Counter, Gauge
+
+from src.app.api.container.inventory import ContainerInventory
+from src.app.api.metrics.collector import StatsCollector
+from src.app.api.scale.service import ScaleService
+from src.app.config import AUTOSCALE_HISTORY_SIZE, AUTOSCALE_INTERVAL, AUTOSCALE_POLICIES
+from src.app.core.handlers.errors import ScalingPolicyError, ScalingPolicyNotFoundError
+from src.app.core.schemas.autoscale import ScalingPolicy
+from src.app.core.schemas.container import Container, ContainerCreate
+from src.app.infrastructure.repository import get_repository
+
+SCALING_ACTIONS = Counter(
+    "autoscaler_scaling_actions_total", "Scaling actions performed by the autoscaler", ["image", "direction"]
+)
+CURRENT_REPLICAS = Gauge("autoscaler_current_replicas", "Running replicas seen by the autoscaler", ["image"])
+DESIRED_REPLICAS = Gauge("autoscaler_desired_replicas", "Replicas recommended by the autoscaler", ["image"])
+METRIC_VALUE = Gauge("autoscaler_metric_value", "Per-replica value of the tracked metric", ["image", "metric"])
+
+
+class Autoscaler:
+    def __init__(
+        self,
+        inventory: ContainerInventory,
+        stats_collector: StatsCollector,
+        scale_service: ScaleService,
+        request_counts: dict[str, int],
+        pressure: Callable[[str], int],
+        interval: float = AUTOSCALE_INTERVAL,
+        history_size: int = AUTOSCALE_HISTORY_SIZE,
+    ):
+        self.inventory = inventory
+        self.stats_collector = stats_collector
+        self.scale_service = scale_service
+        self.request_counts = request_counts
+        self.pressure = pressure
+        self.interval = interval
+        self.policies: dict[str, ScalingPolicy] = {}
+        self.recommendations: dict[str, deque] = defaultdict(deque)
+        self.last_scaled: dict[str, dict[str, float]] = defaultdict(dict)
+        self.request_marks: dict[str, tuple[float, int]] = {}
+        self.decisions: deque = deque(maxlen=history_size)
+        self.repository = get_repository()
+        self.task = None
+
+        for image, policy in AUTOSCALE_POLICIES.items():
+            self.set_policy(image, ScalingPolicy(**policy))
+
+    async def start(self):
+        if self.task is not None:
+            return
+
+        await self.warm()
+        self.task = asyncio.create_task(self.run())
+
+    async def warm(self):
+        # Cooldowns are restored from the last persisted actions, a restart must not allow an immediate re-scale.
+        offset = time.monotonic() - time.time()
+        for decision in await self.repository.load_scaling_events(self.decisions.maxlen):
+            self.decisions.append(decision)
+            if decision["action"] in ("up", "down"):
+                self.last_scaled[decision["image"]][decision["action"]] = decision["timestamp"] + offset
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def set_policy(self, image: str, policy: ScalingPolicy) -> dict:
+        if policy.min_replicas > policy.max_replicas:
+            raise ScalingPolicyError("min_replicas must not exceed max_replicas")
+
+        self.policies[image] = policy
+        self.recommendations.pop(image, None)
+
+        return {"image": image, **policy.model_dump()}
+
+    def delete_policy(self, image: str):
+        if self.policies.pop(image, None) is None:
+            raise ScalingPolicyNotFoundError(f"No scaling policy for image {image}")
+
+        self.recommendations.pop(image, None)
+        self.request_marks.pop(image, None)
+
+    def list_policies(self) -> dict:
+        return {image: policy.model_dump() for image, policy in self.policies.items()}
+
+    def list_decisions(self, image: str | None = None) -> list[dict]:
+        return [decision for decision in self.decisions if image is None or decision["image"] == image]
+
+    async def run(self):
+        print("Автомасштабирование запущено")
+        while True:
+            await asyncio.gather(*(self.evaluate(image, policy) for image, policy in list(self.policies.items())))
+            await asyncio.sleep(self.interval)
+
+    async def evaluate(self, image: str, policy: ScalingPolicy):
+        try:
+            replicas = [
+                c
+                for c in self.inventory.list_by_image(image)
+                if c.status == "running" and not self.scale_service.warm_pool.is_warm(c.id)
+            ]
+            current = len(replicas)
+            value = self.measure(image, policy, replicas)
+            desired = self.stabilize(image, policy, current, self.recommend(policy, current, value))
+
+            CURRENT_REPLICAS.labels(image).set(current)
+            DESIRED_REPLICAS.labels(image).set(desired)
+            if value is not None:
+                METRIC_VALUE.labels(image, policy.metric).set(value)
+
+            if desired != current:
+                await self.scale(image, policy, current, desired, value)
+
+        except Exception as e:
+            print(f"Ошибка автомасштабирования образа {image}: {e}")
+
+    def measure(self, image: str, policy: ScalingPolicy, replicas: list[Container]) -> float | None:
+        # Requests in flight or queued by the balancer react to a burst before the containers' CPU does.
+        if policy.metric == "in_flight":
+            return self.pressure(image) / max(len(replicas), 1)
+
+        if policy.metric != "request_rate":
+            return self.stats_collector.timeseries.average([c.id for c in replicas], policy.metric, policy.window)
+
+        now = time.monotonic()
+        count = self.request_counts.get(image, 0)
+        previous = self.request_marks.get(image)
+        self.request_marks[image] = (now, count)
+
+        if previous is None or now <= previous[0]:
+            return None
+
+        return (count - previous[1]) / (now - previous[0]) / max(len(replicas), 1)
+
+    @staticmethod
+    def recommend(policy: ScalingPolicy, current: int, value: float | None) -> int:
+        if value is None:
+            desired = current
+        elif current == 0:
+            desired = 1 if value > 0 else 0
+        else:
+            ratio = value / policy.target
+            desired = current if abs(ratio - 1) <= policy.tolerance else math.ceil(current * ratio)
+
+        return min(max(desired, policy.min_replicas), policy.max_replicas)
+
+    def stabilize(self, image: str, policy: ScalingPolicy, current: int, desired: int) -> int:
+        now = time.monotonic()
+        history = self.recommendations[image]
+        history.append((now, desired))
+
+        horizon = max(policy.scale_up_stabilization, policy.scale_down_stabilization)
+        while history and history[0][0] < now - horizon:
+            history.popleft()
+
+        # Scale up to the lowest and down to the highest recommendation seen in the window, so a single spike or
+        # dip does not move the replica count.
+        if desired > current:
+            window = [d for t, d in history if t >= now - policy.scale_up_stabilization]
+            return max(min(window), current)
+
+        if desired < current:
+            window = [d for t, d in history if t >= now - policy.scale_down_stabilization]
+            return min(max(window), current)
+
+        return current
+
+    async def scale(self, image: str, policy: ScalingPolicy, current: int, desired: int, value: float | None):
+        now = time.monotonic()
+        last_scaled = self.last_scaled[image]
+        direction = "up" if desired > current else "down"
+
+        if direction == "up":
+            cooling_down = now - last_scaled.get("up", -math.inf) < policy.scale_up_cooldown
+        else:
+            cooling_down = now - max(last_scaled.values(), default=-math.inf) < policy.scale_down_cooldown
+
+        if cooling_down:
+            self.record(image, policy, value, current, desired, "none", f"scale {direction} cooldown")
+            return
+
+        if direction == "up":
+            step = min(desired - current, policy.max_scale_up_step)
+            create_data = ContainerCreate(image=image, command="", labels={"scale-purpose": "scale-up"}, env={})
+            changed = len(await self.scale_service.scale_up(create_data, step))
+        else:
+            step = min(current - desired, policy.max_scale_down_step)
+            changed = len(await self.scale_service.scale_down(image, step))
+
+        if not changed:
+            self.record(image, policy, value, current, desired, "none", f"no replicas could be scaled {direction}")
+            return
+
+        last_scaled[direction] = time.monotonic()
+        SCALING_ACTIONS.labels(image, direction).inc()
+        self.record(image, policy, value, current, desired, direction, f"{changed} of {step} replicas changed")
+
+    def record(self, image: str, policy: ScalingPolicy, value, current: int, desired: int, action: str, reason: str):
+        print(f"Автомасштабирование {image}: {current} -> {desired} ({action}, {reason})")
+        decision = {
+            "timestamp": time.time(),
+            "image": image,
+            "metric": policy.metric,
+            "value": value,
+            "current_replicas": current,
+            "desired_replicas": desired,
+            "action": action,
+            "reason": reason,
+        }
+        self.decisions.append(decision)
+        self.repository.add_scaling_event(decision)
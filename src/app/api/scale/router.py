@@ -1,6 +1,17 @@
 from fastapi import APIRouter, status
 
-from .views import get_containers_count_by_image, scale_container
+from src.app.core.schemas.autoscale import ScalingDecision
+
+from .views import (
+    delete_scaling_policy,
+    get_containers_count_by_image,
+    list_scaling_decisions,
+    list_scaling_policies,
+    list_warm_pools,
+    scale_container,
+    set_scaling_policy,
+    set_warm_pool_size,
+)
 
 router = APIRouter()
 
@@ -20,3 +31,52 @@ router.add_api_route(
     summary="Get the count of containers for a specific image",
     response_description="The number of containers created from the specified image",
 )
+
+router.add_api_route(
+    path="/autoscaler/policies",
+    endpoint=list_scaling_policies,
+    methods=["GET"],
+    status_code=status.HTTP_200_OK,
+    summary="Get the scaling policy of each image",
+)
+
+router.add_api_route(
+    path="/autoscaler/policies/{image_name}",
+    endpoint=set_scaling_policy,
+    methods=["PUT"],
+    status_code=status.HTTP_200_OK,
+    summary="Create or replace the scaling policy of an image",
+)
+
+router.add_api_route(
+    path="/autoscaler/policies/{image_name}",
+    endpoint=delete_scaling_policy,
+    methods=["DELETE"],
+    status_code=status.HTTP_200_OK,
+    summary="Stop autoscaling an image",
+)
+
+router.add_api_route(
+    path="/autoscaler/decisions",
+    endpoint=list_scaling_decisions,
+    methods=["GET"],
+    response_model=list[ScalingDecision],
+    status_code=status.HTTP_200_OK,
+    summary="Get recent scaling decisions",
+)
+
+router.add_api_route(
+    path="/warm-pool",
+    endpoint=list_warm_pools,
+    methods=["GET"],
+    status_code=status.HTTP_200_OK,
+    summary="Get the configured size and the pre-created containers of each warm pool",
+)
+
+router.add_api_route(
+    path="/warm-pool/{image_name}",
+    endpoint=set_warm_pool_size,
+    methods=["PUT"],
+    status_code=status.HTTP_200_OK,
+    summary="Set how many pre-created containers to keep for an image",
+)
@@ -1,76 +1,88 @@
 import asyncio
-import datetime
 
-from docker.errors import APIError
+from aiodocker.exceptions import DockerError
 
-from src.app.api.container.service import ContainerService, ContainerInfoService
-from src.app.core.schemas.container import ContainerCreate
+from src.app.api.container.service import ContainerInfoService, ContainerService
+from src.app.api.scale.warm_pool import WarmPool, get_warm_pool
+from src.app.core.schemas.container import Container, ContainerCreate
 
 
 class ScaleService:
-    def __init__(self, client):
+    def __init__(
+        self,
+        client,
+        container_service: ContainerService | None = None,
+        container_info_service: ContainerInfoService | None = None,
+        warm_pool: WarmPool | None = None,
+    ):
         self.client = client
-        self.container_service = ContainerService(client)
-        self.container_info_service = ContainerInfoService(client)
+        self.container_service = container_service or ContainerService(client)
+        self.container_info_service = container_info_service or self.container_service.container_info_service
+        self.warm_pool = warm_pool or get_warm_pool(client, self.container_service)
 
-    async def scale_up(self, request: ContainerCreate):
-        print("Масштабирование вверх")
-        await self.container_service.create_container(request)
+    async def scale_up(self, request: ContainerCreate, count: int = 1) -> list[Container]:
+        print(f"Масштабирование вверх на {count}")
+        containers = []
 
-    async def scale_down(self):
-        current_containers = self.container_info_service.list_active_containers()
+        # Warm containers are created from the bare image, so only plain replicas can be taken from the pool.
+        if not request.command and not request.env:
+            claimed = await asyncio.gather(*(self.warm_pool.claim(request.image) for _ in range(count)))
+            containers = [container for container in claimed if container is not None]
 
-        if len(current_containers) <= self.container_service.initial_containers_count:
-            return
+        if len(containers) < count:
+            results = await self.container_service.create_containers(request, count - len(containers))
+            containers.extend(result["container"] for result in results if result["container"] is not None)
 
+        return containers
+
+    async def scale_down(self, image: str, count: int = 1) -> list[str]:
         containers_to_remove = []
 
-        for container in current_containers:
-            docker_container = self.client.containers.get(container.id)
-            created_at_str = docker_container.attrs["Created"]
-            created_at = datetime.datetime.strptime(created_at_str[:-4], "%Y-%m-%dT%H:%M:%S.%f").replace(
-                tzinfo=datetime.timezone.utc
-            )
-            print(f"Контейнер {docker_container.short_id}: время создания {created_at}")
+        for container in reversed(self.container_info_service.get_containers_by_image(image)):
+            container_label_value = (container.labels or {}).get("scale-purpose", None)
+
+            if self.warm_pool.is_warm(container.id):
+                continue
 
-            container_label_value = docker_container.attrs["Config"]["Labels"].get("scale-purpose", None)
+            if container.status == "running" and container_label_value == "scale-up":
+                print(f"Контейнер {container.id[:12]} помечен для удаления.")
+                containers_to_remove.append(container.id)
 
-            if container_label_value == "scale-up":
-                print(f"Контейнер {docker_container.short_id} помечен для удаления.")
-                containers_to_remove.append(docker_container)
+            if len(containers_to_remove) == count:
+                break
 
-            else:
-                print(f"Контейнер {docker_container.short_id} не подходит для удаления.")
+        await asyncio.gather(*(self.remove_container(container_id) for container_id in containers_to_remove))
 
-        for docker_container in containers_to_remove:
-            try:
-                await asyncio.get_running_loop().run_in_executor(None, lambda: docker_container.remove(force=True))
-                print(f"Контейнер {docker_container.short_id} успешно удален.")
-            except APIError as e:
-                print(f"Ошибка при удалении контейнера {docker_container.short_id}: {e}")
+        return containers_to_remove
 
-        self.container_service.update_containers_list()
+    async def remove_container(self, container_id: str):
+        try:
+            await self.client.containers.container(container_id).delete(force=True)
+            print(f"Контейнер {container_id[:12]} успешно удален.")
+        except DockerError as e:
+            print(f"Ошибка при удалении контейнера {container_id[:12]}: {e.message}")
 
-    def scale_container(self, container_id: str, scale_target: int):
-        container = self.client.containers.get(container_id)
-        image_name = container.attrs["Config"]["Image"]
+    async def scale_container(self, container_id: str, scale_target: int):
+        container = await self.client.containers.get(container_id)
+        image_name = container["Config"]["Image"]
         current_containers = self.container_info_service.get_containers_by_image(image_name)
         current_count = len(current_containers)
 
         if current_count < scale_target:
-            self.start_new_containers(image_name, scale_target - current_count)
+            await self.start_new_containers(image_name, scale_target - current_count)
 
         elif current_count > scale_target:
-            self.stop_excess_containers(current_containers, current_count - scale_target)
+            await self.stop_excess_containers(current_containers, current_count - scale_target)
 
         return {"container_id": container_id, "scaled_to": scale_target}
 
-    def start_new_containers(self, image_name: str, count: int):
-        for _ in range(count):
-            self.client.containers.run(image_name, detach=True)
+    async def start_new_containers(self, image_name: str, count: int):
+        await asyncio.gather(*(self.client.containers.run(config={"Image": image_name}) for _ in range(count)))
+
+    async def stop_excess_containers(self, containers: list, count: int):
+        await asyncio.gather(*(self.stop_and_remove(container.id) for container in containers[:count]))
 
-    @staticmethod
-    def stop_excess_containers(containers: list, count: int):
-        for container in containers[:count]:
-            container.stop()
-            container.remove()
+    async def stop_and_remove(self, container_id: str):
+        docker_container = self.client.containers.container(container_id)
+        await docker_container.stop()
+        await docker_container.delete()
@@ -1,22 +1,44 @@
-import docker
+from fastapi import Query
 
-from src.app.api.container.service import ContainerInfoService, ContainerService
-from src.app.api.scale.service import ScaleService
+from src.app.core.schemas.autoscale import ScalingPolicy, WarmPoolSize
 from src.app.core.schemas.container import ContainerCreate
+from src.app.graph import get_service_graph
 
-client = docker.from_env()
-container_info_service = ContainerInfoService(client)
-container_service = ContainerService(client)
-scale_service = ScaleService(client)
+graph = get_service_graph()
 
 
 async def scale_container(container_create: ContainerCreate):
     print(f"Масштабирование контейнера с образом {container_create.image}")
     container_create.labels = {"scale-purpose": "self-scaling"}
-    await container_service.create_container(container_create)
+    await graph.container_service.create_container(container_create)
     return {"message": "Container scaled successfully"}
 
 
 async def get_containers_count_by_image(image_name: str):
-    containers_count = container_info_service.get_containers_count_by_image(image_name)
+    containers_count = graph.container_info_service.get_containers_count_by_image(image_name)
     return {"image_name": image_name, "containers_count": containers_count}
+
+
+async def list_scaling_policies():
+    return graph.autoscaler.list_policies()
+
+
+async def set_scaling_policy(image_name: str, policy: ScalingPolicy):
+    return graph.autoscaler.set_policy(image_name, policy)
+
+
+async def delete_scaling_policy(image_name: str):
+    graph.autoscaler.delete_policy(image_name)
+    return {"message": f"Scaling policy for {image_name} deleted"}
+
+
+async def list_scaling_decisions(image: str | None = Query(None)):
+    return graph.autoscaler.list_decisions(image)
+
+
+async def list_warm_pools():
+    return graph.scale_service.warm_pool.describe()
+
+
+async def set_warm_pool_size(image_name: str, warm_pool_size: WarmPoolSize):
+    return graph.scale_service.warm_pool.set_size(image_name, warm_pool_size.size)
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import re
+import uuid
+from collections import defaultdict
+
+from aiodocker.exceptions import DockerError
+from prometheus_client import Gauge
+
+from src.app.api.container.inventory import ContainerInventory, get_inventory
+from src.app.api.container.service import ContainerService
+from src.app.config import WARM_POOL_REFILL_INTERVAL, WARM_POOL_SIZES, WARM_POOL_STARTED
+from src.app.core.handlers.errors import ContainerNotReadyError
+from src.app.core.schemas.container import Container, ContainerCreate
+from src.app.infrastructure.docker.events import event_action, event_container_id
+
+WARM_LABEL = "warm-pool"
+WARM_PREFIX = "warm-"
+IDLE_STATES = {"created", "running"}
+
+POOL_SIZE = Gauge("warm_pool_containers", "Containers waiting in the warm pool", ["image", "state"])
+
+
+class WarmPool:
+    def __init__(
+        self,
+        client,
+        inventory: ContainerInventory,
+        container_service: ContainerService | None = None,
+        sizes: dict[str, int] = WARM_POOL_SIZES,
+        started: bool = WARM_POOL_STARTED,
+        refill_interval: float = WARM_POOL_REFILL_INTERVAL,
+    ):
+        self.client = client
+        self.inventory = inventory
+        self.container_service = container_service or ContainerService(client)
+        self.sizes = dict(sizes)
+        self.started = started
+        self.refill_interval = refill_interval
+        # image -> container id -> {"name", "state"}, state is one of created, starting, running, exited
+        self.warm: dict[str, dict[str, dict]] = defaultdict(dict)
+        self.members: dict[str, str] = {}
+        self.pending: dict[str, int] = defaultdict(int)
+        # container id -> removal of an exited member, kept so the task is not collected while it runs
+        self.removals: dict[str, asyncio.Task] = {}
+        self.refill_event = asyncio.Event()
+        self.task = None
+
+    def is_warm(self, container_id: str) -> bool:
+        return container_id in self.members
+
+    async def start(self):
+        if self.task is not None:
+            return
+
+        await self.adopt()
+        self.inventory.events.subscribe(self.handle_event)
+        self.refill_event.set()
+        self.task = asyncio.create_task(self.refill_loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+        for task in self.removals.values():
+            task.cancel()
+        self.removals.clear()
+
+    async def adopt(self):
+        containers = await self.client.containers.list(all=True, filters=json.dumps({"label": [WARM_LABEL]}))
+
+        # Claimed containers keep the label but lose the name prefix, so only unclaimed ones come back to the pool.
+        for container in containers:
+            data = container._container
+            name = (data.get("Names") or ["/"])[0].lstrip("/")
+            if name.startswith(WARM_PREFIX):
+                state = "running" if data.get("State") == "running" else "created"
+                self.add(data["Labels"][WARM_LABEL], data["Id"], name, state)
+
+    def add(self, image: str, container_id: str, name: str, state: str):
+        self.warm[image][container_id] = {"name": name, "state": state}
+        self.members[container_id] = image
+        self.update_metrics(image)
+
+    def discard(self, container_id: str) -> dict | None:
+        image = self.members.pop(container_id, None)
+        if image is None:
+            return None
+
+        entry = self.warm[image].pop(container_id, None)
+        self.update_metrics(image)
+        self.refill_event.set()
+
+        return entry
+
+    def update_metrics(self, image: str):
+        entries = self.warm[image].values()
+        for state in ("created", "starting", "running"):
+            POOL_SIZE.labels(image, state).set(sum(1 for entry in entries if entry["state"] == state))
+
+    def set_size(self, image: str, size: int) -> dict:
+        self.sizes[image] = size
+        self.refill_event.set()
+
+        return {"image": image, "size": size}
+
+    def describe(self) -> dict:
+        return {
+            image: {
+                "size": self.sizes.get(image, 0),
+                "containers": {cid: entry["state"] for cid, entry in self.warm[image].items()},
+            }
+            for image in set(self.sizes) | set(self.warm)
+        }
+
+    async def handle_event(self, event: dict):
+        container_id = event_container_id(event)
+        action = event_action(event)
+
+        if not container_id or not self.is_warm(container_id):
+            return
+
+        if action == "destroy":
+            self.discard(container_id)
+
+        # An exited member stays in the pool until it is destroyed, so the restart supervisor also leaves it alone.
+        # The removal runs on its own, event dispatch does not wait for the daemon.
+        elif action == "die" and container_id not in self.removals:
+            print(f"Контейнер {container_id[:12]} выбыл из резерва")
+            image = self.members[container_id]
+            self.warm[image][container_id]["state"] = "exited"
+            self.update_metrics(image)
+            self.removals[container_id] = asyncio.create_task(self.retire(container_id))
+
+    async def retire(self, container_id: str):
+        try:
+            if not await self.remove(container_id):
+                self.discard(container_id)
+        finally:
+            if self.removals.get(container_id) is asyncio.current_task():
+                del self.removals[container_id]
+
+    async def claim(self, image: str) -> Container | None:
+        while True:
+            candidates = [cid for cid, entry in self.warm.get(image, {}).items() if entry["state"] in IDLE_STATES]
+            if not candidates:
+                return None
+
+            container_id = candidates[0]
+            entry = self.warm[image][container_id]
+            self.discard(container_id)
+            docker_container = self.client.containers.container(container_id)
+
+            try:
+                if entry["state"] == "created":
+                    await docker_container.start()
+                await docker_container.rename(entry["name"][len(WARM_PREFIX) :])
+                container = await self.container_service.readiness.wait_ready(container_id)
+
+                print(f"Контейнер {container_id[:12]} взят из резерва образа {image}")
+                return container
+
+            except (DockerError, ContainerNotReadyError) as e:
+                print(f"Не удалось взять контейнер {container_id[:12]} из резерва: {e.message}")
+                await self.remove(container_id)
+
+    async def refill_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.refill_event.wait(), self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self.refill_event.clear()
+            await asyncio.gather(*(self.refill(image, size) for image, size in list(self.sizes.items())))
+
+    async def refill(self, image: str, size: int):
+        missing = size - len(self.warm[image]) - self.pending[image]
+        if missing < 0:
+            excess = [cid for cid, entry in self.warm[image].items() if entry["state"] in IDLE_STATES][:-missing]
+            for container_id in excess:
+                self.discard(container_id)
+            await asyncio.gather(*(self.remove(container_id) for container_id in excess))
+
+        if missing <= 0:
+            return
+
+        self.pending[image] += missing
+        try:
+            await asyncio.gather(*(self.create(image) for _ in range(missing)))
+        finally:
+            self.pending[image] -= missing
+
+    async def create(self, image: str):
+        slug = re.sub(r"[^a-zA-Z0-9_.-]", "-", image)
+        name = f"{WARM_PREFIX}{slug}-{uuid.uuid4().hex[:8]}"
+        container_data = ContainerCreate(
+            image=image, command="", labels={"scale-purpose": "scale-up", WARM_LABEL: image}, env={}
+        )
+
+        try:
+            resolved = await self.container_service.resolve_image(image)
+            config = ContainerService.container_config(container_data, resolved)
+            container = await self.client.containers.create(config=config, name=name)
+
+        except DockerError as e:
+            print(f"Не удалось пополнить резерв образа {image}: {e.message}")
+            return
+
+        # Registered before it starts, so the balancer never sees it running outside the pool.
+        self.add(image, container.id, name, "starting" if self.started else "created")
+        if not self.started:
+            return
+
+        try:
+            await container.start()
+            await self.container_service.readiness.wait_ready(container.id)
+
+        except (DockerError, ContainerNotReadyError) as e:
+            print(f"Не удалось запустить контейнер резерва {container.id[:12]}: {e.message}")
+            self.discard(container.id)
+            await self.remove(container.id)
+            return
+
+        entry = self.warm[image].get(container.id)
+        if entry is not None and entry["state"] == "starting":
+            entry["state"] = "running"
+            self.update_metrics(image)
+
+    async def remove(self, container_id: str) -> bool:
+        try:
+            await self.client.containers.container(container_id).delete(force=True)
+            return True
+        except DockerError as e:
+            print(f"Ошибка при удалении контейнера {container_id[:12]}: {e.message}")
+            return False
+
+
+warm_pool = None
+
+
+def get_warm_pool(client, container_service: ContainerService | None = None) -> WarmPool:
+    global warm_pool
+
+    if warm_pool is None:
+        warm_pool = WarmPool(client, get_inventory(client), container_service)
+
+    return warm_pool
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, status
+
+from src.app.core.schemas.service import ReconcileResult, ServiceStatus
+
+from .views import apply_service, delete_service, get_service, list_services, reconcile_service
+
+router = APIRouter()
+
+router.add_api_route(
+    path="/services",
+    endpoint=list_services,
+    methods=["GET"],
+    response_model=list[ServiceStatus],
+    status_code=status.HTTP_200_OK,
+    summary="Get the desired and the observed state of each service",
+)
+
+router.add_api_route(
+    path="/services/{name}",
+    endpoint=get_service,
+    methods=["GET"],
+    response_model=ServiceStatus,
+    status_code=status.HTTP_200_OK,
+    summary="Get the desired and the observed state of a service",
+)
+
+router.add_api_route(
+    path="/services/{name}",
+    endpoint=apply_service,
+    methods=["PUT"],
+    response_model=ReconcileResult,
+    status_code=status.HTTP_200_OK,
+    summary="Create or update a service and converge its replicas",
+)
+
+router.add_api_route(
+    path="/services/{name}",
+    endpoint=delete_service,
+    methods=["DELETE"],
+    response_model=ReconcileResult,
+    status_code=status.HTTP_200_OK,
+    summary="Remove a service and its replicas",
+)
+
+router.add_api_route(
+    path="/services/{name}/reconcile",
+    endpoint=reconcile_service,
+    methods=["POST"],
+    response_model=ReconcileResult,
+    status_code=status.HTTP_200_OK,
+    summary="Converge the replicas of a service to its definition",
+)
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import defaultdict
+from typing import Any
+
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.service import ContainerService
+from src.app.config import SERVICE_RECONCILE_INTERVAL, SERVICE_REPLACE_BACKOFF_BASE, SERVICE_REPLACE_BACKOFF_MAX
+from src.app.core.handlers.errors import ServiceNotFoundError
+from src.app.core.schemas.container import Container, ContainerCreate
+from src.app.core.schemas.service import ServiceSpec
+from src.app.infrastructure.docker.events import event_action
+from src.app.infrastructure.repository import get_repository
+
+SERVICE_LABEL = "service.name"
+REVISION_LABEL = "service.revision"
+
+ACTIVE_STATUSES = {"created", "running", "restarting", "paused"}
+TRIGGER_ACTIONS = {"die", "destroy", "oom"}
+
+
+class ServiceReconciler:
+    def __init__(
+        self,
+        client,
+        container_service: ContainerService | None = None,
+        interval: float = SERVICE_RECONCILE_INTERVAL,
+        backoff_base: float = SERVICE_REPLACE_BACKOFF_BASE,
+        backoff_max: float = SERVICE_REPLACE_BACKOFF_MAX,
+    ):
+        self.client = client
+        self.container_service = container_service or ContainerService(client)
+        self.inventory = self.container_service.container_info_service.inventory
+        self.readiness = self.container_service.readiness
+        self.repository = get_repository()
+        self.interval = interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # service name -> {"count" of recent replacement rounds, "since" failed replicas were seen, "last" round}
+        self.backoff: dict[str, dict] = defaultdict(lambda: {"count": 0, "since": None, "last": 0.0})
+        self.services: dict[str, ServiceSpec] = {}
+        self.locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.dirty = asyncio.Event()
+        self.task = None
+
+    async def start(self):
+        if self.task is not None:
+            return
+
+        for spec in await self.repository.load_services():
+            self.services[spec.name] = spec
+
+        self.inventory.events.subscribe(self.handle_event)
+        self.dirty.set()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def handle_event(self, event: dict):
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        if event_action(event) in TRIGGER_ACTIONS and attributes.get(SERVICE_LABEL) in self.services:
+            self.dirty.set()
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.dirty.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self.dirty.clear()
+            await self.reconcile_all()
+
+    async def reconcile_all(self) -> list[dict]:
+        return list(await asyncio.gather(*(self.converge(spec) for spec in list(self.services.values()))))
+
+    def get(self, name: str) -> ServiceSpec:
+        spec = self.services.get(name)
+        if spec is None:
+            raise ServiceNotFoundError(f"Сервис {name} не найден")
+
+        return spec
+
+    async def apply(self, spec: ServiceSpec) -> dict:
+        self.services[spec.name] = spec
+        self.repository.save_service(spec)
+
+        return await self.converge(spec)
+
+    async def reconcile(self, name: str) -> dict:
+        return await self.converge(self.get(name))
+
+    async def delete(self, name: str) -> dict:
+        spec = self.get(name)
+        del self.services[name]
+        self.repository.delete_service(name)
+
+        return await self.converge(spec.model_copy(update={"replicas": 0}))
+
+    @staticmethod
+    def revision(spec: ServiceSpec) -> str:
+        template = spec.model_dump(exclude={"name", "replicas"})
+        return hashlib.sha1(json.dumps(template, sort_keys=True).encode()).hexdigest()[:12]
+
+    def containers(self, spec: ServiceSpec) -> list[Container]:
+        return self.inventory.list_by_label(SERVICE_LABEL, spec.name)
+
+    def plan(self, spec: ServiceSpec) -> tuple[int, list[Container], list[Container]]:
+        revision = self.revision(spec)
+        containers = self.containers(spec)
+        active = [c for c in containers if c.status in ACTIVE_STATUSES]
+        failed = [c for c in containers if c.status not in ACTIVE_STATUSES]
+        current = [c for c in active if (c.labels or {}).get(REVISION_LABEL) == revision]
+        outdated = [c for c in active if (c.labels or {}).get(REVISION_LABEL) != revision]
+
+        # Ready replicas are kept first, so excess removal takes the ones that serve no traffic yet.
+        current.sort(key=lambda c: (not self.readiness.is_ready(c.id), c.id))
+
+        return max(spec.replicas - len(current), 0), outdated + current[spec.replicas :], failed
+
+    def defer_replacement(self, name: str, failed: list[Container]) -> bool:
+        # Exited replicas are first left to the restart supervisor. A service that keeps failing waits twice as long
+        # before every further round of replacements, so a crash-looping spec does not churn containers.
+        backoff = self.backoff[name]
+        if not failed:
+            backoff["since"] = None
+            return False
+
+        now = time.monotonic()
+        if now - backoff["last"] > self.backoff_max:
+            backoff["count"] = 0
+        backoff["since"] = backoff["since"] or now
+
+        due = backoff["since"] + min(self.backoff_base * 2 ** backoff["count"], self.backoff_max)
+        if now < due:
+            asyncio.get_running_loop().call_later(due - now, self.dirty.set)
+            return True
+
+        print(f"Сервис {name}: замена {len(failed)} завершившихся реплик")
+        backoff.update(count=backoff["count"] + 1, since=None, last=now)
+        return False
+
+    async def converge(self, spec: ServiceSpec) -> dict:
+        async with self.locks[spec.name]:
+            to_create, to_remove, failed = self.plan(spec)
+            # Exited replicas keep their slots while they wait, a removed service drops them right away.
+            if spec.replicas and self.defer_replacement(spec.name, failed):
+                to_create = max(to_create - len(failed), 0)
+            else:
+                to_remove = failed + to_remove
+
+            result: dict[str, Any] = {
+                "service": spec.name,
+                "created": [],
+                "removed": [],
+                "errors": [],
+                "converged": True,
+            }
+            if not to_create and not to_remove:
+                return result
+
+            print(f"Сервис {spec.name}: создать {to_create}, удалить {len(to_remove)}")
+
+            # New replicas come up before outdated ones are removed, so a changed spec rolls over without a gap.
+            if to_create:
+                container_data = ContainerCreate(
+                    image=spec.image,
+                    command=spec.command,
+                    labels={**spec.labels, SERVICE_LABEL: spec.name, REVISION_LABEL: self.revision(spec)},
+                    env=spec.env,
+                    resources=spec.resources,
+                )
+                for item in await self.container_service.create_containers(container_data, to_create):
+                    if item["container"] is None:
+                        result["errors"].append(item["error"])
+                        continue
+
+                    # The inventory learns about the replica from events later, a reconcile before then must not
+                    # create it twice.
+                    self.inventory.remove(item["container"].id)
+                    self.inventory.add(item["container"])
+                    result["created"].append(item["container"].id)
+
+            removed = await asyncio.gather(*(self.remove(container.id) for container in to_remove))
+            result["removed"] = [container.id for container, ok in zip(to_remove, removed) if ok]
+            result["errors"].extend(f"Не удалось удалить {c.id[:12]}" for c, ok in zip(to_remove, removed) if not ok)
+            result["converged"] = not result["errors"]
+
+            return result
+
+    async def remove(self, container_id: str) -> bool:
+        try:
+            await self.client.containers.container(container_id).delete(force=True)
+
+        except DockerError as e:
+            if e.status != 404:
+                print(f"Ошибка при удалении контейнера {container_id[:12]}: {e.message}")
+                return False
+
+        self.inventory.remove(container_id)
+        return True
+
+    def status(self, spec: ServiceSpec) -> dict:
+        revision = self.revision(spec)
+        containers = [c for c in self.containers(spec) if c.status in ACTIVE_STATUSES]
+        to_create, to_remove, failed = self.plan(spec)
+
+        return {
+            "spec": spec,
+            "revision": revision,
+            "running": sum(1 for c in containers if c.status == "running"),
+            "ready": sum(1 for c in containers if self.readiness.is_ready(c.id)),
+            "outdated": sum(1 for c in containers if (c.labels or {}).get(REVISION_LABEL) != revision),
+            "converged": not to_create and not to_remove and not failed,
+        }
+
+    def list_statuses(self) -> list[dict]:
+        return [self.status(spec) for spec in self.services.values()]
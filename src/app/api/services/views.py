@@ -0,0 +1,24 @@
+from src.app.core.schemas.service import ServiceDefinition, ServiceSpec
+from src.app.graph import get_service_graph
+
+graph = get_service_graph()
+
+
+async def list_services():
+    return graph.service_reconciler.list_statuses()
+
+
+async def get_service(name: str):
+    return graph.service_reconciler.status(graph.service_reconciler.get(name))
+
+
+async def apply_service(name: str, definition: ServiceDefinition):
+    return await graph.service_reconciler.apply(ServiceSpec(name=name, **definition.model_dump()))
+
+
+async def delete_service(name: str):
+    return await graph.service_reconciler.delete(name)
+
+
+async def reconcile_service(name: str):
+    return await graph.service_reconciler.reconcile(name)
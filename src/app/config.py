@@ -1,3 +1,125 @@
+import json
+import os
+
+from dotenv import load_dotenv
+
+# Every setting below reads the environment, so .env is loaded by whichever module imports the config first.
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), ".env"))
+
 DEFAULT_CONTAINER_CONFIG = {
     "image": "app:latest",
 }
+
+INVENTORY_RESYNC_INTERVAL = float(os.getenv("INVENTORY_RESYNC_INTERVAL", 300))
+
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", 5))
+
+DOCKER_HOST = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
+DOCKER_POOL_SIZE = int(os.getenv("DOCKER_POOL_SIZE", 100))
+DOCKER_KEEPALIVE_TIMEOUT = float(os.getenv("DOCKER_KEEPALIVE_TIMEOUT", 30))
+DOCKER_CONNECT_TIMEOUT = float(os.getenv("DOCKER_CONNECT_TIMEOUT", 5))
+# {"node-1": {"url": "tcp://10.0.0.1:2375", "address": "10.0.0.1", "labels": {"zone": "a"}}}, empty means DOCKER_HOST
+DOCKER_NODES = json.loads(os.getenv("DOCKER_NODES", "{}"))
+NODE_REFRESH_INTERVAL = float(os.getenv("NODE_REFRESH_INTERVAL", 30))
+PLACEMENT_STRATEGY = os.getenv("PLACEMENT_STRATEGY", "spread")
+
+STATS_HISTORY_SIZE = int(os.getenv("STATS_HISTORY_SIZE", 60))
+
+BALANCER_STRATEGY = os.getenv("BALANCER_STRATEGY", "least_cpu")
+BALANCER_STRATEGIES = json.loads(os.getenv("BALANCER_STRATEGIES", "{}"))
+BALANCER_SERVICE_HEADER = os.getenv("BALANCER_SERVICE_HEADER", "X-Service")
+BALANCER_HASH_HEADER = os.getenv("BALANCER_HASH_HEADER", "X-Session-Key")
+BALANCER_EWMA_DECAY = float(os.getenv("BALANCER_EWMA_DECAY", 0.8))
+BALANCER_HASH_REPLICAS = int(os.getenv("BALANCER_HASH_REPLICAS", 100))
+BALANCER_OUTLIER_WINDOW = float(os.getenv("BALANCER_OUTLIER_WINDOW", 30))
+BALANCER_OUTLIER_MIN_REQUESTS = int(os.getenv("BALANCER_OUTLIER_MIN_REQUESTS", 10))
+BALANCER_OUTLIER_ERROR_RATE = float(os.getenv("BALANCER_OUTLIER_ERROR_RATE", 0.5))
+BALANCER_OUTLIER_CONSECUTIVE_FAILURES = int(os.getenv("BALANCER_OUTLIER_CONSECUTIVE_FAILURES", 5))
+BALANCER_OUTLIER_LATENCY_FACTOR = float(os.getenv("BALANCER_OUTLIER_LATENCY_FACTOR", 5))
+BALANCER_EJECTION_TIME = float(os.getenv("BALANCER_EJECTION_TIME", 10))
+BALANCER_MAX_EJECTION_TIME = float(os.getenv("BALANCER_MAX_EJECTION_TIME", 300))
+# In-flight limits per backend and per image given in the service header, 0 means unlimited
+BALANCER_MAX_IN_FLIGHT = int(os.getenv("BALANCER_MAX_IN_FLIGHT", 100))
+BALANCER_SERVICE_MAX_IN_FLIGHT = json.loads(os.getenv("BALANCER_SERVICE_MAX_IN_FLIGHT", "{}"))
+BALANCER_QUEUE_SIZE = int(os.getenv("BALANCER_QUEUE_SIZE", 100))
+BALANCER_QUEUE_TIMEOUT = float(os.getenv("BALANCER_QUEUE_TIMEOUT", 5))
+BALANCER_RETRY_AFTER = int(os.getenv("BALANCER_RETRY_AFTER", 1))
+
+PROXY_MAX_CONNECTIONS = int(os.getenv("PROXY_MAX_CONNECTIONS", 100))
+PROXY_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("PROXY_MAX_KEEPALIVE_CONNECTIONS", 20))
+PROXY_KEEPALIVE_EXPIRY = float(os.getenv("PROXY_KEEPALIVE_EXPIRY", 30))
+PROXY_TIMEOUT = float(os.getenv("PROXY_TIMEOUT", 30))
+PROXY_CONNECT_TIMEOUT = float(os.getenv("PROXY_CONNECT_TIMEOUT", 5))
+PROXY_RETRIES = int(os.getenv("PROXY_RETRIES", 2))
+
+PROXY_CACHE_ENABLED = os.getenv("PROXY_CACHE_ENABLED", "false").lower() == "true"
+PROXY_CACHE_MAX_BYTES = int(os.getenv("PROXY_CACHE_MAX_BYTES", 64 * 1024**2))
+PROXY_CACHE_MAX_ENTRY_BYTES = int(os.getenv("PROXY_CACHE_MAX_ENTRY_BYTES", 1024**2))
+PROXY_CACHE_DEFAULT_TTL = float(os.getenv("PROXY_CACHE_DEFAULT_TTL", 0))
+PROXY_CACHE_ROUTE_TTLS = json.loads(os.getenv("PROXY_CACHE_ROUTE_TTLS", "{}"))
+
+LOG_STORE_PATH = os.getenv("LOG_STORE_PATH", "data/logs")
+LOG_SEGMENT_SECONDS = int(os.getenv("LOG_SEGMENT_SECONDS", 3600))
+LOG_INDEX_INTERVAL = int(os.getenv("LOG_INDEX_INTERVAL", 64 * 1024))
+LOG_RETENTION_SECONDS = float(os.getenv("LOG_RETENTION_SECONDS", 7 * 24 * 3600))
+LOG_RETENTION_BYTES = int(os.getenv("LOG_RETENTION_BYTES", 1024**3))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1))
+
+# resolution in seconds : number of buckets kept, from the finest to the coarsest tier
+METRICS_TIERS = [
+    (float(tier.split(":")[0]), int(tier.split(":")[1]))
+    for tier in os.getenv("METRICS_TIERS", "1:600,10:360,60:1440").split(",")
+]
+METRICS_QUERY_WINDOW = float(os.getenv("METRICS_QUERY_WINDOW", 60))
+METRICS_BULK_CONCURRENCY = int(os.getenv("METRICS_BULK_CONCURRENCY", 20))
+METRICS_BULK_TIMEOUT = float(os.getenv("METRICS_BULK_TIMEOUT", 5))
+# Container label keys exported as Prometheus labels, every key multiplies the possible series
+METRICS_EXPORT_LABELS = [key for key in os.getenv("METRICS_EXPORT_LABELS", "").split(",") if key]
+METRICS_EXPORT_MAX_CONTAINERS = int(os.getenv("METRICS_EXPORT_MAX_CONTAINERS", 1000))
+
+FEED_INTERVAL = float(os.getenv("FEED_INTERVAL", 1))
+FEED_METRICS_INTERVAL = float(os.getenv("FEED_METRICS_INTERVAL", 5))
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", 100))
+FEED_HEARTBEAT_INTERVAL = float(os.getenv("FEED_HEARTBEAT_INTERVAL", 15))
+
+AUTOSCALE_INTERVAL = float(os.getenv("AUTOSCALE_INTERVAL", 10))
+AUTOSCALE_HISTORY_SIZE = int(os.getenv("AUTOSCALE_HISTORY_SIZE", 200))
+AUTOSCALE_POLICIES = json.loads(
+    os.getenv("AUTOSCALE_POLICIES", '{"app:latest": {"metric": "cpu_percentage", "target": 45, "max_replicas": 10}}')
+)
+
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", 300))
+CONTAINER_BATCH_CONCURRENCY = int(os.getenv("CONTAINER_BATCH_CONCURRENCY", 8))
+CONTAINER_BATCH_MAX_SIZE = int(os.getenv("CONTAINER_BATCH_MAX_SIZE", 100))
+CONTAINER_PAGE_MAX_SIZE = int(os.getenv("CONTAINER_PAGE_MAX_SIZE", 1000))
+
+WARM_POOL_SIZES = json.loads(os.getenv("WARM_POOL_SIZES", "{}"))
+WARM_POOL_STARTED = os.getenv("WARM_POOL_STARTED", "true").lower() == "true"
+WARM_POOL_REFILL_INTERVAL = float(os.getenv("WARM_POOL_REFILL_INTERVAL", 5))
+
+READINESS_PROBE = os.getenv("READINESS_PROBE", "tcp")
+READINESS_HTTP_PATH = os.getenv("READINESS_HTTP_PATH", "/")
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT", 30))
+READINESS_PROBE_TIMEOUT = float(os.getenv("READINESS_PROBE_TIMEOUT", 1))
+READINESS_BACKOFF_MIN = float(os.getenv("READINESS_BACKOFF_MIN", 0.01))
+READINESS_BACKOFF_MAX = float(os.getenv("READINESS_BACKOFF_MAX", 0.5))
+READINESS_RECHECK_MAX = float(os.getenv("READINESS_RECHECK_MAX", 600))
+
+SUPERVISOR_RESTART_POLICY = os.getenv("SUPERVISOR_RESTART_POLICY", "on-failure")
+SUPERVISOR_MAX_RETRIES = int(os.getenv("SUPERVISOR_MAX_RETRIES", 3))
+SUPERVISOR_BACKOFF_BASE = float(os.getenv("SUPERVISOR_BACKOFF_BASE", 0.5))
+SUPERVISOR_BACKOFF_MAX = float(os.getenv("SUPERVISOR_BACKOFF_MAX", 60))
+SUPERVISOR_RESET_AFTER = float(os.getenv("SUPERVISOR_RESET_AFTER", 300))
+SUPERVISOR_CONCURRENCY = int(os.getenv("SUPERVISOR_CONCURRENCY", 10))
+SUPERVISOR_HISTORY_SIZE = int(os.getenv("SUPERVISOR_HISTORY_SIZE", 1000))
+
+SERVICE_RECONCILE_INTERVAL = float(os.getenv("SERVICE_RECONCILE_INTERVAL", 15))
+SERVICE_REPLACE_BACKOFF_BASE = float(os.getenv("SERVICE_REPLACE_BACKOFF_BASE", 10))
+SERVICE_REPLACE_BACKOFF_MAX = float(os.getenv("SERVICE_REPLACE_BACKOFF_MAX", 300))
+
+REPOSITORY_URL = os.getenv("REPOSITORY_URL", "sqlite:///data/state.db")
+REPOSITORY_FLUSH_INTERVAL = float(os.getenv("REPOSITORY_FLUSH_INTERVAL", 1))
+REPOSITORY_BATCH_SIZE = int(os.getenv("REPOSITORY_BATCH_SIZE", 500))
+REPOSITORY_MAX_PENDING = int(os.getenv("REPOSITORY_MAX_PENDING", 10000))
+REPOSITORY_RETENTION = float(os.getenv("REPOSITORY_RETENTION", 7 * 24 * 3600))
+REPOSITORY_POOL_SIZE = int(os.getenv("REPOSITORY_POOL_SIZE", 5))
@@ -1,4 +1,5 @@
 class BaseError(Exception):
+    headers: dict[str, str] | None = None
 
     def __init__(self, message: str, status_code: int = 400):
         self.message = message
@@ -21,3 +22,49 @@ class DockerInternalError(BaseError):
 class NoLogsFoundError(BaseError):
     def __init__(self, message: str = "No logs found"):
         super().__init__(message, status_code=404)
+
+
+class BalancerStrategyNotFoundError(BaseError):
+    def __init__(self, message: str = "Balancing strategy not found"):
+        super().__init__(message, status_code=400)
+
+
+class NoBackendsAvailableError(BaseError):
+    def __init__(self, message: str = "No containers available"):
+        super().__init__(message, status_code=503)
+
+
+class BalancerOverloadedError(BaseError):
+    def __init__(self, retry_after: int, message: str = "Too many requests in flight, try again later"):
+        super().__init__(message, status_code=503)
+        self.headers = {"Retry-After": str(retry_after)}
+
+
+class BackendRequestError(BaseError):
+    def __init__(self, message: str = "Error while proxying request to container"):
+        super().__init__(message, status_code=502)
+
+
+class ScalingPolicyError(BaseError):
+    def __init__(self, message: str = "Invalid scaling policy"):
+        super().__init__(message, status_code=400)
+
+
+class ScalingPolicyNotFoundError(BaseError):
+    def __init__(self, message: str = "Scaling policy not found"):
+        super().__init__(message, status_code=404)
+
+
+class ContainerNotReadyError(BaseError):
+    def __init__(self, message: str = "Container did not become ready"):
+        super().__init__(message, status_code=504)
+
+
+class ServiceNotFoundError(BaseError):
+    def __init__(self, message: str = "Service not found"):
+        super().__init__(message, status_code=404)
+
+
+class InvalidQueryError(BaseError):
+    def __init__(self, message: str = "Invalid query"):
+        super().__init__(message, status_code=400)
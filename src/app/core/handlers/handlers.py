@@ -23,6 +23,7 @@ async def base_error_handler(request: Request, exc: BaseError):
     return JSONResponse(
         status_code=exc.status_code,
         content={"message": exc.message},
+        headers=exc.headers,
     )
 
 
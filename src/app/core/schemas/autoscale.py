@@ -0,0 +1,35 @@
+from typing import Optional
+
+from pydantic import Field
+
+from src.app.core.schemas.base import CommonBaseModel
+
+
+class ScalingPolicy(CommonBaseModel):
+    metric: str = Field("cpu_percentage", pattern="^(cpu_percentage|memory_percentage|request_rate|in_flight)$")
+    target: float = Field(..., gt=0)
+    min_replicas: int = Field(1, ge=0)
+    max_replicas: int = Field(10, ge=1)
+    tolerance: float = Field(0.1, ge=0)
+    window: float = Field(60, gt=0)
+    scale_up_stabilization: float = Field(0, ge=0)
+    scale_down_stabilization: float = Field(300, ge=0)
+    scale_up_cooldown: float = Field(30, ge=0)
+    scale_down_cooldown: float = Field(120, ge=0)
+    max_scale_up_step: int = Field(4, ge=1)
+    max_scale_down_step: int = Field(1, ge=1)
+
+
+class ScalingDecision(CommonBaseModel):
+    timestamp: float
+    image: str
+    metric: str
+    value: Optional[float] = None
+    current_replicas: int
+    desired_replicas: int
+    action: str
+    reason: str
+
+
+class WarmPoolSize(CommonBaseModel):
+    size: int = Field(..., ge=0)
@@ -0,0 +1,5 @@
+from src.app.core.schemas.base import CommonBaseModel
+
+
+class BalancerStrategy(CommonBaseModel):
+    strategy: str
@@ -2,6 +2,7 @@ from typing import Dict, Optional
 
 from pydantic import Field
 
+from src.app.config import CONTAINER_BATCH_MAX_SIZE
 from src.app.core.schemas.base import CommonBaseModel
 
 
@@ -11,14 +12,37 @@ class ContainerBase(CommonBaseModel):
     labels: Optional[Dict[str, str]] = Field(default_factory=dict)
 
 
+class ContainerResources(CommonBaseModel):
+    cpus: Optional[float] = Field(None, gt=0)
+    memory: Optional[int] = Field(None, gt=0, description="Memory limit in bytes")
+
+
 class ContainerCreate(ContainerBase):
     env: Optional[Dict[str, str]] = {}
+    resources: Optional[ContainerResources] = None
 
 
 class Container(ContainerBase):
     id: str
     status: str
     url: str
+    node: Optional[str] = None
+
+
+class ContainerBatchCreate(ContainerCreate):
+    count: int = Field(..., ge=1, le=CONTAINER_BATCH_MAX_SIZE)
+
+
+class ContainerBatchItem(CommonBaseModel):
+    index: int
+    container: Optional[Container] = None
+    error: Optional[str] = None
+
+
+class ContainerBatchResult(CommonBaseModel):
+    requested: int
+    created: int
+    results: list[ContainerBatchItem]
 
 
 class ServiceScale(CommonBaseModel):
@@ -38,3 +62,13 @@ class ContainerLog(CommonBaseModel):
 class ScaleRequest(CommonBaseModel):
     container_id: str
     scale_target: int
+
+
+class ContainerRestart(CommonBaseModel):
+    timestamp: float
+    container_id: str
+    exit_code: int
+    oom: bool
+    delay: float
+    attempt: int
+    result: str
@@ -0,0 +1,8 @@
+from src.app.core.schemas.base import CommonBaseModel
+
+
+class LogRecord(CommonBaseModel):
+    timestamp: str
+    container_id: str
+    image: str
+    message: str
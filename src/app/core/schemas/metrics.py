@@ -0,0 +1,24 @@
+from typing import Any, Dict, Optional
+
+from src.app.core.schemas.base import CommonBaseModel
+
+
+class MetricAggregate(CommonBaseModel):
+    avg: float
+    max: float
+    p50: float
+    p95: float
+    samples: int
+
+
+class MetricQueryResult(CommonBaseModel):
+    metric: str
+    window: float
+    resolution: float
+    containers: Dict[str, MetricAggregate]
+    aggregate: Optional[MetricAggregate] = None
+
+
+class BulkContainerMetrics(CommonBaseModel):
+    containers: Dict[str, Dict[str, Any]]
+    errors: Dict[str, str]
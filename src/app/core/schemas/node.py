@@ -0,0 +1,17 @@
+from typing import Dict, Optional
+
+from src.app.core.schemas.base import CommonBaseModel
+
+
+class NodeInfo(CommonBaseModel):
+    name: str
+    url: str
+    address: str
+    labels: Dict[str, str]
+    healthy: bool
+    error: Optional[str] = None
+    cpus: int
+    memory: int
+    reserved_cpus: float
+    reserved_memory: int
+    containers: int
@@ -0,0 +1,36 @@
+from typing import Dict, Optional
+
+from pydantic import Field
+
+from src.app.core.schemas.base import CommonBaseModel
+from src.app.core.schemas.container import ContainerResources
+
+
+class ServiceDefinition(CommonBaseModel):
+    image: str
+    replicas: int = Field(1, ge=0)
+    command: Optional[str] = None
+    labels: Dict[str, str] = Field(default_factory=dict)
+    env: Dict[str, str] = Field(default_factory=dict)
+    resources: Optional[ContainerResources] = None
+
+
+class ServiceSpec(ServiceDefinition):
+    name: str
+
+
+class ServiceStatus(CommonBaseModel):
+    spec: ServiceSpec
+    revision: str
+    running: int
+    ready: int
+    outdated: int
+    converged: bool
+
+
+class ReconcileResult(CommonBaseModel):
+    service: str
+    created: list[str]
+    removed: list[str]
+    errors: list[str]
+    converged: bool
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from functools import cached_property
+
+from fastapi import FastAPI
+from prometheus_client import Gauge
+
+from src.app.config import STARTUP_BUDGET
+
+STARTUP_DURATION = Gauge("startup_duration_seconds", "Time spent starting each component", ["stage"])
+
+
+class ServiceGraph:
+    # Every component is imported and built on first access and shared by all routes and background loops
+    # afterwards. The views import this module, so the imports stay local to keep the api package out of the cycle.
+    def __init__(self, budget: float = STARTUP_BUDGET):
+        self.budget = budget
+        self.timings: dict[str, float] = {}
+
+    @cached_property
+    def client(self):
+        from src.app.infrastructure.docker.client import get_docker_client
+
+        return get_docker_client()
+
+    @cached_property
+    def repository(self):
+        from src.app.infrastructure.repository import get_repository
+
+        return get_repository()
+
+    @cached_property
+    def inventory(self):
+        from src.app.api.container.inventory import get_inventory
+
+        return get_inventory(self.client)
+
+    @cached_property
+    def stats_collector(self):
+        from src.app.api.metrics.collector import get_stats_collector
+
+        return get_stats_collector(self.client, self.inventory)
+
+    @cached_property
+    def container_info_service(self):
+        from src.app.api.container.service import ContainerInfoService
+
+        return ContainerInfoService(self.client, self.inventory)
+
+    @cached_property
+    def container_service(self):
+        from src.app.api.container.service import ContainerService
+
+        return ContainerService(self.client, self.container_info_service)
+
+    @cached_property
+    def metrics_service(self):
+        from src.app.api.metrics.service import MetricsService
+
+        return MetricsService(self.client)
+
+    @cached_property
+    def warm_pool(self):
+        from src.app.api.scale.warm_pool import get_warm_pool
+
+        return get_warm_pool(self.client, self.container_service)
+
+    @cached_property
+    def scale_service(self):
+        from src.app.api.scale.service import ScaleService
+
+        return ScaleService(self.client, self.container_service, self.container_info_service, self.warm_pool)
+
+    @cached_property
+    def load_balancer(self):
+        from src.app.api.balancer.service import LoadBalancer
+
+        return LoadBalancer(self.client, self.scale_service, self.metrics_service)
+
+    @cached_property
+    def autoscaler(self):
+        return self.load_balancer.autoscaler
+
+    @cached_property
+    def metrics_exporter(self):
+        from src.app.api.metrics.exporter import ContainerMetricsExporter
+
+        return ContainerMetricsExporter(self.inventory, self.stats_collector, self.load_balancer.readiness)
+
+    @cached_property
+    def restart_supervisor(self):
+        from src.app.api.container.supervisor import get_restart_supervisor
+
+        return get_restart_supervisor(self.client, self.warm_pool)
+
+    @cached_property
+    def log_capture_service(self):
+        from src.app.api.logs.service import LogCaptureService
+
+        return LogCaptureService(self.client, self.inventory)
+
+    @cached_property
+    def service_reconciler(self):
+        from src.app.api.services.service import ServiceReconciler
+
+        return ServiceReconciler(self.client, self.container_service)
+
+    @cached_property
+    def feed(self):
+        from src.app.api.feed.service import LiveFeed
+
+        return LiveFeed(self.inventory, self.stats_collector)
+
+    def record(self, stage: str, duration: float):
+        self.timings[stage] = duration
+        STARTUP_DURATION.labels(stage).set(duration)
+
+    async def measure(self, stage: str, start):
+        started = time.perf_counter()
+        await start()
+        self.record(stage, time.perf_counter() - started)
+
+    async def start(self):
+        started = time.perf_counter()
+
+        await self.measure("repository", self.repository.start)
+        await self.measure("nodes", self.client.start)
+        await self.measure("load_balancer", self.load_balancer.start)
+        self.metrics_exporter.register()
+        # These only need the inventory, which the load balancer has started.
+        await asyncio.gather(
+            self.measure("log_capture", self.log_capture_service.start),
+            self.measure("restart_supervisor", self.restart_supervisor.start),
+            self.measure("service_reconciler", self.service_reconciler.start),
+            self.measure("feed", self.feed.start),
+        )
+
+        # The budget covers importing the application and starting it, the two parts of a cold start.
+        self.record("startup", time.perf_counter() - started)
+        total = self.timings["startup"] + self.timings.get("import", 0)
+        self.record("total", total)
+
+        stages = ", ".join(f"{stage} {duration:.3f}" for stage, duration in self.timings.items())
+        print(f"Запуск занял {total:.3f} с ({stages})")
+        if total > self.budget:
+            print(f"Запуск превысил бюджет {self.budget} с")
+
+    async def stop(self):
+        await self.feed.stop()
+        await self.service_reconciler.stop()
+        await self.restart_supervisor.stop()
+        await self.log_capture_service.stop()
+        self.metrics_exporter.unregister()
+        await self.load_balancer.stop()
+        await self.client.close()
+        await self.repository.stop()
+
+
+service_graph = None
+
+
+def get_service_graph() -> ServiceGraph:
+    global service_graph
+
+    if service_graph is None:
+        service_graph = ServiceGraph()
+
+    return service_graph
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    graph = get_service_graph()
+    await graph.start()
+    yield
+    await graph.stop()
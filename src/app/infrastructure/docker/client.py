@@ -0,0 +1,85 @@
+from typing import AsyncIterator
+
+import aiodocker
+import aiohttp
+from aiodocker.multiplexed import multiplexed_result_stream
+
+from src.app.config import DOCKER_CONNECT_TIMEOUT, DOCKER_HOST, DOCKER_KEEPALIVE_TIMEOUT, DOCKER_POOL_SIZE
+
+UNIX_PREFIX = "unix://"
+TCP_PREFIX = "tcp://"
+
+
+class DockerClient:
+    def __init__(
+        self,
+        url: str = DOCKER_HOST,
+        pool_size: int = DOCKER_POOL_SIZE,
+        keepalive_timeout: float = DOCKER_KEEPALIVE_TIMEOUT,
+    ):
+        self.url = url
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.docker: aiodocker.Docker | None = None
+
+    def connect(self) -> aiodocker.Docker:
+        if self.docker is not None:
+            return self.docker
+
+        connector: aiohttp.BaseConnector
+        if self.url.startswith(UNIX_PREFIX):
+            connector = aiohttp.UnixConnector(
+                path=self.url[len(UNIX_PREFIX) :], limit=self.pool_size, keepalive_timeout=self.keepalive_timeout
+            )
+            url = "unix://localhost"
+        else:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive_timeout)
+            url = "http://" + self.url[len(TCP_PREFIX) :] if self.url.startswith(TCP_PREFIX) else self.url
+
+        # Streams (events, logs, stats) are long-lived, so only the connect phase is bounded.
+        session = aiohttp.ClientSession(
+            connector=connector, timeout=aiohttp.ClientTimeout(total=None, sock_connect=DOCKER_CONNECT_TIMEOUT)
+        )
+        self.docker = aiodocker.Docker(url=url, connector=connector, session=session)
+
+        return self.docker
+
+    @property
+    def containers(self) -> aiodocker.containers.DockerContainers:
+        return self.connect().containers
+
+    @property
+    def images(self) -> aiodocker.images.DockerImages:
+        return self.connect().images
+
+    @property
+    def events(self) -> aiodocker.events.DockerEvents:
+        return self.connect().events
+
+    async def stream_logs(self, container_id: str, tty: bool = False, **params) -> AsyncIterator[str]:
+        # aiodocker buffers the whole log unless follow is set, so the request is issued directly.
+        params = {"stdout": True, "stderr": True, **{key: value for key, value in params.items() if value is not None}}
+
+        async with self.connect()._query(f"containers/{container_id}/logs", params=params) as response:
+            async for chunk in multiplexed_result_stream(response, is_tty=tty):
+                yield chunk
+
+    async def close(self):
+        if self.docker is not None:
+            await self.docker.close()
+            self.docker = None
+
+
+docker_client = None
+
+
+def get_docker_client():
+    global docker_client
+
+    if docker_client is None:
+        # Every caller talks to the node registry, a single DOCKER_HOST is a registry of one node.
+        from src.app.infrastructure.docker.cluster import ClusterClient
+
+        docker_client = ClusterClient.from_config()
+
+    return docker_client
@@ -0,0 +1,387 @@
+import asyncio
+from typing import AsyncIterator, Mapping
+
+from aiodocker.containers import DockerContainer
+from aiodocker.exceptions import DockerError
+
+from src.app.config import DOCKER_HOST, DOCKER_NODES, NODE_REFRESH_INTERVAL, PLACEMENT_STRATEGY
+from src.app.infrastructure.docker.client import DockerClient
+from src.app.infrastructure.docker.placement import create_placement, place
+
+NODE_ERRORS = (DockerError, OSError, asyncio.TimeoutError)
+
+
+class Node:
+    def __init__(self, name: str, url: str, address: str = "localhost", labels: dict[str, str] | None = None):
+        self.name = name
+        self.url = url
+        self.address = address
+        self.labels = labels or {}
+        self.client = DockerClient(url)
+        self.cpus = 0
+        self.memory = 0
+        # container id -> (cpus, memory) requested at creation, the input of capacity checks and bin-packing
+        self.containers: dict[str, tuple[float, int]] = {}
+        self.pending: list[tuple[float, int]] = []
+        self.healthy = True
+        self.error = None
+
+    @property
+    def reserved_cpus(self) -> float:
+        return sum(cpus for cpus, _ in self.containers.values()) + sum(cpus for cpus, _ in self.pending)
+
+    @property
+    def reserved_memory(self) -> int:
+        return sum(memory for _, memory in self.containers.values()) + sum(memory for _, memory in self.pending)
+
+    async def refresh(self):
+        try:
+            info = await asyncio.wait_for(self.client.connect().system.info(), NODE_REFRESH_INTERVAL)
+            self.cpus = info.get("NCPU") or 0
+            self.memory = info.get("MemTotal") or 0
+            self.healthy = True
+            self.error = None
+
+        except NODE_ERRORS as e:
+            if self.healthy:
+                print(f"Узел {self.name} недоступен: {e}")
+            self.healthy = False
+            self.error = str(e)
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "url": self.url,
+            "address": self.address,
+            "labels": self.labels,
+            "healthy": self.healthy,
+            "error": self.error,
+            "cpus": self.cpus,
+            "memory": self.memory,
+            "reserved_cpus": self.reserved_cpus,
+            "reserved_memory": self.reserved_memory,
+            "containers": len(self.containers),
+        }
+
+
+def reservation(config: dict) -> tuple[float, int] | None:
+    host_config = config.get("HostConfig")
+    if host_config is None:
+        return None
+
+    return (host_config.get("NanoCpus") or 0) / 1e9, host_config.get("Memory") or 0
+
+
+class NodeContainer:
+    # Handles are created without a request, like aiodocker's, the owning node is looked up on first use.
+    def __init__(self, cluster: "ClusterClient", container_id: str):
+        self.cluster = cluster
+        self._id = container_id
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    async def resolve(self) -> tuple[Node, DockerContainer]:
+        node = await self.cluster.locate(self._id)
+        return node, node.client.containers.container(self._id)
+
+    async def show(self, **kwargs) -> dict:
+        node, container = await self.resolve()
+        data = await container.show(**kwargs)
+        self.cluster.annotate(node, data)
+        self.cluster.track(data["Id"], node, reservation(data))
+
+        return data
+
+    async def start(self, **kwargs):
+        _, container = await self.resolve()
+        await container.start(**kwargs)
+
+    async def stop(self, **kwargs):
+        _, container = await self.resolve()
+        await container.stop(**kwargs)
+
+    async def restart(self, **kwargs):
+        _, container = await self.resolve()
+        await container.restart(**kwargs)
+
+    async def kill(self, **kwargs):
+        _, container = await self.resolve()
+        await container.kill(**kwargs)
+
+    async def rename(self, name: str):
+        _, container = await self.resolve()
+        await container.rename(name)
+
+    async def pause(self):
+        _, container = await self.resolve()
+        await container.pause()
+
+    async def unpause(self):
+        _, container = await self.resolve()
+        await container.unpause()
+
+    async def log(self, **kwargs) -> list[str]:
+        _, container = await self.resolve()
+        return await container.log(**kwargs)
+
+    async def delete(self, **kwargs):
+        _, container = await self.resolve()
+        await container.delete(**kwargs)
+        self.cluster.untrack(self._id)
+
+    def stats(self, *, stream: bool = True):
+        return self.stream_stats() if stream else self.stats_once()
+
+    async def stats_once(self) -> list:
+        _, container = await self.resolve()
+        return await container.stats(stream=False)
+
+    async def stream_stats(self) -> AsyncIterator[dict]:
+        _, container = await self.resolve()
+        async for stats in container.stats(stream=True):
+            yield stats
+
+
+class ClusterContainers:
+    def __init__(self, cluster: "ClusterClient"):
+        self.cluster = cluster
+
+    async def list_reachable(self, **kwargs) -> tuple[list[DockerContainer], set[str]]:
+        # Also names the nodes that were not listed, their containers are unknown rather than gone.
+        nodes = self.cluster.available()
+        results = await asyncio.gather(
+            *(node.client.containers.list(**kwargs) for node in nodes), return_exceptions=True
+        )
+
+        containers = []
+        errors = []
+        unreachable = set(self.cluster.nodes) - {node.name for node in nodes}
+        for node, result in zip(nodes, results):
+            if isinstance(result, BaseException):
+                print(f"Не удалось получить список контейнеров узла {node.name}: {result}")
+                errors.append(result)
+                unreachable.add(node.name)
+                continue
+
+            # A full listing is authoritative for the node, containers it no longer reports are forgotten.
+            if kwargs.get("all") and not kwargs.get("filters"):
+                listed = {container.id for container in result}
+                for container_id in [cid for cid in node.containers if cid not in listed]:
+                    self.cluster.untrack(container_id)
+
+            for container in result:
+                self.cluster.annotate(node, container._container)
+                self.cluster.track(container.id, node)
+                containers.append(container)
+
+        if errors and len(errors) == len(nodes):
+            raise errors[0]
+
+        return containers, unreachable
+
+    async def list(self, **kwargs) -> list[DockerContainer]:
+        containers, _ = await self.list_reachable(**kwargs)
+        return containers
+
+    def container(self, container_id: str) -> NodeContainer:
+        return NodeContainer(self.cluster, container_id)
+
+    async def get(self, container_id: str, **kwargs) -> DockerContainer:
+        node = await self.cluster.locate(container_id)
+        container = await node.client.containers.get(container_id, **kwargs)
+        self.cluster.annotate(node, container._container)
+        self.cluster.track(container.id, node, reservation(container._container))
+
+        return container
+
+    async def create(self, config: dict, *, name: str | None = None) -> DockerContainer:
+        node = place(self.cluster.available(), config, self.cluster.strategy)
+        reserved = reservation(config) or (0, 0)
+
+        # Concurrent placements see each other through pending, so a parallel batch neither piles up on one node
+        # nor overcommits it.
+        node.pending.append(reserved)
+        try:
+            try:
+                container = await node.client.containers.create(config, name=name)
+            except DockerError as e:
+                if e.status != 404 or "Image" not in config:
+                    raise
+                # Images are resolved cluster-wide, a node that joined later may still miss one.
+                print(f"Загрузка образа {config['Image']} на узел {node.name}")
+                await node.client.images.pull(config["Image"])
+                container = await node.client.containers.create(config, name=name)
+        finally:
+            node.pending.remove(reserved)
+
+        self.cluster.track(container.id, node, reserved)
+        print(f"Контейнер {container.id[:12]} размещен на узле {node.name}")
+
+        return container
+
+    async def run(self, config: dict, *, name: str | None = None) -> DockerContainer:
+        container = await self.create(config, name=name)
+        await container.start()
+
+        return container
+
+
+class ClusterImages:
+    def __init__(self, cluster: "ClusterClient"):
+        self.cluster = cluster
+
+    async def inspect(self, image: str) -> Mapping:
+        # An image counts as present only when every reachable node has it, any 404 makes the caller pull.
+        results = await asyncio.gather(*(node.client.images.inspect(image) for node in self.cluster.available()))
+        return results[0]
+
+    async def list(self, **kwargs) -> list[dict]:
+        results = await asyncio.gather(*(node.client.images.list(**kwargs) for node in self.cluster.available()))
+        return list({image["Id"]: image for images in results for image in images}.values())
+
+    async def pull(self, image: str, **kwargs):
+        await asyncio.gather(*(node.client.images.pull(image, **kwargs) for node in self.cluster.available()))
+
+
+class ClusterEvents:
+    def __init__(self, cluster: "ClusterClient"):
+        self.cluster = cluster
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.tasks: list[asyncio.Task] = []
+
+    def subscribe(self, filters: dict | None = None) -> asyncio.Queue:
+        if not self.tasks:
+            # A fresh queue per subscription, events left from a stopped one are not replayed.
+            self.queue = asyncio.Queue()
+            self.tasks = [asyncio.create_task(self.forward(node, filters)) for node in self.cluster.nodes.values()]
+
+        return self.queue
+
+    async def forward(self, node: Node, filters: dict | None):
+        # Each node has its own stream, one daemon going away does not interrupt the events of the others.
+        while True:
+            try:
+                subscriber = node.client.events.subscribe(filters=filters)
+                while (event := await subscriber.get()) is not None:
+                    self.cluster.observe(node, event)
+                    await self.queue.put(event)
+            except NODE_ERRORS as e:
+                print(f"Поток событий узла {node.name} прерван: {e}")
+            finally:
+                await node.client.events.stop()
+
+            await asyncio.sleep(1)
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+
+class ClusterClient:
+    def __init__(
+        self, nodes: list[Node], strategy: str = PLACEMENT_STRATEGY, refresh_interval: float = NODE_REFRESH_INTERVAL
+    ):
+        create_placement(strategy)
+        self.nodes = {node.name: node for node in nodes}
+        self.strategy = strategy
+        self.refresh_interval = refresh_interval
+        self.owners: dict[str, Node] = {}
+        self.containers = ClusterContainers(self)
+        self.images = ClusterImages(self)
+        self.events = ClusterEvents(self)
+        self.refresh_task = None
+
+    @classmethod
+    def from_config(cls, nodes: dict = DOCKER_NODES) -> "ClusterClient":
+        if not nodes:
+            return cls([Node("local", DOCKER_HOST)])
+
+        return cls([Node(name, **node) for name, node in nodes.items()])
+
+    async def start(self):
+        if self.refresh_task is not None:
+            return
+
+        await self.refresh()
+        self.refresh_task = asyncio.create_task(self.refresh_loop())
+
+    async def refresh(self):
+        await asyncio.gather(*(node.refresh() for node in self.nodes.values()))
+
+    async def refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def available(self) -> list[Node]:
+        return [node for node in self.nodes.values() if node.healthy] or list(self.nodes.values())
+
+    def describe(self) -> list[dict]:
+        return [node.describe() for node in self.nodes.values()]
+
+    def annotate(self, node: Node, data: dict):
+        data["Node"] = {"Name": node.name, "IP": node.address}
+
+    def track(self, container_id: str, node: Node, reserved: tuple[float, int] | None = None):
+        previous = self.owners.get(container_id)
+        if previous is not None and previous is not node:
+            previous.containers.pop(container_id, None)
+
+        self.owners[container_id] = node
+        if reserved is not None or container_id not in node.containers:
+            node.containers[container_id] = reserved or node.containers.get(container_id, (0, 0))
+
+    def untrack(self, container_id: str):
+        node = self.owners.pop(container_id, None)
+        if node is not None:
+            node.containers.pop(container_id, None)
+
+    def observe(self, node: Node, event: dict):
+        self.annotate(node, event)
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        action = event.get("Action") or event.get("status", "")
+
+        if action == "destroy":
+            self.untrack(container_id)
+        elif container_id:
+            self.track(container_id, node)
+
+    async def locate(self, container_id: str) -> Node:
+        node = self.owners.get(container_id)
+        if node is not None:
+            return node
+
+        if len(self.nodes) == 1:
+            return next(iter(self.nodes.values()))
+
+        # Short ids from the API are matched against known containers before asking every daemon.
+        matches = {owner for cid, owner in self.owners.items() if cid.startswith(container_id)}
+        if len(matches) == 1:
+            return matches.pop()
+
+        nodes = list(self.nodes.values())
+        results = await asyncio.gather(
+            *(node.client.containers.get(container_id) for node in nodes), return_exceptions=True
+        )
+        for node, result in zip(nodes, results):
+            if isinstance(result, DockerContainer):
+                self.track(result.id, node, reservation(result._container))
+                return node
+
+        raise DockerError(404, {"message": f"No such container: {container_id}"})
+
+    async def stream_logs(self, container_id: str, tty: bool = False, **params) -> AsyncIterator[str]:
+        node = await self.locate(container_id)
+        async for chunk in node.client.stream_logs(container_id, tty=tty, **params):
+            yield chunk
+
+    async def close(self):
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+            self.refresh_task = None
+
+        await self.events.stop()
+        await asyncio.gather(*(node.client.close() for node in self.nodes.values()))
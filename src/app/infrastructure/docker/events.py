@@ -0,0 +1,52 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from aiodocker.exceptions import DockerError
+
+
+def event_container_id(event: dict) -> str | None:
+    return event.get("id") or event.get("Actor", {}).get("ID")
+
+
+def event_action(event: dict) -> str:
+    return event.get("Action") or event.get("status", "")
+
+
+class DockerEventListener:
+    def __init__(self, client, filters: dict | None = None):
+        self.client = client
+        self.filters = filters or {"type": ["container"]}
+        self.handlers: list[Callable[[dict], Awaitable[None]]] = []
+        self.task = None
+
+    def subscribe(self, handler):
+        self.handlers.append(handler)
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def listen(self):
+        while True:
+            try:
+                subscriber = self.client.events.subscribe(filters=self.filters)
+                while (event := await subscriber.get()) is not None:
+                    await self.dispatch(event)
+            except (DockerError, OSError) as e:
+                print(f"Поток событий Docker прерван: {e}")
+            finally:
+                await self.client.events.stop()
+
+            await asyncio.sleep(1)
+
+    async def dispatch(self, event: dict):
+        for handler in self.handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                print(f"Ошибка при обработке события {event.get('Action')}: {e}")
@@ -0,0 +1,98 @@
+from aiodocker.exceptions import DockerError
+
+STRATEGY_LABEL = "placement.strategy"
+CONSTRAINT_PREFIX = "placement.node."
+PREFERENCE_PREFIX = "placement.prefer."
+
+
+class PlacementRequest:
+    def __init__(self, config: dict):
+        host_config = config.get("HostConfig") or {}
+        self.cpus = (host_config.get("NanoCpus") or 0) / 1e9
+        self.memory = host_config.get("Memory") or 0
+        self.labels = config.get("Labels") or {}
+
+    def prefixed(self, prefix: str) -> dict[str, str]:
+        return {key[len(prefix) :]: value for key, value in self.labels.items() if key.startswith(prefix)}
+
+
+class PlacementStrategy:
+    name = ""
+
+    def rank(self, nodes: list, request: PlacementRequest) -> list:
+        raise NotImplementedError
+
+    @staticmethod
+    def load(node) -> int:
+        return len(node.containers) + len(node.pending)
+
+
+class SpreadStrategy(PlacementStrategy):
+    name = "spread"
+
+    def rank(self, nodes: list, request: PlacementRequest) -> list:
+        return sorted(nodes, key=lambda node: (self.load(node), node.name))
+
+
+class BinpackStrategy(PlacementStrategy):
+    name = "binpack"
+
+    def rank(self, nodes: list, request: PlacementRequest) -> list:
+        # The fullest node that still fits goes first, so whole nodes stay free for large containers.
+        def usage(node) -> float:
+            cpu = (node.reserved_cpus + request.cpus) / node.cpus if node.cpus else 0
+            memory = (node.reserved_memory + request.memory) / node.memory if node.memory else 0
+            return cpu + memory
+
+        return sorted(nodes, key=lambda node: (-usage(node), -self.load(node), node.name))
+
+
+class AffinityStrategy(PlacementStrategy):
+    name = "affinity"
+
+    def rank(self, nodes: list, request: PlacementRequest) -> list:
+        preferences = request.prefixed(PREFERENCE_PREFIX).items()
+
+        def matches(node) -> int:
+            return sum(1 for key, value in preferences if node.labels.get(key) == value)
+
+        return sorted(nodes, key=lambda node: (-matches(node), self.load(node), node.name))
+
+
+PLACEMENT_STRATEGIES = {strategy.name: strategy for strategy in (SpreadStrategy, BinpackStrategy, AffinityStrategy)}
+
+
+def create_placement(name: str) -> PlacementStrategy:
+    strategy = PLACEMENT_STRATEGIES.get(name)
+    if strategy is None:
+        raise DockerError(400, {"message": f"Unknown placement strategy {name}"})
+
+    return strategy()
+
+
+def fits(node, request: PlacementRequest) -> bool:
+    if not node.healthy:
+        return False
+
+    for key, value in request.prefixed(CONSTRAINT_PREFIX).items():
+        if node.labels.get(key) != value:
+            return False
+
+    # Capacity is only enforced once the node reported it and the container asks for a limit.
+    if request.cpus and node.cpus and node.reserved_cpus + request.cpus > node.cpus:
+        return False
+
+    if request.memory and node.memory and node.reserved_memory + request.memory > node.memory:
+        return False
+
+    return True
+
+
+def place(nodes: list, config: dict, default_strategy: str):
+    request = PlacementRequest(config)
+    candidates = [node for node in nodes if fits(node, request)]
+    if not candidates:
+        raise DockerError(503, {"message": "No node can run the container"})
+
+    strategy = create_placement(request.labels.get(STRATEGY_LABEL, default_strategy))
+    return strategy.rank(candidates, request)[0]
@@ -0,0 +1,34 @@
+from src.app.config import REPOSITORY_URL
+from src.app.infrastructure.repository.base import Repository
+
+SQLITE_PREFIX = "sqlite:///"
+POSTGRES_PREFIXES = ("postgres://", "postgresql://")
+
+repository = None
+
+
+def create_repository(url: str = REPOSITORY_URL) -> Repository:
+    if url.startswith(SQLITE_PREFIX):
+        from src.app.infrastructure.repository.sqlite import SQLiteRepository
+
+        return SQLiteRepository(url[len(SQLITE_PREFIX) :])
+
+    if url.startswith(POSTGRES_PREFIXES):
+        # asyncpg is only imported when a PostgreSQL URL is configured.
+        from src.app.infrastructure.repository.postgres import PostgresRepository
+
+        return PostgresRepository(url)
+
+    raise ValueError(f"Unsupported repository URL: {url}")
+
+
+def get_repository() -> Repository:
+    global repository
+
+    if repository is None:
+        repository = create_repository()
+
+    return repository
+
+
+__all__ = ["Repository", "create_repository", "get_repository"]
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+
+from src.app.config import (
+    REPOSITORY_BATCH_SIZE,
+    REPOSITORY_FLUSH_INTERVAL,
+    REPOSITORY_MAX_PENDING,
+    REPOSITORY_RETENTION,
+)
+from src.app.core.schemas.container import Container
+from src.app.core.schemas.service import ServiceSpec
+
+PRUNE_INTERVAL = 3600
+
+# Upserts keep one row per key, a later change in the same batch replaces the earlier one. History tables are
+# append-only and indexed by (key, timestamp) for the startup reads.
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS services (name TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at {real} NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS containers "
+    "(id TEXT PRIMARY KEY, image TEXT NOT NULL, data TEXT NOT NULL, updated_at {real} NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS containers_image ON containers (image)",
+    "CREATE TABLE IF NOT EXISTS scaling_events "
+    "(timestamp {real} NOT NULL, image TEXT NOT NULL, action TEXT NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS scaling_events_image ON scaling_events (image, timestamp)",
+    "CREATE INDEX IF NOT EXISTS scaling_events_timestamp ON scaling_events (timestamp)",
+    "CREATE TABLE IF NOT EXISTS restarts (timestamp {real} NOT NULL, container_id TEXT NOT NULL, data TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS restarts_container ON restarts (container_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS restarts_timestamp ON restarts (timestamp)",
+]
+
+UPSERT_SERVICE = (
+    "INSERT INTO services (name, data, updated_at) VALUES ({0}, {1}, {2}) "
+    "ON CONFLICT (name) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at"
+)
+DELETE_SERVICE = "DELETE FROM services WHERE name = {0}"
+UPSERT_CONTAINER = (
+    "INSERT INTO containers (id, image, data, updated_at) VALUES ({0}, {1}, {2}, {3}) "
+    "ON CONFLICT (id) DO UPDATE SET image = excluded.image, data = excluded.data, updated_at = excluded.updated_at"
+)
+DELETE_CONTAINER = "DELETE FROM containers WHERE id = {0}"
+INSERT_SCALING_EVENT = "INSERT INTO scaling_events (timestamp, image, action, data) VALUES ({0}, {1}, {2}, {3})"
+INSERT_RESTART = "INSERT INTO restarts (timestamp, container_id, data) VALUES ({0}, {1}, {2})"
+PRUNE = ["DELETE FROM scaling_events WHERE timestamp < {0}", "DELETE FROM restarts WHERE timestamp < {0}"]
+
+SELECT_SERVICES = "SELECT data FROM services ORDER BY name"
+SELECT_CONTAINERS = "SELECT data FROM containers"
+SELECT_SCALING_EVENTS = "SELECT data FROM scaling_events ORDER BY timestamp DESC LIMIT {0}"
+SELECT_IMAGE_SCALING_EVENTS = "SELECT data FROM scaling_events WHERE image = {0} ORDER BY timestamp DESC LIMIT {1}"
+SELECT_RESTARTS = "SELECT data FROM restarts ORDER BY timestamp DESC LIMIT {0}"
+SELECT_CONTAINER_RESTARTS = "SELECT data FROM restarts WHERE container_id = {0} ORDER BY timestamp DESC LIMIT {1}"
+
+
+@dataclass
+class Batch:
+    services: dict[str, tuple | None] = field(default_factory=dict)
+    containers: dict[str, tuple | None] = field(default_factory=dict)
+    scaling_events: list[tuple] = field(default_factory=list)
+    restarts: list[tuple] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.services) + len(self.containers) + len(self.scaling_events) + len(self.restarts)
+
+    def statements(self) -> list[tuple[str, list[tuple]]]:
+        return [
+            (DELETE_SERVICE, [(name,) for name, row in self.services.items() if row is None]),
+            (UPSERT_SERVICE, [row for row in self.services.values() if row is not None]),
+            (DELETE_CONTAINER, [(cid,) for cid, row in self.containers.items() if row is None]),
+            (UPSERT_CONTAINER, [row for row in self.containers.values() if row is not None]),
+            (INSERT_SCALING_EVENT, self.scaling_events),
+            (INSERT_RESTART, self.restarts),
+        ]
+
+
+class Repository:
+    placeholder = "?"
+    real_type = "REAL"
+
+    def __init__(
+        self,
+        flush_interval: float = REPOSITORY_FLUSH_INTERVAL,
+        batch_size: int = REPOSITORY_BATCH_SIZE,
+        max_pending: int = REPOSITORY_MAX_PENDING,
+        retention: float = REPOSITORY_RETENTION,
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.retention = retention
+        self.pending = Batch()
+        self.flush_event = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.last_pruned = 0.0
+        self.task = None
+
+    def sql(self, statement: str) -> str:
+        return statement.format(*(self.placeholder.format(i) for i in range(1, 10)))
+
+    async def start(self):
+        if self.task is not None:
+            return
+
+        await self.connect()
+        for statement in SCHEMA:
+            await self.execute(statement.format(real=self.real_type))
+        self.task = asyncio.create_task(self.flush_loop())
+
+    async def stop(self):
+        if self.task is None:
+            return
+
+        self.task.cancel()
+        self.task = None
+        await self.flush()
+        await self.close()
+
+    async def flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self.flush_event.clear()
+            await self.flush()
+
+            if time.monotonic() - self.last_pruned > PRUNE_INTERVAL:
+                self.last_pruned = time.monotonic()
+                try:
+                    await self.write([(self.sql(statement), [(time.time() - self.retention,)]) for statement in PRUNE])
+                except Exception as e:
+                    print(f"Ошибка при очистке истории: {e}")
+
+    async def flush(self):
+        async with self.flush_lock:
+            batch, self.pending = self.pending, Batch()
+            if not batch:
+                return
+
+            try:
+                await self.write([(self.sql(statement), rows) for statement, rows in batch.statements() if rows])
+
+            except Exception as e:
+                print(f"Ошибка при сохранении состояния ({len(batch)} записей): {e}")
+                self.requeue(batch)
+
+    def requeue(self, batch: Batch):
+        # Newer changes win over the failed ones, history that does not fit into max_pending is dropped oldest first.
+        self.pending.services = {**batch.services, **self.pending.services}
+        self.pending.containers = {**batch.containers, **self.pending.containers}
+        self.pending.scaling_events = (batch.scaling_events + self.pending.scaling_events)[-self.max_pending :]
+        self.pending.restarts = (batch.restarts + self.pending.restarts)[-self.max_pending :]
+
+    def enqueued(self):
+        if len(self.pending) >= self.batch_size:
+            self.flush_event.set()
+
+    def append(self, rows: list[tuple], row: tuple):
+        rows.append(row)
+        if len(rows) > self.max_pending:
+            del rows[: len(rows) - self.max_pending]
+        self.enqueued()
+
+    def save_service(self, spec: ServiceSpec):
+        self.pending.services[spec.name] = (spec.name, spec.model_dump_json(), time.time())
+        self.enqueued()
+
+    def delete_service(self, name: str):
+        self.pending.services[name] = None
+        self.enqueued()
+
+    def save_container(self, container: Container):
+        row = (container.id, container.image, container.model_dump_json(), time.time())
+        self.pending.containers[container.id] = row
+        self.enqueued()
+
+    def delete_container(self, container_id: str):
+        self.pending.containers[container_id] = None
+        self.enqueued()
+
+    def add_scaling_event(self, event: dict):
+        row = (event["timestamp"], event["image"], event["action"], json.dumps(event))
+        self.append(self.pending.scaling_events, row)
+
+    def add_restart(self, restart: dict):
+        row = (restart["timestamp"], restart["container_id"], json.dumps(restart))
+        self.append(self.pending.restarts, row)
+
+    async def load_services(self) -> list[ServiceSpec]:
+        await self.flush()
+        return [ServiceSpec.model_validate_json(data) for data in await self.fetch(self.sql(SELECT_SERVICES))]
+
+    async def load_containers(self) -> list[Container]:
+        await self.flush()
+        return [Container.model_validate_json(data) for data in await self.fetch(self.sql(SELECT_CONTAINERS))]
+
+    async def load_scaling_events(self, limit: int, image: str | None = None) -> list[dict]:
+        await self.flush()
+        if image is None:
+            rows = await self.fetch(self.sql(SELECT_SCALING_EVENTS), limit)
+        else:
+            rows = await self.fetch(self.sql(SELECT_IMAGE_SCALING_EVENTS), image, limit)
+
+        return [json.loads(data) for data in reversed(rows)]
+
+    async def load_restarts(self, limit: int, container_id: str | None = None) -> list[dict]:
+        await self.flush()
+        if container_id is None:
+            rows = await self.fetch(self.sql(SELECT_RESTARTS), limit)
+        else:
+            rows = await self.fetch(self.sql(SELECT_CONTAINER_RESTARTS), container_id, limit)
+
+        return [json.loads(data) for data in reversed(rows)]
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def execute(self, statement: str):
+        raise NotImplementedError
+
+    async def write(self, statements: list[tuple[str, list[tuple]]]):
+        raise NotImplementedError
+
+    async def fetch(self, statement: str, *args) -> list[str]:
+        raise NotImplementedError
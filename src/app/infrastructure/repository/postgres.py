@@ -0,0 +1,40 @@
+import asyncpg
+
+from src.app.config import REPOSITORY_POOL_SIZE
+from src.app.infrastructure.repository.base import Repository
+
+
+class PostgresRepository(Repository):
+    placeholder = "${}"
+    real_type = "DOUBLE PRECISION"
+
+    def __init__(self, dsn: str, pool_size: int = REPOSITORY_POOL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self.pool: asyncpg.Pool | None = None
+
+    async def connect(self):
+        self.pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=self.pool_size)
+
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    @property
+    def db(self) -> asyncpg.Pool:
+        # connect() runs at startup, before the first statement.
+        assert self.pool is not None
+        return self.pool
+
+    async def execute(self, statement: str):
+        await self.db.execute(statement)
+
+    async def write(self, statements: list[tuple[str, list[tuple]]]):
+        async with self.db.acquire() as connection, connection.transaction():
+            for statement, rows in statements:
+                await connection.executemany(statement, rows)
+
+    async def fetch(self, statement: str, *args) -> list[str]:
+        return [row[0] for row in await self.db.fetch(statement, *args)]
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sqlite3
+
+from src.app.infrastructure.repository.base import Repository
+
+
+class SQLiteRepository(Repository):
+    placeholder = "?"
+    real_type = "REAL"
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.connection: sqlite3.Connection | None = None
+        # sqlite3 blocks, every call runs in a worker thread and the lock keeps them on one connection in turn.
+        self.lock = asyncio.Lock()
+
+    async def run(self, function, *args):
+        async with self.lock:
+            return await asyncio.to_thread(function, *args)
+
+    async def connect(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        await self.execute("PRAGMA journal_mode=WAL")
+        await self.execute("PRAGMA synchronous=NORMAL")
+
+    async def close(self):
+        if self.connection is not None:
+            await self.run(self.connection.close)
+            self.connection = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        # connect() runs at startup, before the first statement.
+        assert self.connection is not None
+        return self.connection
+
+    async def execute(self, statement: str):
+        await self.run(self.db.execute, statement)
+
+    async def write(self, statements: list[tuple[str, list[tuple]]]):
+        await self.run(self.write_sync, statements)
+
+    def write_sync(self, statements: list[tuple[str, list[tuple]]]):
+        self.db.execute("BEGIN")
+        try:
+            for statement, rows in statements:
+                self.db.executemany(statement, rows)
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+        self.db.execute("COMMIT")
+
+    async def fetch(self, statement: str, *args) -> list[str]:
+        rows = await self.run(lambda: self.db.execute(statement, args).fetchall())
+        return [row[0] for row in rows]
@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from src.app.api.init import init_routers
+from src.app.graph import lifespan
 
 
 def create_app() -> FastAPI:
@@ -12,6 +13,7 @@ def create_app() -> FastAPI:
         title="Container Management Systems",
         description="description",
         version="1.0.0",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
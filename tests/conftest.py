@@ -0,0 +1,49 @@
+import pytest
+from aiohttp import web
+
+from benchmarks.fake_docker import FakeDocker
+from src.app.infrastructure.docker.cluster import ClusterClient, Node
+
+
+class FakeNode:
+    # A fake daemon on its own unix socket, stopped mid-test to take its node down.
+    def __init__(self, socket: str, containers: int, labels: dict[str, str]):
+        self.socket = socket
+        self.labels = labels
+        self.docker = FakeDocker(containers=containers)
+        self.runner = web.AppRunner(self.docker.app(), access_log=None)
+
+    async def start(self):
+        await self.runner.setup()
+        await web.UnixSite(self.runner, self.socket).start()
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+@pytest.fixture
+async def daemons(tmp_path):
+    # Uneven fleets, so spread placement has a less loaded node to prefer.
+    nodes = {
+        "node-a": FakeNode(str(tmp_path / "a.sock"), containers=3, labels={"zone": "a"}),
+        "node-b": FakeNode(str(tmp_path / "b.sock"), containers=1, labels={"zone": "b"}),
+    }
+    for node in nodes.values():
+        await node.start()
+
+    yield nodes
+
+    for node in nodes.values():
+        await node.stop()
+
+
+@pytest.fixture
+async def cluster(daemons):
+    client = ClusterClient(
+        [Node(name, f"unix://{daemon.socket}", labels=daemon.labels) for name, daemon in daemons.items()]
+    )
+    await client.refresh()
+
+    yield client
+
+    await client.close()
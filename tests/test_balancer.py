@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from starlette.requests import Request
+
+from src.app.api.balancer.service import LoadBalancer
+from src.app.core.schemas.container import Container
+
+CHUNK = 1024
+
+
+@pytest.fixture
+async def upstream():
+    # Sends the first half of the body, the second only once the test lets it.
+    resume = asyncio.Event()
+
+    async def stream(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"a" * CHUNK)
+        await resume.wait()
+        await response.write(b"b" * CHUNK)
+        return response
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", stream)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+
+    yield f"http://{host}:{port}", resume
+
+    resume.set()
+    await runner.cleanup()
+
+
+def request(path: str) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+    )
+
+
+async def test_ejection_keeps_streaming_responses(cluster, upstream):
+    url, resume = upstream
+    balancer = LoadBalancer(cluster)
+    # A healthy sibling, so the ejected backend really leaves the pool.
+    sibling = Container(id="e" * 64, image="app:latest", status="running", url="http://127.0.0.1:1", labels={})
+    container = Container(id="f" * 64, image="app:latest", status="running", url=url, labels={})
+    for backend in (sibling, container):
+        balancer.inventory.add(backend, persist=False)
+        balancer.readiness.mark_ready(backend.id)
+
+    response, finish = await balancer.send(None, "stream", request("/stream"))
+    chunks = response.aiter_raw()
+    first = await anext(chunks)
+
+    balancer.health.eject(balancer.health.state(container), "test")
+    balancer.get_pool(None)
+    resume.set()
+    body = first + b"".join([chunk async for chunk in chunks])
+    await finish()
+
+    assert body == b"a" * CHUNK + b"b" * CHUNK
+    assert url in balancer.proxy.clients
+
+    for backend in (sibling, container):
+        balancer.inventory.remove(backend.id, persist=False)
+    await balancer.proxy.close()
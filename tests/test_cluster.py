@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from aiodocker.exceptions import DockerError
+
+from src.app.api.container.inventory import ContainerInventory
+from src.app.infrastructure.docker.cluster import NODE_ERRORS
+
+IMAGE = "app:latest"
+
+
+def ids(daemon) -> set[str]:
+    return set(daemon.docker.containers)
+
+
+async def test_list_merges_nodes(cluster, daemons):
+    containers = await cluster.containers.list(all=True)
+
+    assert {c.id for c in containers} == ids(daemons["node-a"]) | ids(daemons["node-b"])
+    for container in containers:
+        node = container._container["Node"]["Name"]
+        assert container.id in ids(daemons[node])
+        assert cluster.owners[container.id].name == node
+
+
+async def test_container_calls_go_to_the_owning_node(cluster, daemons):
+    container_id = next(iter(ids(daemons["node-b"])))
+
+    data = await cluster.containers.container(container_id).show()
+
+    assert data["Node"]["Name"] == "node-b"
+    assert cluster.owners[container_id].name == "node-b"
+
+
+async def test_spread_fills_the_least_loaded_node(cluster, daemons):
+    await cluster.containers.list(all=True)
+
+    created = await asyncio.gather(*(cluster.containers.create({"Image": IMAGE}) for _ in range(4)))
+
+    # Parallel creates see each other's reservations: 3 and 1 containers end up as 4 and 4.
+    assert sum(c.id in ids(daemons["node-a"]) for c in created) == 1
+    assert sum(c.id in ids(daemons["node-b"]) for c in created) == 3
+
+
+async def test_constraint_overrides_load(cluster, daemons):
+    await cluster.containers.list(all=True)
+
+    container = await cluster.containers.create({"Image": IMAGE, "Labels": {"placement.node.zone": "a"}})
+
+    assert container.id in ids(daemons["node-a"])
+
+
+async def test_unsatisfiable_constraint_is_rejected(cluster):
+    with pytest.raises(DockerError) as error:
+        await cluster.containers.create({"Image": IMAGE, "Labels": {"placement.node.zone": "c"}})
+
+    assert error.value.status == 503
+
+
+async def test_list_skips_a_node_that_went_down(cluster, daemons):
+    await daemons["node-b"].stop()
+
+    # Before the next refresh the node is still listed as healthy, its failure only drops its containers.
+    containers = await cluster.containers.list(all=True)
+
+    assert {c.id for c in containers} == ids(daemons["node-a"])
+
+
+async def test_down_node_is_not_placed_on(cluster, daemons):
+    await daemons["node-b"].stop()
+    await cluster.refresh()
+
+    container = await cluster.containers.create({"Image": IMAGE})
+
+    assert not cluster.nodes["node-b"].healthy
+    assert cluster.nodes["node-b"].error
+    assert container.id in ids(daemons["node-a"])
+    assert [node["healthy"] for node in cluster.describe()] == [True, False]
+
+
+async def test_list_fails_when_every_node_is_down(cluster, daemons):
+    for daemon in daemons.values():
+        await daemon.stop()
+
+    with pytest.raises(NODE_ERRORS):
+        await cluster.containers.list(all=True)
+
+
+@pytest.mark.parametrize("refreshed", [False, True])
+async def test_resync_keeps_containers_of_a_down_node(cluster, daemons, refreshed):
+    inventory = ContainerInventory(cluster)
+    await inventory.resync()
+    before = ids(daemons["node-b"])
+    removed = daemons["node-a"].docker.containers.popitem()[0]
+
+    await daemons["node-b"].stop()
+    if refreshed:
+        await cluster.refresh()
+    await inventory.resync()
+
+    # The down node's containers stay as they were, the reachable node is still authoritative.
+    assert set(inventory.containers) == ids(daemons["node-a"]) | before
+    assert removed not in inventory.containers